@@ -7,6 +7,11 @@ class CartAdmin(admin.ModelAdmin):
     list_filter = ['created_at', 'updated_at']
     search_fields = ['user__email', 'guest_email', 'session_key']
     readonly_fields = ['session_key', 'created_at', 'updated_at']
+    list_select_related = ['user']
+
+    def get_queryset(self, request):
+        # Totals are summed from the prefetched items
+        return super().get_queryset(request).prefetch_related('items__product')
 
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
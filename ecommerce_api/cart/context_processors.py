@@ -3,25 +3,28 @@ from django.db import DatabaseError
 
 def cart_context(request):
     """Make cart available in all templates"""
+    # Memoized so several renders in one request share the lookup
+    if hasattr(request, '_cart_context'):
+        return request._cart_context
+
     cart = None
     cart_item_count = 0
 
     try:
+        # Rendering a page must not create a cart
         if request.user.is_authenticated:
-            cart, created = Cart.objects.get_or_create(user=request.user)
+            cart = Cart.objects.filter(user=request.user).first()
+        elif hasattr(request, 'cart'):
+            cart = request.cart.get()
+        if cart is not None:
             cart_item_count = cart.total_items
-        elif 'cart_id' in request.session:
-            try:
-                cart = Cart.objects.get(id=request.session['cart_id'])
-                cart_item_count = cart.total_items
-            except Cart.DoesNotExist:
-                pass
     except DatabaseError:
         # If transaction broken or DB error during template rendering, fail silently
         cart = None
         cart_item_count = 0
 
-    return {
+    request._cart_context = {
         'cart': cart,
         'cart_item_count': cart_item_count
     }
+    return request._cart_context
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from cart.models import Cart, CartItem
+
+
+class Command(BaseCommand):
+    help = 'Delete empty and stale anonymous carts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empty-hours',
+            type=int,
+            default=24,
+            help='Delete anonymous carts without items older than this many hours',
+        )
+        parser.add_argument(
+            '--stale-days',
+            type=int,
+            default=30,
+            help='Delete anonymous carts untouched for this many days, items included',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of carts deleted per query',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many carts would be deleted',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        empty_cutoff = now - timedelta(hours=options['empty_hours'])
+        stale_cutoff = now - timedelta(days=options['stale_days'])
+
+        anonymous = Cart.objects.filter(user__isnull=True)
+        has_items = Exists(CartItem.objects.filter(cart=OuterRef('pk')))
+        recently_touched_items = Exists(
+            CartItem.objects.filter(cart=OuterRef('pk'), updated_at__gte=stale_cutoff)
+        )
+        querysets = {
+            'empty': anonymous.filter(~has_items, created_at__lt=empty_cutoff),
+            'stale': anonymous.filter(~recently_touched_items, updated_at__lt=stale_cutoff),
+        }
+
+        for label, queryset in querysets.items():
+            if options['dry_run']:
+                self.stdout.write(f'Would delete {queryset.count()} {label} anonymous carts')
+                continue
+
+            deleted = self._delete_in_batches(queryset, options['batch_size'])
+            self.stdout.write(
+                self.style.SUCCESS(f'Deleted {deleted} {label} anonymous carts')
+            )
+
+    def _delete_in_batches(self, queryset, batch_size):
+        # Short batches keep each DELETE (and its cascade to items) small
+        deleted = 0
+        while True:
+            ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            Cart.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
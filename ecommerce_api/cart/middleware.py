@@ -1,22 +1,62 @@
 from .models import Cart
 
+
+class LazyCart:
+    """
+    Session cart for anonymous users that is only inserted on first write.
+
+    Reading (`get()`, `id`, truthiness) never writes to the database or the
+    session; `materialize()` creates the cart and remembers it in the session
+    when the visitor actually adds something.
+    """
+    session_key = 'cart_id'
+
+    def __init__(self, request):
+        self._request = request
+        self._cart = None
+        self._loaded = False
+
+    def get(self):
+        """The existing session cart, or None"""
+        if not self._loaded:
+            cart_id = self._request.session.get(self.session_key)
+            if cart_id is not None:
+                self._cart = Cart.objects.filter(id=cart_id).first()
+            self._loaded = True
+        return self._cart
+
+    def materialize(self):
+        """The session cart, created on first use"""
+        cart = self.get()
+        if cart is None:
+            cart = Cart.objects.create()
+            self._request.session[self.session_key] = cart.id
+            self._cart = cart
+        return cart
+
+    def forget(self):
+        """Detach the cart from the session, e.g. after merging it on login"""
+        self._request.session.pop(self.session_key, None)
+        self._cart = None
+        self._loaded = True
+
+    @property
+    def id(self):
+        cart = self.get()
+        return cart.id if cart else None
+
+    def __bool__(self):
+        return self.get() is not None
+
+
 class CartMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        # Ensure cart exists for anonymous users
-        if not request.user.is_authenticated and 'cart_id' not in request.session:
-            cart = Cart.objects.create()
-            request.session['cart_id'] = cart.id
-            request.cart = cart
-        elif not request.user.is_authenticated and 'cart_id' in request.session:
-            try:
-                request.cart = Cart.objects.get(id=request.session['cart_id'])
-            except Cart.DoesNotExist:
-                cart = Cart.objects.create()
-                request.session['cart_id'] = cart.id
-                request.cart = cart
-        
+        # Anonymous carts are created lazily, so read-only traffic writes nothing
+        if not request.user.is_authenticated:
+            request.cart = LazyCart(request)
+
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
@@ -1,7 +1,11 @@
 from django.db import models
 from django.conf import settings
+from django.core.cache import cache
 from django.core.validators import MinValueValidator
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.functional import cached_property
 from decimal import Decimal
 from products.models import Product
 
@@ -42,13 +46,61 @@ class Cart(models.Model):
         else:
             return f"Anonymous cart ({self.session_key})"
 
+    @staticmethod
+    def summary_cache_key(cart_id):
+        return f'cart:summary:{cart_id}'
+
+    @classmethod
+    def invalidate_cached_summaries(cls, cart_ids):
+        cache.delete_many([cls.summary_cache_key(cart_id) for cart_id in cart_ids])
+
+    @cached_property
+    def summary(self):
+        """
+        Item count and subtotal, computed once per instance.
+
+        Uses prefetched items when present, otherwise one aggregate query whose
+        result is also cached per cart when CART_SUMMARY_CACHE_TIMEOUT is set.
+        """
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('items')
+        if prefetched is not None:
+            return {
+                'total_items': sum(item.quantity for item in prefetched),
+                'subtotal': sum((item.total_price for item in prefetched), Decimal('0')),
+            }
+        if self.pk is None:
+            return {'total_items': 0, 'subtotal': Decimal('0')}
+
+        timeout = getattr(settings, 'CART_SUMMARY_CACHE_TIMEOUT', 0)
+        if timeout:
+            summary = cache.get(self.summary_cache_key(self.pk))
+            if summary is not None:
+                return summary
+
+        summary = self.items.aggregate(
+            total_items=Coalesce(Sum('quantity'), 0),
+            subtotal=Coalesce(
+                Sum(F('quantity') * F('product__price')), Decimal('0'),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+        )
+        if timeout:
+            cache.set(self.summary_cache_key(self.pk), summary, timeout)
+        return summary
+
+    def invalidate_summary(self):
+        """Forget the memoized and cached summary after changing items"""
+        self.__dict__.pop('summary', None)
+        if self.pk is not None:
+            self.invalidate_cached_summaries([self.pk])
+
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.summary['total_items']
 
     @property
     def subtotal(self):
-        return sum(item.total_price for item in self.items.all())
+        return self.summary['subtotal']
 
     @property
     def tax_amount(self):
@@ -62,10 +114,15 @@ class Cart(models.Model):
     def clear(self):
         """Clear all items from cart"""
         self.items.all().delete()
+        self.invalidate_summary()
 
     def merge_with_session_cart(self, session_cart):
         """Merge session cart with user cart after login"""
+        from inventory.reservations import cart_reference, release
+
         if session_cart and session_cart != self:
+            # The items' holds move over with them as they're saved below
+            release(cart_reference(session_cart.pk))
             for session_item in session_cart.items.all():
                 # Check if item already exists in user cart
                 existing_item = self.items.filter(product=session_item.product).first()
@@ -76,6 +133,7 @@ class Cart(models.Model):
                     session_item.cart = self
                     session_item.save()
             session_cart.delete()
+            self.invalidate_summary()
 
 class CartItem(models.Model):
     cart = models.ForeignKey(
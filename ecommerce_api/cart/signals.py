@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Cart
+from products.models import Product
+from .models import Cart, CartItem
 
 User = get_user_model()
 
@@ -9,4 +11,20 @@ User = get_user_model()
 def create_user_cart(sender, instance, created, **kwargs):
     """Create a cart when a new user is created"""
     if created:
-        Cart.objects.create(user=instance)
\ No newline at end of file
+        Cart.objects.create(user=instance)
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def invalidate_cart_summary(sender, instance, **kwargs):
+    """Drop the cached summary of the cart an item belongs to"""
+    if instance.cart_id:
+        Cart.invalidate_cached_summaries([instance.cart_id])
+
+
+@receiver(post_save, sender=Product)
+def invalidate_cart_summaries_for_product(sender, instance, created, raw=False, **kwargs):
+    """Subtotals depend on product prices, so drop summaries of carts holding the product"""
+    if created or raw or not getattr(settings, 'CART_SUMMARY_CACHE_TIMEOUT', 0):
+        return
+    cart_ids = CartItem.objects.filter(product=instance).values_list('cart_id', flat=True)
+    Cart.invalidate_cached_summaries(set(cart_ids))
@@ -0,0 +1,64 @@
+from decimal import Decimal
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, RequestFactory
+from products.models import Product
+from cart.middleware import CartMiddleware, LazyCart
+from cart.models import Cart
+
+
+class LazyCartTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def make_request(self, session=None):
+        request = self.factory.get('/')
+        SessionMiddleware(lambda r: None).process_request(request)
+        request.user = AnonymousUser()
+        if session:
+            request.session.update(session)
+        return request
+
+    def test_middleware_does_not_create_carts(self):
+        request = self.make_request()
+        CartMiddleware(lambda r: None)(request)
+        self.assertIsInstance(request.cart, LazyCart)
+        self.assertFalse(request.cart)
+        self.assertIsNone(request.cart.id)
+        self.assertEqual(Cart.objects.count(), 0)
+        self.assertNotIn('cart_id', request.session)
+
+    def test_read_only_requests_write_nothing(self):
+        Product.objects.create(
+            name='Widget', slug='widget', description='desc', price=Decimal('5.00'),
+            sku='WID1', status='ACTIVE'
+        )
+        self.client.get('/api/products/categories/')
+        self.client.get('/api/cart/')
+        self.assertEqual(Cart.objects.count(), 0)
+        self.assertNotIn('cart_id', self.client.session)
+
+    def test_materialize_creates_once(self):
+        request = self.make_request()
+        cart = LazyCart(request).materialize()
+        self.assertEqual(request.session['cart_id'], cart.id)
+
+        lazy = LazyCart(request)
+        with self.assertNumQueries(1):
+            self.assertEqual(lazy.materialize(), cart)
+            self.assertEqual(lazy.id, cart.id)
+        self.assertEqual(Cart.objects.count(), 1)
+
+    def test_missing_cart_is_treated_as_empty(self):
+        request = self.make_request({'cart_id': 999})
+        lazy = LazyCart(request)
+        self.assertIsNone(lazy.get())
+        self.assertNotEqual(lazy.materialize().id, 999)
+
+    def test_forget(self):
+        request = self.make_request()
+        lazy = LazyCart(request)
+        lazy.materialize()
+        lazy.forget()
+        self.assertNotIn('cart_id', request.session)
+        self.assertIsNone(lazy.get())
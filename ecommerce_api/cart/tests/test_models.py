@@ -1,5 +1,10 @@
+from datetime import timedelta
 from decimal import Decimal
-from django.test import TestCase
+from io import StringIO
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from products.models import Product, Category, Brand
 from cart.models import Cart, CartItem
@@ -95,3 +100,99 @@ class CartModelTests(TestCase):
 
         anon_cart = Cart.objects.create(session_key='sess123')
         self.assertEqual(str(anon_cart), "Anonymous cart (sess123)")
+
+    def test_summary_is_one_memoized_query(self):
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+        CartItem.objects.create(cart=self.cart, product=self.product2, quantity=3)
+        cart = Cart.objects.get(pk=self.cart.pk)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(cart.total_items, 5)
+            self.assertEqual(cart.subtotal, Decimal('80.00'))
+            self.assertEqual(cart.tax_amount, Decimal('6.40'))
+            self.assertEqual(cart.total, Decimal('86.40'))
+
+    def test_summary_uses_prefetched_items(self):
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+        cart = Cart.objects.prefetch_related('items__product').get(pk=self.cart.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(cart.total_items, 2)
+            self.assertEqual(cart.subtotal, Decimal('20.00'))
+
+    def test_empty_cart_summary(self):
+        self.assertEqual(self.cart.total_items, 0)
+        self.assertEqual(self.cart.subtotal, Decimal('0'))
+        self.assertEqual(Cart().total_items, 0)
+
+    def test_summary_reset_after_clear(self):
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=1)
+        self.assertEqual(self.cart.total_items, 1)
+        self.cart.clear()
+        self.assertEqual(self.cart.total_items, 0)
+
+    @override_settings(CART_SUMMARY_CACHE_TIMEOUT=60)
+    def test_cached_summary_invalidation(self):
+        cache.clear()
+        item = CartItem.objects.create(cart=self.cart, product=self.product, quantity=1)
+        self.assertEqual(Cart.objects.get(pk=self.cart.pk).subtotal, Decimal('10.00'))
+        with self.assertNumQueries(1):
+            # Only the cart row itself; the summary comes from the cache
+            self.assertEqual(Cart.objects.get(pk=self.cart.pk).subtotal, Decimal('10.00'))
+
+        item.quantity = 2
+        item.save()
+        self.assertEqual(Cart.objects.get(pk=self.cart.pk).subtotal, Decimal('20.00'))
+
+        self.product.price = Decimal('15.00')
+        self.product.save()
+        self.assertEqual(Cart.objects.get(pk=self.cart.pk).subtotal, Decimal('30.00'))
+
+        item.delete()
+        self.assertEqual(Cart.objects.get(pk=self.cart.pk).subtotal, Decimal('0'))
+        cache.clear()
+
+
+class CleanupCartsCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='testpass123')
+        self.product = Product.objects.create(
+            name="Cleanup Product", slug="cleanup-product", description="desc",
+            price=Decimal('10.00'), quantity=5, sku="CLEAN1", status='ACTIVE'
+        )
+
+    def age(self, cart, **delta):
+        Cart.objects.filter(pk=cart.pk).update(
+            created_at=timezone.now() - timedelta(**delta),
+            updated_at=timezone.now() - timedelta(**delta),
+        )
+
+    def test_deletes_empty_and_stale_anonymous_carts(self):
+        old_empty = Cart.objects.create()
+        self.age(old_empty, days=2)
+        fresh_empty = Cart.objects.create()
+
+        stale = Cart.objects.create()
+        CartItem.objects.create(cart=stale, product=self.product, quantity=1)
+        self.age(stale, days=60)
+        CartItem.objects.filter(cart=stale).update(updated_at=timezone.now() - timedelta(days=60))
+
+        active = Cart.objects.create()
+        CartItem.objects.create(cart=active, product=self.product, quantity=1)
+        self.age(active, days=60)
+
+        user_cart, _ = Cart.objects.get_or_create(user=self.user)
+        self.age(user_cart, days=60)
+
+        out = StringIO()
+        call_command('cleanup_carts', stdout=out)
+
+        remaining = set(Cart.objects.values_list('pk', flat=True))
+        self.assertEqual(remaining, {fresh_empty.pk, active.pk, user_cart.pk})
+        self.assertIn('Deleted 1 empty anonymous carts', out.getvalue())
+        self.assertIn('Deleted 1 stale anonymous carts', out.getvalue())
+
+    def test_dry_run(self):
+        cart = Cart.objects.create()
+        self.age(cart, days=2)
+        call_command('cleanup_carts', '--dry-run', stdout=StringIO())
+        self.assertTrue(Cart.objects.filter(pk=cart.pk).exists())
@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse, NoReverseMatch
 from rest_framework.test import APIClient, APITestCase
@@ -110,6 +112,20 @@ class CartViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(str(response.data['id']), str(cart.pk))
 
+    def test_get_cart_detail_query_count_independent_of_items(self):
+        cart, _ = Cart.objects.get_or_create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product1, quantity=1)
+        self.client.force_authenticate(user=self.user)
+
+        with CaptureQueriesContext(connection) as one_item:
+            self.client.get(self.cart_detail_url(cart.pk))
+
+        CartItem.objects.create(cart=cart, product=self.product2, quantity=2)
+        with self.assertNumQueries(len(one_item)):
+            response = self.client.get(self.cart_detail_url(cart.pk))
+        self.assertEqual(response.data['total_items'], 3)
+        self.assertEqual(Decimal(str(response.data['subtotal'])), Decimal('79.97'))
+
     def test_get_cart_detail_other_user(self):
         cart, _ = Cart.objects.get_or_create(user=self.other_user)
         self.client.force_authenticate(user=self.user)
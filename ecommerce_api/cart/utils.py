@@ -5,12 +5,13 @@ def get_or_create_cart(request):
     if request.user.is_authenticated:
         cart, created = Cart.objects.get_or_create(user=request.user)
         # Merge session cart with user cart if exists
-        if hasattr(request, 'cart') and request.cart and request.cart != cart:
-            cart.merge_with_session_cart(request.cart)
-            del request.session['cart_id']
+        session_cart = request.cart.get() if hasattr(request, 'cart') else None
+        if session_cart and session_cart != cart:
+            cart.merge_with_session_cart(session_cart)
+            request.cart.forget()
         return cart
     elif hasattr(request, 'cart'):
-        return request.cart
+        return request.cart.materialize()
     else:
         cart = Cart.objects.create()
         request.session['cart_id'] = cart.id
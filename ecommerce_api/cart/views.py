@@ -17,10 +17,12 @@ class CartViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        # Prefetched items let the totals be summed without further queries
+        queryset = Cart.objects.prefetch_related('items__product')
         if user.is_authenticated:
-            return Cart.objects.filter(user=user)
+            return queryset.filter(user=user)
         elif hasattr(self.request, 'cart'):
-            return Cart.objects.filter(id=self.request.cart.id)
+            return queryset.filter(id=self.request.cart.id)
         return Cart.objects.none()
 
     def get_object(self):
@@ -54,7 +56,7 @@ class CartViewSet(viewsets.ModelViewSet):
             if request.user.is_authenticated:
                 cart, _ = Cart.objects.get_or_create(user=request.user)
             elif hasattr(request, 'cart'):
-                cart = request.cart
+                cart = request.cart.materialize()
             else:
                 return Response(
                     {"error": "Authentication required to add items"},
@@ -97,18 +99,21 @@ class CartItemViewSet(viewsets.ModelViewSet):
     serializer_class = CartItemSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsCartOwner]
 
-    def get_cart(self):
+    def get_cart(self, create=False):
+        # Only writes create a cart; listing an empty cart shouldn't insert one
         if self.request.user.is_authenticated:
-            cart, _ = Cart.objects.get_or_create(user=self.request.user)
-            return cart
+            if create:
+                cart, _ = Cart.objects.get_or_create(user=self.request.user)
+                return cart
+            return Cart.objects.filter(user=self.request.user).first()
         elif hasattr(self.request, 'cart'):
-            return self.request.cart
+            return self.request.cart.materialize() if create else self.request.cart.get()
         return None
 
     def get_queryset(self):
         cart = self.get_cart()
         if cart:
-            return CartItem.objects.filter(cart=cart)
+            return CartItem.objects.filter(cart=cart).select_related('product')
         return CartItem.objects.none()
 
     def get_serializer_class(self):
@@ -117,7 +122,7 @@ class CartItemViewSet(viewsets.ModelViewSet):
         return CartItemSerializer
 
     def perform_create(self, serializer):
-        cart = self.get_cart()
+        cart = self.get_cart(create=True)
         serializer.save(cart=cart)
 
 
@@ -0,0 +1,203 @@
+# ecommerce_api/activity.py
+"""
+Buffered writes for the activity audit logs (UserActivity, ProductActivity).
+
+record_activity() takes unsaved rows and, once the surrounding transaction
+commits, appends them to an in-process buffer. A background thread writes
+the buffer with one bulk_create per model every ACTIVITY_FLUSH_INTERVAL
+seconds, or as soon as ACTIVITY_BATCH_SIZE rows are waiting, so requests no
+longer wait for audit INSERTs. If the writer falls behind and
+ACTIVITY_MAX_PENDING rows pile up, the request that hits the limit writes
+the buffer itself (backpressure) rather than letting memory grow or
+dropping rows.
+
+Rows are timestamped by record_activity(), at the time of the event, not
+when they are written. Whatever is buffered is written at interpreter exit.
+
+With ACTIVITY_SINK_MODE = 'celery' each committed batch of rows is sent
+to write_activity_task instead, and a worker inserts it. With 'sync' (the
+default under tests) the rows are inserted straight away, as before.
+"""
+import atexit
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _batch_size():
+    return getattr(settings, 'ACTIVITY_BATCH_SIZE', 500)
+
+
+def _by_model(rows):
+    by_model = defaultdict(list)
+    for row in rows:
+        by_model[type(row)].append(row)
+    return by_model
+
+
+class BackgroundFlusher(ABC):
+    """
+    An in-process buffer written by a daemon thread every `interval_setting`
+    seconds or when woken early. Subclasses keep their buffer in
+    self._pending, replace it in _reset() and write it in flush().
+    """
+    thread_name = 'flusher'
+    interval_setting = 'ACTIVITY_FLUSH_INTERVAL'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        self._pending = []
+
+    def _locked(self):
+        """Enter with self._lock held; makes sure this process has a writer"""
+        if self._pid != os.getpid():
+            # A forked process starts with its own buffer and writer
+            self._reset()
+            self._thread, self._pid = None, os.getpid()
+        if self._thread is None:
+            self._thread = self._start_writer()
+
+    def _take(self):
+        with self._lock:
+            pending = self._pending
+            self._reset()
+        return pending
+
+    @abstractmethod
+    def flush(self):
+        """Write the buffer taken with _take()"""
+
+    def _start_writer(self):
+        thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self):
+        try:
+            while True:
+                self._wake.wait(getattr(settings, self.interval_setting, 2.0))
+                self._wake.clear()
+                close_old_connections()
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception('%s flush failed', type(self).__name__)
+        finally:
+            connection.close()
+
+
+class ActivitySink(BackgroundFlusher):
+    thread_name = 'activity-writer'
+
+    def add(self, rows):
+        """Buffer unsaved model instances for the next flush"""
+        with self._lock:
+            self._locked()
+            self._pending.extend(rows)
+            pending = len(self._pending)
+
+        if pending >= getattr(settings, 'ACTIVITY_MAX_PENDING', 10000):
+            self.flush()
+        elif pending >= _batch_size():
+            self._wake.set()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        rows = self._take()
+        if not rows:
+            return 0
+
+        written = 0
+        for model, objs in _by_model(rows).items():
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create(objs, batch_size=_batch_size())
+                written += len(objs)
+            except Exception:
+                # e.g. a user deleted in the meantime; keep whatever rows still fit
+                for obj in objs:
+                    try:
+                        obj.save()
+                        written += 1
+                    except Exception:
+                        logger.exception('Dropped %s activity row', model.__name__)
+        return written
+
+
+sink = ActivitySink()
+atexit.register(sink.flush)
+
+
+def serialize_rows(rows):
+    """
+    Unsaved rows as JSON-safe [model label, {field: value}] pairs.
+    Datetimes keep their microseconds, which Django's JSON encoder drops.
+    """
+    data = []
+    for row in rows:
+        fields = {}
+        for field in row._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            value = getattr(row, field.attname)
+            fields[field.attname] = value.isoformat() if isinstance(value, datetime) else value
+        data.append([row._meta.label, fields])
+    return data
+
+
+def write_rows(data):
+    """Insert rows serialized by serialize_rows(); returns how many"""
+    rows = [apps.get_model(label)(**fields) for label, fields in data]
+    for model, objs in _by_model(rows).items():
+        model.objects.bulk_create(objs, batch_size=_batch_size())
+    return len(rows)
+
+
+def _send(rows):
+    from users.tasks import write_activity_task
+
+    write_activity_task.delay(serialize_rows(rows))
+
+
+def record_activity(*rows):
+    """
+    Save activity rows (unsaved model instances) without making the caller
+    wait for the INSERT; see the module docstring.
+    """
+    now = timezone.now()
+    for row in rows:
+        if row.timestamp is None:
+            row.timestamp = now
+
+    mode = getattr(settings, 'ACTIVITY_SINK_MODE', 'thread')
+    if mode == 'sync':
+        for model, objs in _by_model(rows).items():
+            model.objects.bulk_create(objs, batch_size=_batch_size())
+        return
+    # Rows of a rolled-back transaction are never written, and rows are
+    # never written before the user or product they point to exists.
+    if mode == 'celery':
+        transaction.on_commit(lambda: _send(rows))
+    else:
+        transaction.on_commit(lambda: sink.add(rows))
+
+
+def flush_activity():
+    """Write all buffered activity rows now"""
+    return sink.flush()
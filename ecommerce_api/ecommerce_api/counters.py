@@ -0,0 +1,59 @@
+# ecommerce_api/counters.py
+"""
+Site-wide counters for the home page and the admin dashboards.
+
+The numbers are computed together, stored in the Django cache for
+SITE_COUNTERS_TIMEOUT seconds and dropped by the product/user signals
+whenever a counted row is written, so most requests run no COUNT(*) at all.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+CACHE_KEY = 'counters:site'
+
+
+def compute_counters():
+    """Count everything straight from the database"""
+    from products.models import Category, Product, ProductReview
+
+    User = get_user_model()
+    now = timezone.localtime()
+    start_of_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # A range on date_joined can use an index, unlike date_joined__date
+    counters = User.objects.aggregate(
+        user_count=Count('id'),
+        active_users=Count('id', filter=Q(is_active=True)),
+        new_users_today=Count('id', filter=Q(date_joined__gte=start_of_today)),
+    )
+    counters.update({
+        'product_count': Product.objects.filter(status='ACTIVE').count(),
+        'review_count': ProductReview.objects.filter(is_approved=True).count(),
+        'category_count': Category.objects.count(),
+        'users_by_role': list(
+            User.objects.order_by().values('role').annotate(count=Count('id')).order_by('role')
+        ),
+        'day': now.date().isoformat(),
+    })
+    return counters
+
+
+def get_counters():
+    """Return the cached counters, recomputing them when missing or from a previous day"""
+    counters = cache.get(CACHE_KEY)
+    if counters is None or counters['day'] != timezone.localdate().isoformat():
+        counters = compute_counters()
+        cache.set(CACHE_KEY, counters, getattr(settings, 'SITE_COUNTERS_TIMEOUT', 300))
+    return counters
+
+
+def invalidate_counters():
+    """Drop the cached counters so the next read recounts"""
+    cache.delete(CACHE_KEY)
+    # A request racing the open transaction may re-cache the old numbers,
+    # so drop them again once the write is visible.
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
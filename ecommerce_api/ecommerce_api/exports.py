@@ -0,0 +1,121 @@
+# ecommerce_api/exports.py
+"""
+Bulk CSV / NDJSON exports.
+
+An Export names the model and columns of a dataset and the FilterSet
+that narrows it. Rows are read with values_list().iterator(chunk_size) in
+primary key order, so no model instances or serializers are built and
+memory stays flat however many rows there are (PostgreSQL uses a
+server-side cursor). They are streamed as they are read, to a
+StreamingHttpResponse or a file, gzipped on request.
+
+Each app declares its exports in its exports.py; ExportCommand and
+Export.response() expose one as a management command and an endpoint.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from .streaming import encoded, lines, streaming_response
+
+FORMATS = ['csv', 'ndjson']
+
+
+class Export:
+    name = None
+    model = None
+    filterset_class = None
+    # (column header, values_list() field path)
+    columns = []
+
+    def get_queryset(self):
+        """Every row of `model`; override to narrow or annotate it"""
+        return self.model._default_manager.all()
+
+    @property
+    def header(self):
+        return [header for header, _ in self.columns]
+
+    def filter(self, params):
+        """The queryset narrowed by the filterset; raises ValidationError on bad params"""
+        queryset = self.get_queryset()
+        if self.filterset_class is None:
+            return queryset
+        filterset = self.filterset_class(params, queryset=queryset)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filterset.qs
+
+    def rows(self, params=None, chunk_size=2000):
+        queryset = self.filter(params or {}).order_by('pk')
+        return queryset.values_list(*[field for _, field in self.columns]).iterator(chunk_size=chunk_size)
+
+    def response(self, request, chunk_size=2000):
+        """
+        Stream the export for a DRF request: ?output=csv|ndjson, ?gzip=1,
+        and the filterset's own parameters.
+        """
+        params = request.query_params
+        output = params.get('output', 'csv')
+        if output not in FORMATS:
+            raise ValidationError({'output': f'Must be one of {", ".join(FORMATS)}'})
+        compress = params.get('gzip', '').lower() in ('1', 'true', 'yes')
+        # Validate before the response starts streaming
+        rows = self.rows(params, chunk_size)
+        return streaming_response(lines(output, self.header, rows), f'{self.name}.{output}', output, compress)
+
+
+class ExportCommand(BaseCommand):
+    """Management command writing an Export to standard output or a file"""
+    export_class = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='File to write (default: standard output)')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output')
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='NAME=VALUE',
+            help='A filter parameter, as accepted by the export endpoint (repeatable)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of rows fetched from the database at a time',
+        )
+
+    def handle(self, *args, **options):
+        if options['gzip'] and not options['output']:
+            raise CommandError('--gzip needs --output')
+        params = {}
+        for item in options['filter']:
+            name, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'--filter expects NAME=VALUE, got {item!r}')
+            params[name] = value
+
+        export = self.export_class()
+        try:
+            rows = export.rows(params, options['batch_size'])
+        except ValidationError as error:
+            raise CommandError(f'Invalid filters: {error.detail}')
+
+        written = 0
+
+        def counted(rows):
+            nonlocal written
+            for row in rows:
+                written += 1
+                yield row
+
+        chunks = lines(options['format'], export.header, counted(rows))
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for data in encoded(chunks, options['gzip']):
+                    output.write(data)
+            self.stdout.write(self.style.SUCCESS(f"Exported {written} {export.name} to {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
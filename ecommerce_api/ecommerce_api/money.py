@@ -0,0 +1,12 @@
+# ecommerce_api/money.py
+from decimal import Decimal
+
+CENT = Decimal('0.01')
+
+
+def quantize_money(value):
+    """
+    Round an amount computed by the database to cents. SQLite returns
+    computed decimals unrounded (or as floats), and empty sums as None.
+    """
+    return Decimal(str(value or 0)).quantize(CENT)
@@ -0,0 +1,163 @@
+# ecommerce_api/pagination.py
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset (cursor) pagination over a descending timestamp with
+    `id` as the tie-breaker.
+
+    Each page is fetched with the equivalent of
+    `WHERE (field, id) < (last_field, last_id)`, plus `field <= last_field`
+    so the database can seek the index, instead of an OFFSET, and no
+    COUNT(*) is run, so deep pages cost the same as the first one. The
+    cursor is an opaque token encoding the last row of the previous page.
+    `field` may also be an integer column or annotation, and
+    `descending=False` walks it upwards.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, field='created_at', page_size=50, descending=True):
+        self.field = field
+        self.page_size = page_size
+        self.descending = descending
+
+    def encode_cursor(self, instance):
+        value = getattr(instance, self.field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        position = [value, instance.pk]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if isinstance(value, str):
+                value = parse_datetime(value)
+            elif not isinstance(value, int):
+                raise TypeError
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.descending:
+            queryset = queryset.order_by(f'-{self.field}', '-pk')
+            beyond, up_to = 'lt', 'lte'
+        else:
+            queryset = queryset.order_by(self.field, 'pk')
+            beyond, up_to = 'gt', 'gte'
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            value, pk = position
+            # The first condition is redundant, but unlike the OR it bounds an
+            # index range scan; without it deep pages scan from the top.
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{up_to}': value}),
+                Q(**{f'{self.field}__{beyond}': value}) | Q(**{self.field: value, f'pk__{beyond}': pk}),
+            )
+
+        # Fetch one extra row to find out whether there is a next page
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    """
+    Page number pagination by default. Clients opt in to keyset pagination
+    with `?pagination=cursor`; the `next` links carry both parameters.
+
+    In cursor mode the queryset is always ordered by `-<keyset_field>, -id`,
+    so any other requested ordering is ignored.
+    """
+    mode_query_param = 'pagination'
+    keyset_field = 'created_at'
+
+    def __init__(self):
+        self.keyset = None
+
+    def wants_keyset(self, request):
+        return request.query_params.get(self.mode_query_param) == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.wants_keyset(request):
+            self.keyset = None
+            return super().paginate_queryset(queryset, request, view)
+
+        self.keyset = KeysetPagination(field=self.keyset_field, page_size=self.get_page_size(request))
+        return self.keyset.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.extend([
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" for keyset pagination.',
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+            {
+                'name': KeysetPagination.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value (cursor mode only).',
+                'schema': {'type': 'string'},
+            },
+        ])
+        return parameters
+
+
+class CreatedAtKeysetPagination(OptionalKeysetPagination):
+    keyset_field = 'created_at'
+
+
+class TimestampKeysetPagination(OptionalKeysetPagination):
+    keyset_field = 'timestamp'
@@ -0,0 +1,272 @@
+# ecommerce_api/partitions.py
+"""
+Monthly partitions for the append-only activity tables.
+
+On PostgreSQL the tables are declaratively partitioned by RANGE on their
+timestamp column, one partition per calendar month named
+<table>_pYYYYMM plus a <table>_default catch-all. Rows that land in the
+default partition, because nobody created their month in time, are moved
+into a partition of their own before partitions are created or expired.
+Retention detaches (archives) or drops whole partitions, which is instant
+and leaves no bloat behind.
+
+Other databases keep a single table. Retention copies each expired month
+into an archive table with the same <table>_pYYYYMM name and deletes it
+from the live table, so archived months look the same on every backend.
+"""
+from datetime import datetime, time
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return day.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def _bound(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def is_partitioned(connection, table):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid '
+            'WHERE c.relname = %s AND pg_table_is_visible(c.oid)',
+            [table]
+        )
+        return cursor.fetchone() is not None
+
+
+def _create_partition(cursor, quote, table, month):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {quote(partition_name(table, month))} '
+        f'PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)',
+        [_bound(month), _bound(add_months(month, 1))]
+    )
+
+
+def _adopt_default_rows(connection, table, column):
+    """
+    Move the rows in <table>_default into monthly partitions. PostgreSQL
+    won't create a partition whose range the default partition already
+    holds rows for, so each month is filled as a plain table first and
+    then attached. Returns the months moved.
+    """
+    quote = connection.ops.quote_name
+    default = quote(f'{table}_default')
+    moved = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        # Keep new rows out of the default partition until the months are attached
+        cursor.execute(f'LOCK TABLE {default} IN EXCLUSIVE MODE')
+        cursor.execute(
+            f'SELECT DISTINCT date_trunc(%s, {quote(column)} AT TIME ZONE %s) FROM {default}',
+            ['month', timezone.get_current_timezone_name()]
+        )
+        for month in sorted(row[0].date() for row in cursor.fetchall()):
+            name = quote(partition_name(table, month))
+            start, end = _bound(month), _bound(add_months(month, 1))
+            cursor.execute(
+                f'CREATE TABLE {name} (LIKE {quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+            )
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {default} WHERE {quote(column)} >= %s AND {quote(column)} < %s '
+                f'RETURNING *) INSERT INTO {name} SELECT * FROM moved',
+                [start, end]
+            )
+            cursor.execute(
+                f'ALTER TABLE {quote(table)} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)',
+                [start, end]
+            )
+            moved.append(month)
+    return moved
+
+
+def partition_by_month(schema_editor, model, field='timestamp', months_ahead=2):
+    """
+    Migration helper: rebuild `model`'s table as a partitioned table on
+    PostgreSQL, copying the existing rows. Does nothing on other databases.
+
+    The primary key becomes (id, field), as PostgreSQL requires for
+    partitioned tables; ids keep coming from the same sequence.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql' or is_partitioned(connection, model._meta.db_table):
+        return
+    quote = schema_editor.quote_name
+    table = model._meta.db_table
+    column = model._meta.get_field(field).column
+    old = f'{table}_unpartitioned'
+    # Not <table>_id_seq: that name belongs to the old table's sequence
+    sequence = f'{table}_partitioned_id_seq'
+
+    with connection.cursor() as cursor:
+        _set_aside(cursor, quote, table, old)
+        cursor.execute(
+            f'CREATE TABLE {quote(table)} (LIKE {quote(old)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ({quote(column)})'
+        )
+        # Partitioned tables can't have identity columns before PostgreSQL 17
+        cursor.execute(f'ALTER TABLE {quote(table)} ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {quote(sequence)} OWNED BY {quote(table)}.id')
+        cursor.execute(
+            f'SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {quote(old)}), 0) + 1, false)', [sequence]
+        )
+        cursor.execute(
+            f'ALTER TABLE {quote(table)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)', [sequence]
+        )
+        cursor.execute(f'ALTER TABLE {quote(table)} ADD PRIMARY KEY (id, {quote(column)})')
+
+        cursor.execute(f'SELECT MIN({quote(column)}) FROM {quote(old)}')
+        first = cursor.fetchone()[0]
+        current = month_start(timezone.localdate())
+        month = month_start(timezone.localtime(first).date()) if first else current
+        while month <= add_months(current, months_ahead):
+            _create_partition(cursor, quote, table, month)
+            month = add_months(month, 1)
+        cursor.execute(
+            f'CREATE TABLE {quote(table + "_default")} PARTITION OF {quote(table)} DEFAULT'
+        )
+        cursor.execute(f'INSERT INTO {quote(table)} SELECT * FROM {quote(old)}')
+        cursor.execute(f'DROP TABLE {quote(old)} CASCADE')
+
+    # Indexes and foreign keys are created on the partitioned table itself
+    _add_indexes_and_foreign_keys(schema_editor, model)
+
+
+def unpartition(schema_editor, model):
+    """
+    Migration helper reversing partition_by_month(): rebuild `model`'s
+    table as a plain table with an identity `id` primary key, copying the
+    rows of every attached partition. Months already archived (detached)
+    stay in their own tables. Does nothing on other databases.
+    """
+    connection = schema_editor.connection
+    if not is_partitioned(connection, model._meta.db_table):
+        return
+    quote = schema_editor.quote_name
+    table = model._meta.db_table
+    old = f'{table}_partitioned'
+
+    with connection.cursor() as cursor:
+        _set_aside(cursor, quote, table, old)
+        # Without the defaults: id's belongs to the partitioned table's sequence
+        cursor.execute(f'CREATE TABLE {quote(table)} (LIKE {quote(old)} INCLUDING CONSTRAINTS)')
+        cursor.execute(f'ALTER TABLE {quote(table)} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+        cursor.execute(f'ALTER TABLE {quote(table)} ADD PRIMARY KEY (id)')
+        cursor.execute(f'INSERT INTO {quote(table)} SELECT * FROM {quote(old)}')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {quote(table)}), 0) + 1, false)",
+            [table]
+        )
+        cursor.execute(f'DROP TABLE {quote(old)} CASCADE')
+
+    _add_indexes_and_foreign_keys(schema_editor, model)
+
+
+def _set_aside(cursor, quote, table, old):
+    """Rename `table` to `old`, primary key included, so a new `table` can take both names"""
+    cursor.execute(f'ALTER TABLE {quote(table)} RENAME TO {quote(old)}')
+    cursor.execute(f'ALTER INDEX IF EXISTS {quote(table + "_pkey")} RENAME TO {quote(old + "_pkey")}')
+
+
+def _add_indexes_and_foreign_keys(schema_editor, model):
+    for model_field in model._meta.local_fields:
+        if model_field.remote_field and model_field.db_constraint:
+            schema_editor.execute(schema_editor._create_index_sql(model, fields=[model_field]))
+            schema_editor.execute(schema_editor._create_fk_sql(
+                model, model_field, '_fk_%(to_table)s_%(to_column)s'
+            ))
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def ensure_partitions(model, months_ahead=2, field='timestamp'):
+    """Create the partitions for this month and the next `months_ahead` ones"""
+    using = router.db_for_write(model)
+    connection = connections[using]
+    table = model._meta.db_table
+    if not is_partitioned(connection, table):
+        return 0
+    _adopt_default_rows(connection, table, model._meta.get_field(field).column)
+    current = month_start(timezone.localdate())
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            _create_partition(cursor, connection.ops.quote_name, table, add_months(current, offset))
+    return months_ahead + 1
+
+
+def _oldest_month(model, field):
+    oldest = model._base_manager.order_by(field).values_list(field, flat=True).first()
+    return month_start(timezone.localtime(oldest).date()) if oldest else None
+
+
+def expire_months(model, before, archive=True, field='timestamp'):
+    """
+    Remove every whole month of `model` rows older than the month of
+    `before`, archiving them into <table>_pYYYYMM tables unless `archive`
+    is False. Returns the list of months removed.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = model._meta.db_table
+    cutoff = month_start(before)
+    removed = []
+
+    if is_partitioned(connection, table):
+        _adopt_default_rows(connection, table, model._meta.get_field(field).column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT c.relname FROM pg_inherits i '
+                'JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent '
+                'WHERE p.relname = %s', [table]
+            )
+            partitions = sorted(row[0] for row in cursor.fetchall())
+            for name in partitions:
+                if not name.startswith(f'{table}_p'):
+                    continue
+                month = datetime.strptime(name[-6:], '%Y%m').date()
+                if month >= cutoff:
+                    continue
+                if archive:
+                    cursor.execute(f'ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}')
+                else:
+                    cursor.execute(f'DROP TABLE {quote(name)}')
+                removed.append(month)
+        return removed
+
+    column = model._meta.get_field(field).column
+    month = _oldest_month(model, field)
+    while month and month < cutoff:
+        start, end = _bound(month), _bound(add_months(month, 1))
+        with transaction.atomic(using=using):
+            if archive:
+                archive_table = quote(partition_name(table, month))
+                with connection.cursor() as cursor:
+                    if partition_name(table, month) not in connection.introspection.table_names(cursor):
+                        cursor.execute(f'CREATE TABLE {archive_table} AS SELECT * FROM {quote(table)} WHERE 1 = 0')
+                    cursor.execute(
+                        f'INSERT INTO {archive_table} SELECT * FROM {quote(table)} '
+                        f'WHERE {quote(column)} >= %s AND {quote(column)} < %s',
+                        [connection.ops.adapt_datetimefield_value(start),
+                         connection.ops.adapt_datetimefield_value(end)]
+                    )
+            model._base_manager.using(using).filter(
+                **{f'{field}__gte': start, f'{field}__lt': end}
+            ).delete()
+        removed.append(month)
+        month = _oldest_month(model, field)
+    return removed
@@ -0,0 +1,155 @@
+# ecommerce_api/response_cache.py
+"""
+Response cache for public, read-only API views.
+
+Rendered GET responses are stored in the default cache under a key built
+from the path, the sorted query parameters, the negotiated format and the
+requesting user (anonymous requests share one entry). Every key also embeds
+the current version of one or more invalidation groups; model signals bump a
+group's version, which makes all of its entries unreachable at once without
+having to enumerate keys (the file and Redis backends can't do that cheaply).
+Responses rendering a single product also belong to that product's group, so
+a stock change or an edit of one product only expires its own responses.
+
+Cached responses carry an ETag and Last-Modified header, and conditional
+requests that still match are answered with 304 Not Modified.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+CATALOG = 'catalog'
+PROMOTIONS = 'promotions'
+
+KEY_PREFIX = 'response-cache'
+
+
+def product_group(product_id):
+    """Invalidation group of the responses rendering one product"""
+    return f'{CATALOG}:product:{product_id}'
+
+
+def _version_key(group):
+    return f'{KEY_PREFIX}:version:{group}'
+
+
+def get_group_versions(groups):
+    """Current version of each group, creating missing ones"""
+    keys = [_version_key(group) for group in groups]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from the clock so an evicted counter can't come back
+            # at a version some stale entry was stored under.
+            cache.add(key, int(time.time() * 1000), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(group):
+    key = _version_key(group)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def invalidate_response_cache(*groups):
+    """Expire every cached response in the given groups"""
+    def bump_all():
+        for group in groups:
+            _bump(group)
+
+    bump_all()
+    # Drop anything a concurrent request cached from pre-commit data
+    transaction.on_commit(bump_all)
+
+
+def response_cache_key(request, groups):
+    user = request.user
+    variant = f'user:{user.pk}' if user and user.is_authenticated else 'anon'
+    params = sorted(request.query_params.lists())
+    renderer = getattr(request, 'accepted_renderer', None)
+    parts = [
+        request.path,
+        repr(params),
+        getattr(renderer, 'format', ''),
+        variant,
+        ':'.join(str(version) for version in get_group_versions(groups)),
+    ]
+    digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return f'{KEY_PREFIX}:{digest}'
+
+
+def _not_modified(request, entry):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = [etag.strip() for etag in if_none_match.split(',')]
+        return '*' in etags or entry['etag'] in etags or f"W/{entry['etag']}" in etags
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and entry['last_modified'] <= if_modified_since
+
+
+def _build_response(request, entry, response=None):
+    if _not_modified(request, entry):
+        response = HttpResponseNotModified()
+    elif response is None:
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    patch_vary_headers(response, ['Authorization', 'Cookie'])
+    return response
+
+
+def cache_response(*groups, timeout=None):
+    """
+    Cache the successful GET responses of a DRF view method.
+
+    `groups` are the invalidation groups the response depends on. A
+    callable group is called with the view method's arguments and returns
+    the group, e.g. the product_group() of the requested product. `timeout`
+    defaults to settings.RESPONSE_CACHE_TIMEOUT.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return method(view, request, *args, **kwargs)
+
+            key = response_cache_key(request, [
+                group(view, request, *args, **kwargs) if callable(group) else group
+                for group in groups
+            ])
+            entry = cache.get(key)
+            if entry is not None:
+                return _build_response(request, entry)
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+            response = view.finalize_response(request, response, *args, **kwargs)
+            response.render()
+            entry = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': quote_etag(hashlib.md5(response.content).hexdigest()),
+                # HTTP dates have one second resolution
+                'last_modified': int(time.time()),
+            }
+            cache.set(
+                key, entry,
+                timeout if timeout is not None else getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 600)
+            )
+            # On a miss hand back the rendered DRF response itself
+            return _build_response(request, entry, response)
+        return wrapper
+    return decorator
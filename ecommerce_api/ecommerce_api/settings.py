@@ -92,6 +92,13 @@ TEMPLATES = [
 # Taggit configuration
 TAGGIT_CASE_INSENSITIVE = True
 
+# Product search backend: the database (PostgreSQL full-text search with an
+# icontains fallback) or the in-process inverted index
+PRODUCT_SEARCH_BACKEND = os.getenv('PRODUCT_SEARCH_BACKEND', 'products.search.DatabaseSearchBackend')
+
+# Seconds the home page and dashboard counters are cached for
+SITE_COUNTERS_TIMEOUT = int(os.getenv('SITE_COUNTERS_TIMEOUT', '300'))
+
 WSGI_APPLICATION = 'ecommerce_api.wsgi.application'
 
 
@@ -222,12 +229,93 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'promotions.tasks.deactivate_expired_banners_task',
         'schedule': 3600.0,  # Run every hour
     },
+    'release-expired-stock-reservations': {
+        'task': 'inventory.tasks.release_expired_reservations_task',
+        'schedule': 300.0,  # Run every 5 minutes
+    },
+    'build-product-recommendations': {
+        'task': 'products.tasks.build_product_recommendations_task',
+        'schedule': 86400.0,  # Run every day
+    },
+    'update-copurchases': {
+        'task': 'products.tasks.update_copurchases_task',
+        'schedule': 3600.0,  # Run every hour
+    },
+    'prune-activity': {
+        'task': 'products.tasks.prune_activity_task',
+        'schedule': 86400.0,  # Run every day
+    },
+    'compact-inventory-snapshots': {
+        'task': 'inventory.tasks.compact_inventory_snapshots_task',
+        'schedule': 86400.0,  # Run every day
+    },
 }
 
 
 # Check if we're running tests
 IS_TESTING = 'test' in sys.argv or 'pytest' in sys.argv[0] or os.environ.get('TESTING') == 'True'
 
+# User/product activity rows are buffered and written in batches by a background
+# thread ('thread'), handed to a Celery worker ('celery'), or saved in the
+# request ('sync', the default under tests)
+ACTIVITY_SINK_MODE = os.getenv('ACTIVITY_SINK_MODE', 'sync' if IS_TESTING else 'thread')
+# Rows written per INSERT, and the size that wakes the writer early
+ACTIVITY_BATCH_SIZE = int(os.getenv('ACTIVITY_BATCH_SIZE', '500'))
+# Seconds between writes of the buffer
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv('ACTIVITY_FLUSH_INTERVAL', '2'))
+# Buffered rows at which a request writes the buffer itself
+ACTIVITY_MAX_PENDING = int(os.getenv('ACTIVITY_MAX_PENDING', '10000'))
+# Months of raw activity rows kept by prune_activity, including the current one
+ACTIVITY_RETENTION_MONTHS = int(os.getenv('ACTIVITY_RETENTION_MONTHS', '12'))
+# Seconds after which a product view counts half as much towards trending
+TRENDING_HALF_LIFE = int(os.getenv('TRENDING_HALF_LIFE', '21600'))
+# Seconds between writes of the in-memory view counts
+TRENDING_FLUSH_INTERVAL = float(os.getenv('TRENDING_FLUSH_INTERVAL', '10'))
+# Products kept in the cached trending list (the endpoint's maximum limit)
+TRENDING_TOP_SIZE = int(os.getenv('TRENDING_TOP_SIZE', '100'))
+# Recommended products precomputed per product by build_recommendations
+RECOMMENDATIONS_PER_PRODUCT = int(os.getenv('RECOMMENDATIONS_PER_PRODUCT', '20'))
+# "Bought together" pairs kept per product (the endpoint's maximum limit)
+COPURCHASE_PAIRS_PER_PRODUCT = int(os.getenv('COPURCHASE_PAIRS_PER_PRODUCT', '100'))
+
+# Cache: Redis when CACHE_URL is a redis:// URL (needs the redis package),
+# otherwise a file-based cache shared by the workers on this host.
+# Tests use an isolated in-memory cache.
+CACHE_URL = os.getenv('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif IS_TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR', os.path.join(BASE_DIR, '.cache')),
+        }
+    }
+
+# Seconds cached public API responses are kept for
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '600'))
+
+# Seconds a cart's item count/subtotal is cached for; 0 disables the cache
+CART_SUMMARY_CACHE_TIMEOUT = int(os.getenv('CART_SUMMARY_CACHE_TIMEOUT', '0'))
+
+# Seconds stock stays held for items in a cart and for a pending order
+STOCK_HOLD_CART_TTL = int(os.getenv('STOCK_HOLD_CART_TTL', '900'))
+STOCK_HOLD_ORDER_TTL = int(os.getenv('STOCK_HOLD_ORDER_TTL', '1800'))
+
+# Order/purchase order numbers each process draws from a PostgreSQL sequence at once
+NUMBER_BLOCK_SIZE = int(os.getenv('NUMBER_BLOCK_SIZE', '50'))
+
 # Security settings - only apply in production, not during testing
 if not DEBUG and not IS_TESTING:
     SECURE_BROWSER_XSS_FILTER = True
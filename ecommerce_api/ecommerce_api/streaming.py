@@ -0,0 +1,77 @@
+# ecommerce_api/streaming.py
+"""
+Helpers for streaming CSV, JSON and NDJSON responses and files row by
+row, so large exports never hold more than one chunk in memory.
+"""
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+class _Echo:
+    """A file-like object whose write() returns the text instead of storing it"""
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    """Yield `header` and then each row of `rows` as a line of CSV"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(header, rows):
+    """Yield each row of `rows` as a JSON object keyed by `header`, one per line"""
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def lines(format, header, rows):
+    return (csv_lines if format == 'csv' else ndjson_lines)(header, rows)
+
+
+def encoded(chunks, compress=False, flush_every=64 * 1024):
+    """
+    The text `chunks` as UTF-8 bytes, gzipped when `compress` is set.
+    Compressed output is flushed every `flush_every` input bytes.
+    """
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode()
+        return
+
+    gzip = zlib.compressobj(wbits=31)
+    pending = 0
+    for chunk in chunks:
+        data = chunk.encode()
+        pending += len(data)
+        compressed = gzip.compress(data)
+        if pending >= flush_every:
+            compressed += gzip.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if compressed:
+            yield compressed
+    yield gzip.flush()
+
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def streaming_response(chunks, filename, format, compress=False):
+    """A download of the text `chunks`, written as they are produced"""
+    if compress:
+        filename, content_type = f'{filename}.gz', 'application/gzip'
+    else:
+        content_type = CONTENT_TYPES[format]
+    response = StreamingHttpResponse(encoded(chunks, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
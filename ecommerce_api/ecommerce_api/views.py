@@ -1,19 +1,16 @@
 # ecommerce_api/views.py
 from django.shortcuts import render
 from django.http import JsonResponse
-from django.db.models import Count
-from django.contrib.auth import get_user_model
-from products.models import Product, Category, ProductReview
-
-User = get_user_model()
+from .counters import get_counters
 
 def home_view(request):
     """Home page view with stats"""
+    counters = get_counters()
     context = {
-        'product_count': Product.objects.filter(status='ACTIVE').count(),
-        'user_count': User.objects.count(),
-        'review_count': ProductReview.objects.filter(is_approved=True).count(),
-        'category_count': Category.objects.count(),
+        'product_count': counters['product_count'],
+        'user_count': counters['user_count'],
+        'review_count': counters['review_count'],
+        'category_count': counters['category_count'],
     }
     return render(request, 'home.html', context)
 
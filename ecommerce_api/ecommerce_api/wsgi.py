@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_api.settings')
 
 application = get_wsgi_application()
+
+# Build the in-process search index, if one is configured, before serving
+from products.search import warm_up  # noqa: E402
+
+warm_up()
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
-    verbose_name = 'Inventory Management'
\ No newline at end of file
+    verbose_name = 'Inventory Management'
+
+    def ready(self):
+        import inventory.signals
@@ -0,0 +1,21 @@
+# inventory/exports.py
+from ecommerce_api.exports import Export
+from .filters import StockMovementFilter
+from .models import StockMovement
+
+
+class StockMovementExport(Export):
+    name = 'stock-movements'
+    model = StockMovement
+    filterset_class = StockMovementFilter
+    columns = [
+        ('id', 'id'),
+        ('created_at', 'created_at'),
+        ('product_id', 'inventory__product_id'),
+        ('sku', 'inventory__product__sku'),
+        ('product', 'inventory__product__name'),
+        ('movement_type', 'movement_type'),
+        ('quantity', 'quantity'),
+        ('reference', 'reference'),
+        ('created_by', 'created_by__email'),
+    ]
@@ -0,0 +1,12 @@
+import django_filters
+from .models import StockMovement
+
+class StockMovementFilter(django_filters.FilterSet):
+    """The parameters of InventoryReports.get_stock_movement_report()"""
+    start_date = django_filters.DateFilter(field_name='created_at', lookup_expr='date__gte')
+    end_date = django_filters.DateFilter(field_name='created_at', lookup_expr='date__lte')
+    product_id = django_filters.NumberFilter(field_name='inventory__product_id')
+
+    class Meta:
+        model = StockMovement
+        fields = ['start_date', 'end_date', 'product_id', 'movement_type']
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from inventory.snapshots import compact, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconcile today\'s inventory snapshots with the actual stock levels, then '
+        'thin product snapshots older than --keep-days to one row per month'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=90,
+            help='Number of days of daily product snapshots to keep',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of products processed per query',
+        )
+        parser.add_argument(
+            '--date',
+            help='Run as of this date (YYYY-MM-DD) instead of today',
+        )
+        parser.add_argument(
+            '--skip-reconcile',
+            action='store_true',
+            help='Only compact, without reconciling first',
+        )
+
+    def handle(self, *args, **options):
+        date = timezone.localdate()
+        if options['date']:
+            try:
+                date = parse_date(options['date'])
+            except ValueError:
+                date = None
+            if date is None:
+                raise CommandError('--date must be a date (YYYY-MM-DD)')
+        batch_size = options['batch_size']
+
+        if not options['skip_reconcile']:
+            written = reconcile(date, batch_size=batch_size)
+            self.stdout.write(f'Reconciled {written} snapshot rows for {date}')
+
+        deleted = compact(date - timedelta(days=options['keep_days']), batch_size=batch_size)
+        self.stdout.write(
+            self.style.SUCCESS(f'Compacted inventory snapshots, {deleted} rows removed')
+        )
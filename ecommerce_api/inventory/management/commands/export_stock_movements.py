@@ -0,0 +1,7 @@
+from ecommerce_api.exports import ExportCommand
+from inventory.exports import StockMovementExport
+
+
+class Command(ExportCommand):
+    help = 'Stream stock movements as CSV or NDJSON, with the export endpoint filters'
+    export_class = StockMovementExport
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-17 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['created_at', 'id'], name='inventory_s_created_36aee8_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.13 on 2026-10-17 03:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stockmovement_inventory_s_created_36aee8_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(max_length=32)),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField()),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='inventory.inventory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='inventory_s_expires_9d6a1b_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockreservation',
+            constraint=models.UniqueConstraint(fields=('reference', 'inventory'), name='unique_reservation_per_reference'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.13 on 2026-10-17 03:44
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.lookups
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stockreservation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(django.db.models.lookups.LessThanOrEqual(django.db.models.expressions.CombinedExpression(models.F('stock_level'), '-', models.F('reserved_stock')), models.F('low_stock_threshold'))), fields=['id'], name='inventory_low_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.13 on 2026-10-17 03:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_products_pr_status_0db408_idx'),
+        ('inventory', '0004_inventory_low_stock_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inventory_snapshots', to='products.category')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inventory_snapshots', to='products.product')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='inventorysnapshot',
+            constraint=models.UniqueConstraint(condition=models.Q(('product__isnull', False)), fields=('product', 'date'), name='unique_product_snapshot_per_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventorysnapshot',
+            constraint=models.UniqueConstraint(condition=models.Q(('product__isnull', True)), fields=('category', 'date'), name='unique_category_snapshot_per_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventorysnapshot',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True), ('product__isnull', True)), fields=('date',), name='unique_uncategorized_snapshot_per_day'),
+        ),
+    ]
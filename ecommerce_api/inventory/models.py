@@ -1,7 +1,9 @@
 from django.db import models
 from django.conf import settings
-from products.models import Product
+from products.models import Category, Product
 from django.core.validators import MinValueValidator
+from django.db.models import F, Q, Value
+from django.db.models.lookups import LessThanOrEqual
 
 class Supplier(models.Model):
     name = models.CharField(max_length=255)
@@ -15,12 +17,45 @@ class Supplier(models.Model):
     def __str__(self):
         return self.name
 
+# Available stock (stock_level - reserved_stock) at or below the row's own
+# threshold. Queries must use this exact expression for PostgreSQL to pick the
+# partial index below.
+LOW_STOCK = Q(LessThanOrEqual(F('stock_level') - F('reserved_stock'), F('low_stock_threshold')))
+
+
+class InventoryQuerySet(models.QuerySet):
+    def with_available(self):
+        return self.annotate(available=F('stock_level') - F('reserved_stock'))
+
+    def low_stock(self, threshold=None):
+        """
+        Rows whose available stock is at or below `threshold`, or below
+        their own low_stock_threshold when no threshold is given.
+        """
+        if threshold is None:
+            return self.with_available().filter(LOW_STOCK).annotate(
+                threshold=F('low_stock_threshold')
+            )
+        return self.with_available().filter(available__lte=threshold).annotate(
+            threshold=Value(threshold)
+        )
+
+
 class Inventory(models.Model):
     product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='inventory')
     stock_level = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     low_stock_threshold = models.IntegerField(default=10, validators=[MinValueValidator(0)])
     reserved_stock = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     last_updated = models.DateTimeField(auto_now=True)
+
+    objects = InventoryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Only low-stock rows are indexed, so reports scan a small index
+            # instead of every SKU
+            models.Index(fields=['id'], condition=LOW_STOCK, name='inventory_low_stock_idx'),
+        ]
     
     def available_stock(self):
         return self.stock_level - self.reserved_stock
@@ -31,6 +66,67 @@ class Inventory(models.Model):
     def __str__(self):
         return f"{self.product.name} - Stock: {self.stock_level}"
 
+class StockReservation(models.Model):
+    """
+    A short-lived hold on stock for a cart or a pending order.
+
+    The sum of a product's holds is mirrored in Inventory.reserved_stock, so
+    available_stock() is read from a single row. Expired holds are released
+    in bulk by inventory.tasks.release_expired_reservations_task.
+    """
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='reservations')
+    # "cart:<id>" or "order:<id>"
+    reference = models.CharField(max_length=32)
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['reference', 'inventory'], name='unique_reservation_per_reference'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.reference} holds {self.quantity} until {self.expires_at}"
+
+class InventorySnapshot(models.Model):
+    """
+    End-of-day stock level and value, per product and per category.
+
+    Product rows have `product` set (and the product's category at the
+    time); category rows have `product` empty, and a category row without a
+    category covers uncategorised products. Rows are only written for days
+    on which something changed, so the level on any date is the latest row
+    on or before it. See inventory/snapshots.py.
+    """
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name='inventory_snapshots')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='inventory_snapshots')
+    quantity = models.IntegerField(default=0)
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'date'], condition=Q(product__isnull=False),
+                name='unique_product_snapshot_per_day'
+            ),
+            models.UniqueConstraint(
+                fields=['category', 'date'], condition=Q(product__isnull=True),
+                name='unique_category_snapshot_per_day'
+            ),
+            models.UniqueConstraint(
+                fields=['date'], condition=Q(product__isnull=True, category__isnull=True),
+                name='unique_uncategorized_snapshot_per_day'
+            ),
+        ]
+
+    def __str__(self):
+        subject = f"product {self.product_id}" if self.product_id else f"category {self.category_id}"
+        return f"{subject} on {self.date}: {self.quantity} units, {self.value}"
+
 class StockMovement(models.Model):
     MOVEMENT_TYPES = (
         ('in', 'Stock In'),
@@ -48,6 +144,11 @@ class StockMovement(models.Model):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
+
 class PurchaseOrder(models.Model):
     STATUS_CHOICES = (
         ('draft', 'Draft'),
@@ -0,0 +1,195 @@
+# inventory/reservations.py
+"""
+Short-lived stock holds for carts and pending orders.
+
+A hold is a StockReservation row (reference, inventory, quantity,
+expires_at). Creating, resizing and releasing holds changes
+Inventory.reserved_stock with the conditional UPDATEs of products.stock, so
+a hold is only granted while reserved_stock stays within stock_level, and
+stock_level - reserved_stock can be read from one row without locking it.
+Only a reference's own hold rows are locked while they are resized, so
+concurrent checkouts for different carts never queue behind each other.
+
+Expired holds are released in batches by release_expired(), and by hold()
+for the products it touches; until then available_stock() counts them as
+free stock.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from products.stock import apply_stock_changes
+from .models import Inventory, StockReservation
+
+
+def cart_reference(cart_id):
+    return f'cart:{cart_id}'
+
+
+def order_reference(order_id):
+    return f'order:{order_id}'
+
+
+def cart_hold_ttl():
+    return getattr(settings, 'STOCK_HOLD_CART_TTL', 900)
+
+
+def order_hold_ttl():
+    return getattr(settings, 'STOCK_HOLD_ORDER_TTL', 1800)
+
+
+def available_stock(product_ids):
+    """{product_id: stock_level - unexpired holds} for products with inventory, in one query"""
+    expired = (
+        StockReservation.objects.filter(inventory=OuterRef('pk'), expires_at__lte=timezone.now())
+        .values('inventory').annotate(total=Sum('quantity')).values('total')
+    )
+    return dict(
+        Inventory.objects.filter(product_id__in=product_ids)
+        .annotate(available=F('stock_level') - F('reserved_stock') + Coalesce(Subquery(expired), 0))
+        .values_list('product_id', 'available')
+    )
+
+
+def hold(reference, quantities, ttl):
+    """
+    Set the holds of `reference` to `quantities` ({product_id: quantity})
+    and push their expiry `ttl` seconds out; a quantity of 0 drops the hold.
+
+    Returns {product_id: granted}. Products without an inventory record
+    aren't tracked and always succeed; a hold that can't grow keeps its
+    previous size.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl)
+    results = dict.fromkeys(quantities, True)
+
+    with transaction.atomic():
+        inventory_ids = dict(
+            Inventory.objects.filter(product_id__in=quantities).values_list('product_id', 'id')
+        )
+        if not inventory_ids:
+            return results
+        _release_expired_holds(inventory_ids.values(), now)
+        # Two first holds for the same reference would both find no row to
+        # lock; empty placeholders give them one to queue on instead
+        StockReservation.objects.bulk_create([
+            StockReservation(
+                inventory_id=inventory_id, reference=reference, quantity=0, expires_at=expires_at
+            )
+            for inventory_id in sorted(inventory_ids.values())
+        ], ignore_conflicts=True)
+        existing = {
+            reservation.inventory_id: reservation
+            for reservation in StockReservation.objects.select_for_update().filter(
+                reference=reference, inventory_id__in=inventory_ids.values()
+            )
+        }
+        for product_id, inventory_id in list(inventory_ids.items()):
+            if inventory_id not in existing:
+                # A concurrent release() dropped the row the insert ran into
+                results[product_id] = False
+                del inventory_ids[product_id]
+
+        deltas = {}
+        for product_id, inventory_id in inventory_ids.items():
+            deltas[inventory_id] = quantities[product_id] - existing[inventory_id].quantity
+        # Holds may only grow into unreserved stock; shrinking always succeeds
+        grown = apply_stock_changes(
+            Inventory, 'reserved_stock',
+            {pk: delta for pk, delta in deltas.items() if delta > 0},
+            ceiling='stock_level'
+        )
+        apply_stock_changes(
+            Inventory, 'reserved_stock', {pk: delta for pk, delta in deltas.items() if delta < 0}
+        )
+
+        to_update, to_delete = [], []
+        for product_id, inventory_id in inventory_ids.items():
+            reservation = existing[inventory_id]
+            quantity = quantities[product_id]
+            if inventory_id in grown and grown[inventory_id] is None:
+                results[product_id] = False
+                if not reservation.quantity:
+                    to_delete.append(reservation.pk)
+            elif quantity <= 0:
+                to_delete.append(reservation.pk)
+            else:
+                reservation.quantity = quantity
+                reservation.expires_at = expires_at
+                to_update.append(reservation)
+        StockReservation.objects.bulk_update(to_update, ['quantity', 'expires_at'])
+        if to_delete:
+            StockReservation.objects.filter(pk__in=to_delete).delete()
+
+    return results
+
+
+def _release_rows(rows):
+    """Delete (id, inventory_id, quantity) hold rows and give their stock back"""
+    released = defaultdict(int)
+    for _, inventory_id, quantity in rows:
+        released[inventory_id] -= quantity
+    StockReservation.objects.filter(pk__in=[row[0] for row in rows]).delete()
+    apply_stock_changes(Inventory, 'reserved_stock', released)
+
+
+def _release_expired_holds(inventory_ids, now):
+    """Release the expired holds on some inventory records, skipping locked ones"""
+    rows = list(
+        StockReservation.objects.select_for_update(skip_locked=True)
+        .filter(inventory_id__in=inventory_ids, expires_at__lte=now)
+        .values_list('id', 'inventory_id', 'quantity')
+    )
+    if rows:
+        _release_rows(rows)
+
+
+def release(reference, product_ids=None):
+    """Drop the holds of `reference`, optionally only for some products"""
+    with transaction.atomic():
+        reservations = StockReservation.objects.select_for_update().filter(reference=reference)
+        if product_ids is not None:
+            reservations = reservations.filter(
+                inventory_id__in=Inventory.objects.filter(product_id__in=product_ids).values('id')
+            )
+        rows = list(reservations.values_list('id', 'inventory_id', 'quantity'))
+        if rows:
+            _release_rows(rows)
+    return len(rows)
+
+
+def release_expired(batch_size=1000, now=None):
+    """Release every hold that expired before `now`; returns how many"""
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            # Holds being resized are skipped; they get a new expiry anyway
+            rows = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lte=now).order_by('expires_at')
+                .values_list('id', 'inventory_id', 'quantity')[:batch_size]
+            )
+            if not rows:
+                return released
+            _release_rows(rows)
+        released += len(rows)
+
+
+def hold_for_order(order, quantities):
+    """
+    Hold stock for a new pending order, taking over the buyer's cart holds
+    for the same products. Returns {product_id: granted}.
+    """
+    from cart.models import Cart
+
+    cart_id = Cart.objects.filter(user_id=order.user_id).values_list('pk', flat=True).first()
+    if cart_id is not None:
+        release(cart_reference(cart_id), list(quantities))
+    return hold(order_reference(order.pk), quantities, order_hold_ttl())
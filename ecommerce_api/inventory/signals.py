@@ -1,67 +1,23 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from orders.models import Order, OrderItem  # Assuming you have an Order model
-from .models import Inventory, StockMovement
+from cart.models import CartItem
+from orders.models import Order
+from .reservations import cart_hold_ttl, cart_reference, hold, order_reference, release
 
-@receiver(post_save, sender=Order)
-def reserve_stock_on_order(sender, instance, created, **kwargs):
-    if created and instance.status == 'confirmed':
-        for item in instance.items.all():
-            try:
-                inventory = Inventory.objects.get(product=item.product)
-                if inventory.available_stock() >= item.quantity:
-                    inventory.reserved_stock += item.quantity
-                    inventory.save()
-                    
-                    # Create stock movement record
-                    StockMovement.objects.create(
-                        inventory=inventory,
-                        movement_type='reserve',
-                        quantity=item.quantity,
-                        reference=f"Order #{instance.id}",
-                        created_by=instance.user
-                    )
-            except Inventory.DoesNotExist:
-                # Handle product without inventory record
-                pass
+@receiver(post_save, sender=CartItem)
+def hold_stock_for_cart_item(sender, instance, raw=False, **kwargs):
+    """Hold stock for cart items; the hold lapses unless the cart is touched again"""
+    if instance.cart_id and not raw:
+        hold(cart_reference(instance.cart_id), {instance.product_id: instance.quantity},
+             cart_hold_ttl())
 
-@receiver(post_save, sender=Order)
-def release_stock_on_order_cancellation(sender, instance, **kwargs):
-    if instance.status == 'cancelled':
-        for item in instance.items.all():
-            try:
-                inventory = Inventory.objects.get(product=item.product)
-                inventory.reserved_stock -= item.quantity
-                inventory.save()
-                
-                # Create stock movement record
-                StockMovement.objects.create(
-                    inventory=inventory,
-                    movement_type='release',
-                    quantity=item.quantity,
-                    reference=f"Order Cancelled #{instance.id}",
-                    created_by=instance.user
-                )
-            except Inventory.DoesNotExist:
-                pass
+@receiver(post_delete, sender=CartItem)
+def release_stock_for_cart_item(sender, instance, **kwargs):
+    if instance.cart_id:
+        release(cart_reference(instance.cart_id), [instance.product_id])
 
 @receiver(post_save, sender=Order)
-def reduce_stock_on_order_completion(sender, instance, **kwargs):
-    if instance.status == 'completed':
-        for item in instance.items.all():
-            try:
-                inventory = Inventory.objects.get(product=item.product)
-                inventory.stock_level -= item.quantity
-                inventory.reserved_stock -= item.quantity
-                inventory.save()
-                
-                # Create stock movement record
-                StockMovement.objects.create(
-                    inventory=inventory,
-                    movement_type='out',
-                    quantity=item.quantity,
-                    reference=f"Order Completed #{instance.id}",
-                    created_by=instance.user
-                )
-            except Inventory.DoesNotExist:
-                pass
\ No newline at end of file
+def release_stock_when_order_leaves_pending(sender, instance, created, raw=False, **kwargs):
+    """Holds only cover pending orders"""
+    if not created and not raw and instance.status != 'PENDING':
+        release(order_reference(instance.pk))
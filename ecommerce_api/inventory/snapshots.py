@@ -0,0 +1,315 @@
+# inventory/snapshots.py
+"""
+Inventory valuation time series.
+
+Every stock_level change made through InventoryUtils (the same calls that
+write StockMovement rows) is folded into today's InventorySnapshot rows for
+the product and for its category: the row is created on the first change of
+the day, carried forward from the latest earlier row, and then adjusted with
+`quantity = quantity + n, value = value + n * price`. The value of the
+inventory on any date is therefore the latest category row on or before it,
+one indexed lookup per category.
+
+Every change in a category updates the same category row, so the fold runs
+after the changing transaction commits, in a short transaction of its own.
+Checkouts never hold that row's lock while they finish. A fold lost to a
+crash right after the commit is drift like any other.
+
+Changes that bypass InventoryUtils (admin or API edits of stock_level, price
+changes, products moving between categories) are absorbed by reconcile(),
+which the nightly compact_inventory_snapshots command runs before thinning
+old product rows with compact().
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+)
+from django.utils import timezone
+
+from ecommerce_api.money import quantize_money
+from products.models import Category, Product
+from .models import Inventory, InventorySnapshot
+
+
+def _add(date, lookup, create_kwargs, quantity_delta, value_delta):
+    today = InventorySnapshot.objects.filter(date=date, **lookup)
+    changes = {'quantity': F('quantity') + quantity_delta, 'value': F('value') + value_delta}
+    if today.update(**changes):
+        return
+
+    previous = InventorySnapshot.objects.filter(
+        date__lt=date, **lookup
+    ).order_by('-date').values_list('quantity', 'value').first() or (0, Decimal('0'))
+    try:
+        with transaction.atomic():
+            InventorySnapshot.objects.create(
+                date=date, quantity=previous[0] + quantity_delta,
+                value=previous[1] + value_delta, **create_kwargs
+            )
+    except IntegrityError:
+        # Another change created today's row first
+        today.update(**changes)
+
+
+def record_stock_change(product_id, quantity_delta, date=None):
+    """Fold a signed stock_level change of a product into today's snapshots once it commits"""
+    if quantity_delta:
+        date = date or timezone.localdate()
+        transaction.on_commit(lambda: _fold_stock_change(product_id, quantity_delta, date))
+
+
+def _fold_stock_change(product_id, quantity_delta, date):
+    price, category_id = Product.objects.values_list('price', 'category_id').get(pk=product_id)
+    value_delta = price * quantity_delta
+
+    with transaction.atomic():
+        _add(date, {'product_id': product_id},
+             {'product_id': product_id, 'category_id': category_id},
+             quantity_delta, value_delta)
+        _add(date, {'product': None, 'category_id': category_id},
+             {'category_id': category_id},
+             quantity_delta, value_delta)
+
+
+def record_stock_changes(changes, date=None):
+    """
+    record_stock_change() for many products ({product_id: delta}) at once:
+    today's existing rows are adjusted by one UPDATE and the missing ones
+    carried forward and bulk created.
+    """
+    changes = {product_id: delta for product_id, delta in changes.items() if delta}
+    if changes:
+        date = date or timezone.localdate()
+        transaction.on_commit(lambda: _fold_stock_changes(changes, date))
+
+
+def _fold_stock_changes(changes, date):
+    money = DecimalField(max_digits=14, decimal_places=2)
+
+    # Product rows are keyed by product id, category rows by (None, category id)
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    category_ids = {}
+    for product_id, price, category_id in Product.objects.filter(
+        pk__in=changes
+    ).values_list('pk', 'price', 'category_id'):
+        category_ids[product_id] = category_id
+        for key in (product_id, (None, category_id)):
+            deltas[key][0] += changes[product_id]
+            deltas[key][1] += price * changes[product_id]
+
+    with transaction.atomic():
+        today = InventorySnapshot.objects.filter(date=date)
+        existing = {
+            (product_id if product_id else (None, category_id)): pk
+            for pk, product_id, category_id in today.filter(
+                Q(product_id__in=category_ids)
+                | Q(product=None, category_id__in=set(category_ids.values()) - {None})
+                | Q(product=None, category=None)
+            ).values_list('pk', 'product_id', 'category_id')
+        }
+        if existing:
+            today.filter(pk__in=existing.values()).update(
+                quantity=F('quantity') + Case(
+                    *[When(pk=pk, then=Value(deltas[key][0])) for key, pk in existing.items()],
+                    default=Value(0), output_field=IntegerField()
+                ),
+                value=F('value') + Case(
+                    *[When(pk=pk, then=Value(deltas[key][1])) for key, pk in existing.items()],
+                    default=Value(Decimal('0')), output_field=money
+                ),
+            )
+
+        missing = [key for key in deltas if key not in existing]
+        if not missing:
+            return
+        yesterday = date - timedelta(days=1)
+        previous = {
+            (None, category_id): (row['quantity'], row['value'])
+            for category_id, row in _latest_category_rows(yesterday).items()
+        }
+        latest = _latest(yesterday, product=OuterRef('pk'))
+        previous.update(
+            (product_id, (quantity, quantize_money(value)))
+            for product_id, quantity, value in Product.objects.filter(
+                pk__in=[key for key in missing if not isinstance(key, tuple)]
+            ).annotate(
+                latest_quantity=Subquery(latest.values('quantity')[:1]),
+                latest_value=Subquery(latest.values('value')[:1], output_field=money),
+            ).values_list('pk', 'latest_quantity', 'latest_value')
+            if quantity is not None
+        )
+
+        rows = []
+        for key in missing:
+            quantity, value = previous.get(key, (0, Decimal('0')))
+            if isinstance(key, tuple):
+                create_kwargs = {'category_id': key[1]}
+            else:
+                create_kwargs = {'product_id': key, 'category_id': category_ids[key]}
+            rows.append(InventorySnapshot(
+                date=date, quantity=quantity + deltas[key][0],
+                value=value + deltas[key][1], **create_kwargs
+            ))
+        try:
+            with transaction.atomic():
+                InventorySnapshot.objects.bulk_create(rows)
+        except IntegrityError:
+            # Another change created some of today's rows first
+            for row in rows:
+                lookup = {'product_id': row.product_id} if row.product_id else {
+                    'product': None, 'category_id': row.category_id
+                }
+                key = row.product_id or (None, row.category_id)
+                _add(date, lookup, {'product_id': row.product_id, 'category_id': row.category_id},
+                     *deltas[key])
+
+
+def _latest(date, **lookup):
+    return InventorySnapshot.objects.filter(date__lte=date, **lookup).order_by('-date')
+
+
+def _latest_category_rows(date):
+    """{category_id: latest category row on or before `date`}, None for uncategorised"""
+    latest = _latest(date, product=None, category=OuterRef('pk'))
+    categories = Category.objects.annotate(
+        latest_id=Subquery(latest.values('id')[:1]),
+        latest_date=Subquery(latest.values('date')[:1]),
+        latest_quantity=Subquery(latest.values('quantity')[:1]),
+        latest_value=Subquery(latest.values('value')[:1]),
+    ).filter(latest_id__isnull=False).order_by('name')
+
+    rows = {
+        category['id']: {
+            'id': category['latest_id'], 'name': category['name'], 'date': category['latest_date'],
+            'quantity': category['latest_quantity'], 'value': quantize_money(category['latest_value']),
+        }
+        for category in categories.values(
+            'id', 'name', 'latest_id', 'latest_date', 'latest_quantity', 'latest_value'
+        )
+    }
+    uncategorized = _latest(date, product=None, category=None).values('id', 'date', 'quantity', 'value').first()
+    if uncategorized:
+        rows[None] = {
+            **uncategorized, 'name': 'Uncategorized', 'value': quantize_money(uncategorized['value'])
+        }
+    return rows
+
+
+def valuation_as_of(date):
+    """Inventory quantity and value per category at the end of `date`"""
+    rows = [
+        {'id': category_id, 'name': row['name'], 'quantity': row['quantity'], 'value': row['value']}
+        for category_id, row in _latest_category_rows(date).items()
+    ]
+    return {
+        'date': date,
+        'total_quantity': sum(row['quantity'] for row in rows),
+        'total_value': sum((row['value'] for row in rows), Decimal('0.00')),
+        'categories': rows,
+    }
+
+
+def _set_rows(date, targets, latest_rows, create_kwargs):
+    """Write absolute (quantity, value) targets as `date` rows where they differ from the latest"""
+    to_create, to_update = [], []
+    for key, (quantity, value) in targets.items():
+        latest = latest_rows.get(key)
+        # No row reads as zero stock
+        previous = (latest['quantity'], latest['value']) if latest else (0, Decimal('0.00'))
+        if previous == (quantity, value):
+            continue
+        if latest and latest['date'] == date:
+            to_update.append(InventorySnapshot(pk=latest['id'], quantity=quantity, value=value))
+        else:
+            to_create.append(InventorySnapshot(
+                date=date, quantity=quantity, value=value, **create_kwargs(key)
+            ))
+    InventorySnapshot.objects.bulk_create(to_create)
+    InventorySnapshot.objects.bulk_update(to_update, ['quantity', 'value'])
+    return len(to_create) + len(to_update)
+
+
+def reconcile(date=None, batch_size=2000):
+    """
+    Bring `date`'s snapshots in line with the actual stock levels and prices.
+    Returns the number of rows written.
+    """
+    date = date or timezone.localdate()
+    written = 0
+    money = DecimalField(max_digits=14, decimal_places=2)
+
+    # Products, in primary key chunks so memory stays flat
+    latest = _latest(date, product=OuterRef('product_id'))
+    inventories = Inventory.objects.annotate(
+        value=F('stock_level') * F('product__price'),
+        latest_id=Subquery(latest.values('id')[:1]),
+        latest_date=Subquery(latest.values('date')[:1]),
+        latest_quantity=Subquery(latest.values('quantity')[:1]),
+        latest_value=Subquery(latest.values('value')[:1], output_field=money),
+    ).order_by('pk')
+    last_pk = 0
+    while True:
+        chunk = list(inventories.filter(pk__gt=last_pk).values(
+            'pk', 'product_id', 'product__category_id', 'stock_level', 'value',
+            'latest_id', 'latest_date', 'latest_quantity', 'latest_value'
+        )[:batch_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1]['pk']
+        categories = {row['product_id']: row['product__category_id'] for row in chunk}
+        written += _set_rows(
+            date,
+            {row['product_id']: (row['stock_level'], quantize_money(row['value'])) for row in chunk},
+            {row['product_id']: {'id': row['latest_id'], 'date': row['latest_date'],
+                                 'quantity': row['latest_quantity'],
+                                 'value': quantize_money(row['latest_value'])}
+             for row in chunk if row['latest_id'] is not None},
+            lambda product_id: {'product_id': product_id, 'category_id': categories[product_id]},
+        )
+
+    # Categories, recomputed from the stock levels in one aggregate
+    targets = {
+        row['product__category']: (row['quantity'], quantize_money(row['value']))
+        for row in Inventory.objects.values('product__category').annotate(
+            quantity=Sum('stock_level'),
+            value=Sum(F('stock_level') * F('product__price'), output_field=money),
+        ).order_by()
+    }
+    latest_rows = _latest_category_rows(date)
+    for category_id in latest_rows:
+        # Categories whose stock is gone entirely drop to zero
+        targets.setdefault(category_id, (0, Decimal('0.00')))
+    written += _set_rows(date, targets, latest_rows, lambda category_id: {'category_id': category_id})
+    return written
+
+
+def compact(before, batch_size=2000):
+    """
+    Thin product rows dated before `before` to the last row of each month.
+    Category rows are kept daily. Returns the number of rows deleted.
+    """
+    old = InventorySnapshot.objects.filter(product__isnull=False, date__lt=before)
+    deleted = 0
+    last_product_id = 0
+    while True:
+        product_ids = list(
+            old.filter(product_id__gt=last_product_id).order_by('product_id')
+            .values_list('product_id', flat=True).distinct()[:batch_size]
+        )
+        if not product_ids:
+            return deleted
+        last_product_id = product_ids[-1]
+
+        month_ends = {}
+        rows = old.filter(product_id__in=product_ids).order_by('product_id', 'date')
+        for pk, product_id, date in rows.values_list('pk', 'product_id', 'date'):
+            month_ends[(product_id, date.year, date.month)] = pk
+        keep = set(month_ends.values())
+        stale = [pk for pk in rows.values_list('pk', flat=True) if pk not in keep]
+        if stale:
+            InventorySnapshot.objects.filter(pk__in=stale).delete()
+            deleted += len(stale)
@@ -0,0 +1,17 @@
+from celery import shared_task
+from django.core.management import call_command
+from .reservations import release_expired
+
+@shared_task
+def release_expired_reservations_task():
+    """
+    Celery task to release expired stock holds
+    """
+    return release_expired()
+
+@shared_task
+def compact_inventory_snapshots_task():
+    """
+    Celery task to reconcile today's inventory snapshots and thin old ones
+    """
+    call_command('compact_inventory_snapshots')
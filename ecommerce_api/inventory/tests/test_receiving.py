@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from inventory.models import (
+    Inventory, InventorySnapshot, PurchaseOrder, PurchaseOrderItem, StockMovement, Supplier
+)
+from inventory.utils import InventoryUtils
+from products.models import Product
+
+User = get_user_model()
+
+
+class PurchaseOrderReceivingTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', password='pass', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        supplier = Supplier.objects.create(
+            name='Supplier', contact_person='Sam', email='sam@example.com',
+            phone='123', address='1 Dock Rd'
+        )
+        self.po = PurchaseOrder.objects.create(
+            supplier=supplier, order_number='PO-1', status='ordered', created_by=self.staff
+        )
+        self.products = [
+            Product.objects.create(name=f'Part {i}', slug=f'part-{i}', price=Decimal('2.00'), sku=f'RCV{i}')
+            for i in range(3)
+        ]
+        # The first product is already stocked
+        Inventory.objects.create(product=self.products[0], stock_level=5)
+        self.items = [
+            PurchaseOrderItem.objects.create(
+                purchase_order=self.po, product=product, quantity=10, unit_cost=Decimal('1.00')
+            )
+            for product in self.products
+        ]
+        self.url = f'/api/inventory/purchase-orders/{self.po.pk}/receive_stock/'
+
+    def stock(self):
+        return list(
+            Inventory.objects.filter(product__in=self.products)
+            .order_by('product_id').values_list('stock_level', flat=True)
+        )
+
+    def test_receive_everything(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['received_quantity'], 30)
+        self.assertEqual(self.stock(), [15, 10, 10])
+        self.assertEqual(StockMovement.objects.filter(reference='PO-1', movement_type='in').count(), 3)
+        self.po.refresh_from_db()
+        self.assertEqual(self.po.status, 'received')
+        self.assertEqual(
+            InventorySnapshot.objects.get(date=timezone.localdate(), product=None).quantity, 30
+        )
+
+    def test_query_count_does_not_grow_with_lines(self):
+        for i in range(3, 30):
+            product = Product.objects.create(
+                name=f'Part {i}', slug=f'part-{i}', price=Decimal('2.00'), sku=f'RCV{i}'
+            )
+            PurchaseOrderItem.objects.create(
+                purchase_order=self.po, product=product, quantity=1, unit_cost=Decimal('1.00')
+            )
+        # The same statements as for the three line order, snapshots included
+        with self.assertNumQueries(22), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(InventoryUtils.receive_purchase_order(self.po), 57)
+        self.assertEqual(Inventory.objects.count(), 30)
+
+    def test_partial_receipts(self):
+        first, second, third = self.items
+        response = self.client.post(self.url, {'items': [
+            {'id': first.pk, 'quantity': 4}, {'id': second.pk, 'quantity': 10}
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'ordered')
+        self.assertEqual(self.stock(), [9, 10])
+
+        # The rest of the outstanding quantity
+        response = self.client.post(self.url, format='json')
+        self.assertEqual(response.data['received_quantity'], 16)
+        self.assertEqual(response.data['status'], 'received')
+        self.assertEqual(
+            list(PurchaseOrderItem.objects.order_by('pk').values_list('received_quantity', flat=True)),
+            [10, 10, 10]
+        )
+
+    def test_over_receipt_is_rejected(self):
+        response = self.client.post(self.url, {'items': [
+            {'id': self.items[1].pk, 'quantity': 2}, {'id': self.items[0].pk, 'quantity': 11}
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stock(), [5])
+        self.assertFalse(StockMovement.objects.exists())
+
+        response = self.client.post(self.url, {'items': [{'id': 'x'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
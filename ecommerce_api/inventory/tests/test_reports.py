@@ -0,0 +1,65 @@
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from inventory.models import Inventory
+from inventory.utils import InventoryReports, InventoryUtils
+from products.models import Product
+
+User = get_user_model()
+
+
+class LowStockReportTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', password='pass', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        # (stock_level, reserved_stock, low_stock_threshold, price)
+        rows = [(0, 0, 5, '10.00'), (8, 4, 5, '2.50'), (20, 0, 5, '1.00'), (12, 2, 10, '4.00')]
+        self.inventories = []
+        for i, (stock, reserved, threshold, price) in enumerate(rows):
+            product = Product.objects.create(
+                name=f'Item {i}', slug=f'item-{i}', price=Decimal(price), sku=f'LOW{i}'
+            )
+            self.inventories.append(Inventory.objects.create(
+                product=product, stock_level=stock, reserved_stock=reserved,
+                low_stock_threshold=threshold
+            ))
+
+    def test_low_stock_items_use_available_stock(self):
+        items = InventoryUtils.get_low_stock_items()
+        self.assertEqual(
+            [(item.product.name, item.available, item.threshold) for item in items.order_by('id')],
+            [('Item 0', 0, 5), ('Item 1', 4, 5), ('Item 3', 10, 10)]
+        )
+        self.assertEqual(
+            [item.product.name for item in InventoryUtils.get_low_stock_items(threshold=4).order_by('id')],
+            ['Item 0', 'Item 1']
+        )
+
+    def test_summary_is_one_query(self):
+        with self.assertNumQueries(1):
+            summary = InventoryReports.get_inventory_summary()
+        self.assertEqual(summary['total_items'], 4)
+        self.assertEqual(summary['low_stock_items'], 3)
+        self.assertEqual(summary['out_of_stock_items'], 1)
+        self.assertEqual(summary['total_value'], Decimal('88.00'))
+
+    def test_report_is_keyset_paginated(self):
+        url = '/api/inventory/purchase-orders/low_stock_report/'
+        with self.settings(REST_FRAMEWORK={'PAGE_SIZE': 2}):
+            first = self.client.get(url).json()
+            cursor = parse_qs(urlparse(first['next']).query)['cursor'][0]
+            second = self.client.get(url, {'cursor': cursor}).json()
+
+        self.assertEqual([row['product'] for row in first['results']], ['Item 0', 'Item 1'])
+        self.assertTrue(first['results'][0]['is_critical'])
+        self.assertEqual([row['product'] for row in second['results']], ['Item 3'])
+        self.assertIsNone(second['next'])
+
+    def test_report_rejects_bad_threshold(self):
+        response = self.client.get('/api/inventory/purchase-orders/low_stock_report/', {'threshold': 'x'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,161 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework import serializers
+
+from cart.models import Cart, CartItem
+from inventory.models import Inventory, StockReservation
+from inventory.reservations import (
+    available_stock, cart_reference, hold, order_reference, release, release_expired
+)
+from orders.serializers import OrderCreateSerializer
+from products.models import Product
+
+User = get_user_model()
+
+
+class StockReservationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='buyer@example.com', password='pass')
+        self.cart = Cart.objects.get(user=self.user)
+        self.product = Product.objects.create(
+            name='Held Product', slug='held-product', price=Decimal('10.00'),
+            sku='HOLD1', quantity=10, status='ACTIVE'
+        )
+        self.untracked = Product.objects.create(
+            name='Untracked', slug='untracked', price=Decimal('5.00'),
+            sku='HOLD2', quantity=10, status='ACTIVE'
+        )
+        self.inventory = Inventory.objects.create(product=self.product, stock_level=5)
+
+    def reserved(self):
+        self.inventory.refresh_from_db()
+        return self.inventory.reserved_stock
+
+    def test_hold_is_limited_to_unreserved_stock(self):
+        self.assertEqual(hold('cart:1', {self.product.pk: 3}, 60), {self.product.pk: True})
+        self.assertEqual(hold('cart:2', {self.product.pk: 3}, 60), {self.product.pk: False})
+        self.assertEqual(hold('cart:2', {self.product.pk: 2}, 60), {self.product.pk: True})
+        self.assertEqual(self.reserved(), 5)
+        self.assertEqual(available_stock([self.product.pk]), {self.product.pk: 0})
+        # Untracked products need no hold
+        self.assertEqual(hold('cart:2', {self.untracked.pk: 50}, 60), {self.untracked.pk: True})
+
+    def test_resize_and_drop(self):
+        hold('cart:1', {self.product.pk: 4}, 60)
+        hold('cart:1', {self.product.pk: 1}, 60)
+        self.assertEqual(self.reserved(), 1)
+        self.assertEqual(StockReservation.objects.get().quantity, 1)
+        hold('cart:1', {self.product.pk: 0}, 60)
+        self.assertEqual(self.reserved(), 0)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_cart_items_hold_stock(self):
+        item = CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+        self.assertEqual(self.reserved(), 2)
+        item.quantity = 4
+        item.save()
+        self.assertEqual(self.reserved(), 4)
+        item.delete()
+        self.assertEqual(self.reserved(), 0)
+
+    def test_release_expired_in_batches(self):
+        hold('cart:1', {self.product.pk: 1}, 60)
+        hold('cart:2', {self.product.pk: 2}, 60)
+        hold('cart:3', {self.product.pk: 1}, 3600)
+        later = timezone.now() + timedelta(seconds=120)
+        self.assertEqual(release_expired(batch_size=1, now=later), 2)
+        self.assertEqual(self.reserved(), 1)
+        self.assertEqual(list(StockReservation.objects.values_list('reference', flat=True)), ['cart:3'])
+
+    def test_expired_holds_free_their_stock_without_the_task(self):
+        hold('cart:1', {self.product.pk: 5}, 60)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(available_stock([self.product.pk]), {self.product.pk: 5})
+        self.assertEqual(hold('cart:2', {self.product.pk: 5}, 60), {self.product.pk: True})
+        self.assertEqual(self.reserved(), 5)
+        self.assertEqual(list(StockReservation.objects.values_list('reference', flat=True)), ['cart:2'])
+
+    def test_failed_first_hold_leaves_no_row(self):
+        hold('cart:1', {self.product.pk: 5}, 60)
+        self.assertEqual(hold('cart:2', {self.product.pk: 1}, 60), {self.product.pk: False})
+        self.assertFalse(StockReservation.objects.filter(reference='cart:2').exists())
+
+    def test_merging_a_session_cart_moves_its_holds(self):
+        session_cart = Cart.objects.create(session_key='anonymous')
+        CartItem.objects.create(cart=session_cart, product=self.product, quantity=3)
+        self.cart.merge_with_session_cart(session_cart)
+        self.assertEqual(self.reserved(), 3)
+        self.assertEqual(
+            list(StockReservation.objects.values_list('reference', flat=True)),
+            [cart_reference(self.cart.pk)]
+        )
+
+    def order_payload(self, quantity):
+        return {
+            'shipping_address': '1 Main St', 'shipping_city': 'City', 'shipping_state': 'State',
+            'shipping_zip_code': '12345', 'shipping_country': 'Country',
+            'email': self.user.email,
+            'items': [{'product': self.product.pk, 'quantity': quantity}],
+        }
+
+    def test_pending_order_takes_over_cart_hold(self):
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=5)
+        serializer = OrderCreateSerializer(data=self.order_payload(5))
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        order = serializer.save(user=self.user)
+
+        self.assertEqual(self.reserved(), 5)
+        self.assertEqual(
+            list(StockReservation.objects.values_list('reference', flat=True)),
+            [order_reference(order.pk)]
+        )
+        order.status = 'CANCELLED'
+        order.save()
+        self.assertEqual(self.reserved(), 0)
+        self.assertEqual(release(cart_reference(self.cart.pk)), 0)
+
+    def test_order_rejected_when_stock_is_held_elsewhere(self):
+        hold('cart:other', {self.product.pk: 4}, 60)
+        serializer = OrderCreateSerializer(data=self.order_payload(2))
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.assertRaises(serializers.ValidationError):
+            serializer.save(user=self.user)
+        self.assertFalse(self.user.orders.exists())
+        self.assertEqual(self.reserved(), 4)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'needs concurrent transactions')
+class ConcurrentHoldTest(TransactionTestCase):
+    def test_concurrent_first_holds_for_one_reference(self):
+        product = Product.objects.create(
+            name='Raced', slug='raced', price=Decimal('1.00'), sku='RACE1', status='ACTIVE'
+        )
+        inventory = Inventory.objects.create(product=product, stock_level=10)
+        inserted, results = threading.Event(), []
+
+        def other_hold():
+            with transaction.atomic():
+                results.append(hold('cart:1', {product.pk: 2}, 60))
+                inserted.set()
+                # Still holding the row while the main thread's hold waits on it
+                threading.Event().wait(0.5)
+            connection.close()
+
+        thread = threading.Thread(target=other_hold)
+        thread.start()
+        inserted.wait(10)
+        try:
+            results.append(hold('cart:1', {product.pk: 3}, 60))
+        finally:
+            thread.join()
+        self.assertEqual(results, [{product.pk: True}, {product.pk: True}])
+        inventory.refresh_from_db()
+        self.assertEqual(inventory.reserved_stock, 3)
+        self.assertEqual(StockReservation.objects.get().quantity, 3)
@@ -0,0 +1,153 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from inventory.models import Inventory, InventorySnapshot
+from inventory.snapshots import compact, reconcile, record_stock_change, record_stock_changes, valuation_as_of
+from inventory.utils import InventoryUtils
+from products.models import Category, Product
+
+User = get_user_model()
+
+
+# Snapshots are folded in once the stock change commits
+class InventorySnapshotTest(TransactionTestCase):
+    def setUp(self):
+        self.tools = Category.objects.create(name='Tools', slug='tools')
+        self.hammer = Product.objects.create(
+            name='Hammer', slug='hammer', price=Decimal('10.00'), sku='SNAP1', category=self.tools
+        )
+        self.saw = Product.objects.create(
+            name='Saw', slug='saw', price=Decimal('2.50'), sku='SNAP2', category=self.tools
+        )
+        self.loose = Product.objects.create(
+            name='Loose', slug='loose', price=Decimal('1.00'), sku='SNAP3'
+        )
+        self.hammer_inventory = Inventory.objects.create(product=self.hammer)
+        self.saw_inventory = Inventory.objects.create(product=self.saw)
+        self.loose_inventory = Inventory.objects.create(product=self.loose)
+
+    def snapshot(self, **lookup):
+        return InventorySnapshot.objects.values_list('quantity', 'value').get(
+            date=timezone.localdate(), **lookup
+        )
+
+    def test_movements_update_snapshots_incrementally(self):
+        InventoryUtils.update_stock_level(self.hammer_inventory, 5, 'in')
+        InventoryUtils.update_stock_level(self.saw_inventory, 4, 'in')
+        InventoryUtils.update_stock_level(self.hammer_inventory, 2, 'out')
+        InventoryUtils.adjust_stock(self.saw_inventory, 'remove', 10, 'Damaged')
+        InventoryUtils.adjust_stock(self.hammer_inventory, 'correction', 7, 'Count')
+        InventoryUtils.update_stock_level(self.loose_inventory, 3, 'in')
+        # Reservations don't change the value of the stock
+        InventoryUtils.update_stock_level(self.hammer_inventory, 1, 'reserve')
+
+        self.assertEqual(self.snapshot(product=self.hammer), (7, Decimal('70.00')))
+        self.assertEqual(self.snapshot(product=self.saw), (0, Decimal('0.00')))
+        self.assertEqual(self.snapshot(product=None, category=self.tools), (7, Decimal('70.00')))
+        self.assertEqual(self.snapshot(product=None, category=None), (3, Decimal('3.00')))
+        # Nothing drifted, so there's nothing to reconcile
+        self.assertEqual(reconcile(), 0)
+
+    def test_folded_only_when_the_change_commits(self):
+        with transaction.atomic():
+            InventoryUtils.update_stock_level(self.hammer_inventory, 5, 'in')
+            self.assertFalse(InventorySnapshot.objects.exists())
+        self.assertEqual(self.snapshot(product=self.hammer), (5, Decimal('50.00')))
+
+        try:
+            with transaction.atomic():
+                InventoryUtils.update_stock_level(self.hammer_inventory, 5, 'in')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(self.snapshot(product=self.hammer), (5, Decimal('50.00')))
+
+    def test_bulk_changes_match_single_changes(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        record_stock_change(self.hammer.pk, 4, date=yesterday)
+        record_stock_change(self.loose.pk, 2)
+        record_stock_changes({self.hammer.pk: 1, self.saw.pk: 2, self.loose.pk: -1})
+
+        self.assertEqual(self.snapshot(product=self.hammer), (5, Decimal('50.00')))
+        self.assertEqual(self.snapshot(product=self.saw), (2, Decimal('5.00')))
+        self.assertEqual(self.snapshot(product=self.loose), (1, Decimal('1.00')))
+        self.assertEqual(self.snapshot(product=None, category=self.tools), (7, Decimal('55.00')))
+        self.assertEqual(self.snapshot(product=None, category=None), (1, Decimal('1.00')))
+
+    def test_value_as_of_date(self):
+        today = timezone.localdate()
+        record_stock_change(self.hammer.pk, 5, date=today - timedelta(days=3))
+        record_stock_change(self.saw.pk, 2, date=today - timedelta(days=1))
+        record_stock_change(self.loose.pk, 4, date=today)
+
+        with self.assertNumQueries(2):
+            past = valuation_as_of(today - timedelta(days=2))
+        self.assertEqual(past['total_quantity'], 5)
+        self.assertEqual(past['total_value'], Decimal('50.00'))
+        self.assertEqual(
+            valuation_as_of(today)['categories'],
+            [{'id': self.tools.pk, 'name': 'Tools', 'quantity': 7, 'value': Decimal('55.00')},
+             {'id': None, 'name': 'Uncategorized', 'quantity': 4, 'value': Decimal('4.00')}]
+        )
+        self.assertEqual(valuation_as_of(today - timedelta(days=10))['total_value'], Decimal('0.00'))
+
+    def test_reconcile_absorbs_direct_edits(self):
+        InventoryUtils.update_stock_level(self.hammer_inventory, 5, 'in')
+        # Bypasses InventoryUtils, and so the snapshots
+        Inventory.objects.filter(pk=self.saw_inventory.pk).update(stock_level=4)
+        Product.objects.filter(pk=self.hammer.pk).update(price=Decimal('12.00'))
+
+        self.assertEqual(reconcile(batch_size=1), 3)
+        self.assertEqual(self.snapshot(product=self.hammer), (5, Decimal('60.00')))
+        self.assertEqual(self.snapshot(product=self.saw), (4, Decimal('10.00')))
+        self.assertEqual(self.snapshot(product=None, category=self.tools), (9, Decimal('70.00')))
+        self.assertEqual(reconcile(), 0)
+
+    def test_compact_keeps_month_ends(self):
+        for day in (date(2024, 1, 5), date(2024, 1, 20), date(2024, 2, 3), date(2024, 2, 10)):
+            record_stock_change(self.hammer.pk, 1, date=day)
+
+        self.assertEqual(compact(date(2024, 2, 5), batch_size=1), 1)
+        self.assertEqual(
+            list(InventorySnapshot.objects.filter(product=self.hammer).values_list('date', 'quantity')),
+            [(date(2024, 1, 20), 2), (date(2024, 2, 3), 3), (date(2024, 2, 10), 4)]
+        )
+        # Category rows stay daily
+        self.assertEqual(InventorySnapshot.objects.filter(product=None).count(), 4)
+
+    def test_compaction_command(self):
+        Inventory.objects.filter(pk=self.hammer_inventory.pk).update(stock_level=2)
+        record_stock_change(self.saw.pk, 1, date=date(2024, 1, 5))
+        record_stock_change(self.saw.pk, 1, date=date(2024, 1, 6))
+        call_command('compact_inventory_snapshots', '--date', '2024-06-01', stdout=open('/dev/null', 'w'))
+
+        self.assertEqual(
+            list(InventorySnapshot.objects.filter(product=self.saw).values_list('date', flat=True)),
+            [date(2024, 1, 6), date(2024, 6, 1)]
+        )
+        self.assertEqual(
+            InventorySnapshot.objects.get(product=self.hammer).date, date(2024, 6, 1)
+        )
+
+    def test_summary_endpoint_as_of(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(
+            email='staff@example.com', password='pass', is_staff=True
+        ))
+        url = '/api/inventory/purchase-orders/inventory_summary/'
+        record_stock_change(self.hammer.pk, 3, date=date(2024, 3, 1))
+
+        response = client.get(url, {'as_of': '2024-03-02'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_value'], Decimal('30.00'))
+        self.assertEqual(response.data['categories'][0]['name'], 'Tools')
+        self.assertEqual(client.get(url, {'as_of': '2024-02-30'}).status_code, 400)
+        self.assertEqual(client.get(url, {'as_of': 'yesterday'}).status_code, 400)
+        self.assertIn('total_items', client.get(url).data)
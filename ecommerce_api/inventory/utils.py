@@ -1,8 +1,16 @@
+from collections import defaultdict
 from django.db import transaction
+from decimal import Decimal
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
+from ecommerce_api.money import quantize_money
+from orders.numbering import next_purchase_order_number
+from products.stock import apply_stock_changes
 from .models import Inventory, StockMovement, StockAdjustment
+from .snapshots import record_stock_change, record_stock_changes
 from django.core.exceptions import ValidationError
-from .models import Inventory, StockMovement, StockAdjustment, PurchaseOrder
+from .models import LOW_STOCK, Inventory, StockMovement, StockAdjustment, PurchaseOrderItem
 
 class InventoryUtils:
     """
@@ -17,18 +25,19 @@ class InventoryUtils:
         with transaction.atomic():
             # Update inventory based on movement type
             if movement_type == 'in':
-                inventory.stock_level += quantity
+                InventoryUtils._change(inventory, 'stock_level', quantity)
             elif movement_type == 'out':
-                inventory.stock_level = max(0, inventory.stock_level - quantity)
+                if not InventoryUtils._change(inventory, 'stock_level', -quantity):
+                    raise ValidationError(
+                        f"Insufficient stock. Required: {quantity}"
+                    )
             elif movement_type == 'reserve':
-                inventory.reserved_stock += quantity
+                InventoryUtils._change(inventory, 'reserved_stock', quantity)
             elif movement_type == 'release':
-                inventory.reserved_stock = max(0, inventory.reserved_stock - quantity)
+                InventoryUtils._decrement_to_zero(inventory, 'reserved_stock', quantity)
             else:
                 raise ValidationError(f"Invalid movement type: {movement_type}")
             
-            inventory.save()
-            
             # Create stock movement record
             StockMovement.objects.create(
                 inventory=inventory,
@@ -59,16 +68,17 @@ class InventoryUtils:
             
             # Update inventory based on adjustment type
             if adjustment_type == 'add':
-                inventory.stock_level += quantity
+                InventoryUtils._change(inventory, 'stock_level', quantity)
             elif adjustment_type == 'remove':
-                inventory.stock_level = max(0, inventory.stock_level - quantity)
+                # Removing stops at zero
+                current = InventoryUtils._locked_stock_level(inventory)
+                InventoryUtils._change(inventory, 'stock_level', -min(quantity, current))
             elif adjustment_type == 'correction':
-                inventory.stock_level = quantity
+                current = InventoryUtils._locked_stock_level(inventory)
+                InventoryUtils._change(inventory, 'stock_level', quantity - current)
             else:
                 raise ValidationError(f"Invalid adjustment type: {adjustment_type}")
             
-            inventory.save()
-            
             # Create stock movement record
             StockMovement.objects.create(
                 inventory=inventory,
@@ -81,44 +91,120 @@ class InventoryUtils:
         
         return adjustment
     
+    @staticmethod
+    def receive_purchase_order(purchase_order, quantities=None, user=None):
+        """
+        Receive stock for a purchase order in a fixed number of queries.
+
+        `quantities` maps item ids to the quantity arriving now; by default
+        everything still outstanding is received. The order is marked
+        received once every item is complete. Returns the number of units
+        received.
+        """
+        with transaction.atomic():
+            items = list(purchase_order.items.select_for_update().order_by('pk'))
+            if quantities is None:
+                quantities = {item.pk: item.quantity - item.received_quantity for item in items}
+                quantities = {pk: quantity for pk, quantity in quantities.items() if quantity > 0}
+            by_id = {item.pk: item for item in items}
+            unknown = set(quantities) - set(by_id)
+            if unknown:
+                raise ValidationError(
+                    f"Items not on this purchase order: {', '.join(map(str, sorted(unknown)))}"
+                )
+            for pk, quantity in quantities.items():
+                outstanding = by_id[pk].quantity - by_id[pk].received_quantity
+                if not 0 < quantity <= outstanding:
+                    raise ValidationError(
+                        f"Quantity for item {pk} must be between 1 and {outstanding}"
+                    )
+            received = [(by_id[pk], quantity) for pk, quantity in quantities.items()]
+
+            # Inventory records, creating the missing ones in one insert
+            product_deltas = defaultdict(int)
+            for item, quantity in received:
+                product_deltas[item.product_id] += quantity
+            inventories = Inventory.objects.in_bulk(list(product_deltas), field_name='product_id')
+            missing = [product_id for product_id in product_deltas if product_id not in inventories]
+            if missing:
+                Inventory.objects.bulk_create(
+                    [Inventory(product_id=product_id, stock_level=0, low_stock_threshold=10)
+                     for product_id in missing],
+                    ignore_conflicts=True
+                )
+                inventories.update(Inventory.objects.in_bulk(missing, field_name='product_id'))
+
+            apply_stock_changes(Inventory, 'stock_level', {
+                inventories[product_id].pk: delta for product_id, delta in product_deltas.items()
+            })
+            record_stock_changes(product_deltas)
+            StockMovement.objects.bulk_create([
+                StockMovement(
+                    inventory=inventories[item.product_id],
+                    movement_type='in',
+                    quantity=quantity,
+                    reference=purchase_order.order_number,
+                    notes=f"Received from purchase order {purchase_order.order_number}",
+                    created_by=user
+                )
+                for item, quantity in received
+            ])
+
+            for item, quantity in received:
+                item.received_quantity += quantity
+            PurchaseOrderItem.objects.bulk_update([item for item, _ in received], ['received_quantity'])
+            if all(item.received_quantity >= item.quantity for item in items):
+                purchase_order.status = 'received'
+                purchase_order.save(update_fields=['status', 'updated_at'])
+
+        return sum(product_deltas.values())
+
+    @staticmethod
+    def _change(inventory, field, delta):
+        """
+        Add delta to a stock column with a conditional UPDATE.
+        Returns False, changing nothing, if it would go negative.
+        Stock level changes are folded into the valuation snapshots.
+        """
+        if not delta:
+            return True
+        level = apply_stock_changes(Inventory, field, {inventory.pk: delta})[inventory.pk]
+        if level is None:
+            return False
+        setattr(inventory, field, level)
+        if field == 'stock_level':
+            record_stock_change(inventory.product_id, delta)
+        return True
+
+    @staticmethod
+    def _locked_stock_level(inventory):
+        """Current stock level, locked until the end of the transaction"""
+        return Inventory.objects.select_for_update().values_list(
+            'stock_level', flat=True
+        ).get(pk=inventory.pk)
+
+    @staticmethod
+    def _decrement_to_zero(inventory, field, quantity):
+        """Subtract quantity from a stock column, stopping at zero"""
+        Inventory.objects.filter(pk=inventory.pk).update(
+            **{field: Greatest(F(field) - quantity, 0)}, last_updated=timezone.now()
+        )
+        inventory.refresh_from_db(fields=[field, 'last_updated'])
+
     @staticmethod
     def get_low_stock_items(threshold=None):
         """
-        Get all inventory items that are low on stock
+        Get all inventory items that are low on stock, as a queryset
+        annotated with `available` and `threshold`
         """
-        low_stock_items = []
-        inventory_items = Inventory.objects.select_related('product').all()
-        
-        for item in inventory_items:
-            available_stock = item.available_stock()
-            low_threshold = threshold or item.low_stock_threshold
-            
-            if available_stock <= low_threshold:
-                low_stock_items.append({
-                    'inventory': item,
-                    'available_stock': available_stock,
-                    'threshold': low_threshold
-                })
-        
-        return low_stock_items
+        return Inventory.objects.low_stock(threshold).select_related('product')
     
     @staticmethod
     def generate_order_number():
         """
         Generate a unique purchase order number
         """
-        today = timezone.now().strftime('%Y%m%d')
-        last_order = PurchaseOrder.objects.filter(
-            order_number__startswith=f"PO-{today}"
-        ).order_by('order_number').last()
-        
-        if last_order:
-            last_number = int(last_order.order_number.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-        
-        return f"PO-{today}-{new_number:04d}"
+        return next_purchase_order_number()
 
 
 class StockValidator:
@@ -172,19 +258,15 @@ class InventoryReports:
         """
         Get summary of inventory status
         """
-        total_items = Inventory.objects.count()
-        low_stock_items = len(InventoryUtils.get_low_stock_items())
-        out_of_stock_items = Inventory.objects.filter(stock_level=0).count()
-        
-        total_value = sum(
-            inventory.product.price * inventory.stock_level 
-            for inventory in Inventory.objects.select_related('product').all()
-            if hasattr(inventory.product, 'price')
+        # One aggregate query instead of loading the table into Python
+        summary = Inventory.objects.aggregate(
+            total_items=Count('id'),
+            low_stock_items=Count('id', filter=LOW_STOCK),
+            out_of_stock_items=Count('id', filter=Q(stock_level=0)),
+            total_value=Coalesce(
+                Sum(F('product__price') * F('stock_level')), Decimal('0'),
+                output_field=DecimalField(max_digits=14, decimal_places=2)
+            ),
         )
-        
-        return {
-            'total_items': total_items,
-            'low_stock_items': low_stock_items,
-            'out_of_stock_items': out_of_stock_items,
-            'total_value': total_value
-        }
\ No newline at end of file
+        summary['total_value'] = quantize_money(summary['total_value'])
+        return summary
@@ -2,14 +2,18 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from django.db import transaction
+from rest_framework.settings import api_settings
 from django.core.exceptions import ValidationError
+from django.utils.dateparse import parse_date
+from ecommerce_api.pagination import CreatedAtKeysetPagination, KeysetPagination
+from .exports import StockMovementExport
 from .models import Supplier, Inventory, StockMovement, PurchaseOrder, PurchaseOrderItem, StockAdjustment
 from .serializers import (
     SupplierSerializer, InventorySerializer, StockMovementSerializer,
     PurchaseOrderSerializer, PurchaseOrderItemSerializer, StockAdjustmentSerializer
 )
 from .permissions import IsInventoryManager, IsOwnerOrInventoryManager
+from .snapshots import valuation_as_of
 from .utils import InventoryUtils, StockValidator, InventoryReports
 
 class SupplierViewSet(viewsets.ModelViewSet):
@@ -54,6 +58,12 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = StockMovement.objects.select_related('inventory__product', 'created_by').all()
     serializer_class = StockMovementSerializer
     permission_classes = [IsAuthenticated, IsInventoryManager]
+    pagination_class = CreatedAtKeysetPagination
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream all matching movements as CSV or NDJSON; see ecommerce_api/exports.py"""
+        return StockMovementExport().response(request)
 
 class PurchaseOrderViewSet(viewsets.ModelViewSet):
     queryset = PurchaseOrder.objects.select_related('supplier', 'created_by').prefetch_related('items__product').all()
@@ -71,36 +81,33 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         if purchase_order.status != 'ordered':
             return Response({'error': 'Only ordered purchase orders can be received'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Optional partial receipt: {"items": [{"id": <item id>, "quantity": <n>}, ...]}
+        items = request.data.get('items')
         try:
-            with transaction.atomic():
-                for item in purchase_order.items.all():
-                    # Get or create inventory
-                    inventory, created = Inventory.objects.get_or_create(
-                        product=item.product,
-                        defaults={'stock_level': 0, 'low_stock_threshold': 10}
-                    )
-                    
-                    # Update stock
-                    InventoryUtils.update_stock_level(
-                        inventory=inventory,
-                        quantity=item.quantity,
-                        movement_type='in',
-                        reference=purchase_order.order_number,
-                        notes=f"Received from purchase order {purchase_order.order_number}",
-                        user=request.user
-                    )
-                    
-                    # Update received quantity
-                    item.received_quantity = item.quantity
-                    item.save()
-
-                # Update purchase order status
-                purchase_order.status = 'received'
-                purchase_order.save()
-
-            return Response({'message': 'Stock received successfully'})
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            quantities = None
+            if items is not None:
+                quantities = {}
+                for entry in items:
+                    item_id = int(entry['id'])
+                    quantities[item_id] = quantities.get(item_id, 0) + int(entry['quantity'])
+        except (KeyError, TypeError, ValueError):
+            return Response(
+                {'error': 'items must be a list of {"id": ..., "quantity": ...}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            received = InventoryUtils.receive_purchase_order(
+                purchase_order, quantities=quantities, user=request.user
+            )
+        except ValidationError as e:
+            return Response({'error': ' '.join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'message': 'Stock received successfully',
+            'received_quantity': received,
+            'status': purchase_order.status,
+        })
 
     @action(detail=False, methods=['get'], permission_classes=[IsInventoryManager])
     def low_stock_report(self, request):
@@ -108,24 +115,43 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         Get report of low stock items
         """
         threshold = request.GET.get('threshold')
-        low_stock_items = InventoryUtils.get_low_stock_items(
-            threshold=int(threshold) if threshold else None
+        try:
+            threshold = int(threshold) if threshold else None
+        except ValueError:
+            return Response({'error': 'threshold must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        low_stock_items = InventoryUtils.get_low_stock_items(threshold=threshold).only(
+            'id', 'stock_level', 'reserved_stock', 'low_stock_threshold', 'product__name'
         )
-        
+
+        # Keyset pages walk the low-stock index by id; no COUNT(*), no OFFSET
+        paginator = KeysetPagination(
+            field='id', page_size=api_settings.PAGE_SIZE, descending=False
+        )
+        page = paginator.paginate_queryset(low_stock_items, request, view=self)
         data = [{
-            'product': item['inventory'].product.name,
-            'available_stock': item['available_stock'],
-            'threshold': item['threshold'],
-            'is_critical': item['available_stock'] == 0
-        } for item in low_stock_items]
+            'product': item.product.name,
+            'available_stock': item.available,
+            'threshold': item.threshold,
+            'is_critical': item.available == 0
+        } for item in page]
         
-        return Response(data)
+        return paginator.get_paginated_response(data)
 
     @action(detail=False, methods=['get'], permission_classes=[IsInventoryManager])
     def inventory_summary(self, request):
         """
-        Get inventory summary report
+        Get inventory summary report, or with ?as_of=YYYY-MM-DD the
+        inventory value per category at the end of that day
         """
+        as_of = request.GET.get('as_of')
+        if as_of:
+            try:
+                date = parse_date(as_of)
+            except ValueError:
+                date = None
+            if date is None:
+                return Response({'error': 'as_of must be a date (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(valuation_as_of(date))
         summary = InventoryReports.get_inventory_summary()
         return Response(summary)
 
@@ -0,0 +1,24 @@
+# orders/exports.py
+from ecommerce_api.exports import Export
+from .filters import OrderFilter
+from .models import Order
+
+
+class OrderExport(Export):
+    name = 'orders'
+    model = Order
+    filterset_class = OrderFilter
+    columns = [
+        ('id', 'id'),
+        ('order_number', 'order_number'),
+        ('email', 'email'),
+        ('status', 'status'),
+        ('payment_status', 'payment_status'),
+        ('subtotal', 'subtotal'),
+        ('tax_amount', 'tax_amount'),
+        ('shipping_cost', 'shipping_cost'),
+        ('discount_amount', 'discount_amount'),
+        ('total', 'total'),
+        ('created_at', 'created_at'),
+        ('paid_at', 'paid_at'),
+    ]
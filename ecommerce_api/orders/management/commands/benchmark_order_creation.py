@@ -0,0 +1,117 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from orders.models import Order, OrderItem
+from orders.serializers import OrderCreateSerializer, OrderItemSerializer
+from products.models import Product
+
+
+class LegacyOrderCreateSerializer(OrderCreateSerializer):
+    """The per-item creation path the bulk serializer replaced"""
+    items = OrderItemSerializer(many=True)
+
+    def validate_items(self, items):
+        return items
+
+    def create(self, validated_data):
+        items_data = validated_data.pop('items')
+        order = Order.objects.create(
+            subtotal=Decimal('0.00'),
+            tax_amount=Decimal('0.00'),
+            shipping_cost=Decimal('0.00'),
+            discount_amount=Decimal('0.00'),
+            total=Decimal('0.00'),
+            **validated_data
+        )
+        for item_data in items_data:
+            OrderItem.objects.create(order=order, **item_data)
+
+        order.calculate_totals()
+        order.save()
+        return order
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare query count and latency of the per-item and bulk order creation paths. '
+        'Everything runs in a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1, 10, 100],
+            help='Number of items per order',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Number of orders created per size and path',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email='order-benchmark@example.com', password=None
+            )
+            products = Product.objects.bulk_create([
+                Product(
+                    name=f'Benchmark product {i}',
+                    slug=f'order-benchmark-{i}',
+                    description='Benchmark product',
+                    price=Decimal('9.99'),
+                    sku=f'ORDER-BENCH-{i}',
+                    quantity=1000000,
+                    status='ACTIVE',
+                )
+                for i in range(max(options['sizes']))
+            ])
+
+            for size in options['sizes']:
+                payload = self._payload(user, products[:size])
+                self.stdout.write(self.style.SUCCESS(f'{size} items'))
+                for label, serializer_class in (
+                    ('per-item', LegacyOrderCreateSerializer),
+                    ('bulk', OrderCreateSerializer),
+                ):
+                    queries, mean, p95 = self._run(
+                        serializer_class, payload, user, options['repeat']
+                    )
+                    self.stdout.write(
+                        f'  {label:9} {queries:5} queries  mean {mean:8.2f} ms  p95 {p95:8.2f} ms'
+                    )
+            transaction.set_rollback(True)
+
+    def _payload(self, user, products):
+        return {
+            'shipping_address': '1 Benchmark Way',
+            'shipping_city': 'City',
+            'shipping_state': 'State',
+            'shipping_zip_code': '12345',
+            'shipping_country': 'Country',
+            'email': user.email,
+            'items': [{'product': product.pk, 'quantity': 1} for product in products],
+        }
+
+    def _run(self, serializer_class, payload, user, repeat):
+        timings = []
+        for _ in range(repeat):
+            # The query log is capped; start each order from an empty one
+            connection.queries_log.clear()
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as context:
+                serializer = serializer_class(data=payload)
+                serializer.is_valid(raise_exception=True)
+                serializer.save(user=user)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return len(context), statistics.mean(timings), timings[max(int(len(timings) * 0.95) - 1, 0)]
@@ -0,0 +1,118 @@
+import queue
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.utils import timezone
+
+from orders.models import Order
+from orders.numbering import next_order_number
+
+
+def legacy_random_number():
+    """The timestamp + random digits Order.save used to generate"""
+    return f"{timezone.now():%y%m%d%H%M%S}{random.randint(1000, 9999)}"
+
+
+def legacy_next_number():
+    """The read-the-last-number-and-add-one scheme purchase orders used to use"""
+    prefix = f"BM-{timezone.now():%Y%m%d}-"
+    last = Order.objects.filter(
+        order_number__startswith=prefix
+    ).order_by('order_number').values_list('order_number', flat=True).last()
+    return f"{prefix}{int(last.split('-')[-1]) + 1 if last else 1:04d}"
+
+
+class Command(BaseCommand):
+    help = (
+        'Insert orders from concurrent threads with the old order number generators and '
+        'with the sequence-backed allocator, then report retries and throughput. '
+        'The synthetic orders and user are deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=2000,
+            help='Number of orders inserted per generator',
+        )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.create_user(
+            email='order-number-benchmark@example.com', password=None
+        )
+        try:
+            for label, generate in (('timestamp + random', legacy_random_number),
+                                    ('last number + 1', legacy_next_number),
+                                    ('allocated', next_order_number)):
+                self._run(label, generate, user, options)
+                Order.objects.filter(user=user).delete()
+        finally:
+            user.delete()
+
+    def _run(self, label, generate, user, options):
+        work = queue.Queue()
+        for _ in range(options['orders']):
+            work.put(None)
+        results = {'retries': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        zero = Decimal('0.00')
+
+        def insert():
+            order = Order(
+                user=user, order_number=generate(), email=user.email,
+                shipping_address='-', shipping_city='-', shipping_state='-',
+                shipping_zip_code='-', shipping_country='-',
+                subtotal=zero, tax_amount=zero, shipping_cost=zero, total=zero,
+            )
+            # Skip the totals signal; the insert is what's measured
+            order._totals_calculated = True
+            with transaction.atomic():
+                order.save()
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        work.get_nowait()
+                    except queue.Empty:
+                        return
+                    while True:
+                        try:
+                            insert()
+                            break
+                        except IntegrityError as e:
+                            if 'order_number' not in str(e):
+                                raise
+                            # Duplicate order number: draw another one
+                            with lock:
+                                results['retries'] += 1
+                        except OperationalError:
+                            # e.g. SQLite giving up on a locked database
+                            with lock:
+                                results['errors'] += 1
+                            break
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        inserted = Order.objects.filter(user=user).count()
+        self.stdout.write(self.style.SUCCESS(label))
+        self.stdout.write(f'  orders inserted: {inserted:8} of {options["orders"]}')
+        self.stdout.write(f'  retries:         {results["retries"]:8}')
+        self.stdout.write(f'  failed inserts:  {results["errors"]:8}')
+        self.stdout.write(f'  throughput:      {inserted / elapsed:8.1f} orders/s')
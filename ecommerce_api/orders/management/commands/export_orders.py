@@ -0,0 +1,7 @@
+from ecommerce_api.exports import ExportCommand
+from orders.exports import OrderExport
+
+
+class Command(ExportCommand):
+    help = 'Stream orders as CSV or NDJSON, with the export endpoint filters'
+    export_class = OrderExport
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-17 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_coupon_orderitem_discount_amount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'id'], name='orders_orde_created_0fb29d_idx'),
+        ),
+    ]
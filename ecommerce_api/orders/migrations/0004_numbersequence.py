@@ -0,0 +1,38 @@
+# Generated by Django 4.2.13 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+# orders.numbering.sequence_name() for each counter
+SEQUENCES = ('orders_number_order_seq', 'orders_number_purchase_order_seq')
+
+
+def create_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SEQUENCES:
+        schema_editor.execute(f'CREATE SEQUENCE IF NOT EXISTS {schema_editor.quote_name(name)}')
+
+
+def drop_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SEQUENCES:
+        schema_editor.execute(f'DROP SEQUENCE IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_orders_orde_created_0fb29d_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(create_sequences, drop_sequences),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.13 on 2026-10-17 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_numbersequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='copurchases_counted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('copurchases_counted', False), ('payment_status', 'PAID')), fields=['id'], name='order_copurchases_pending_idx'),
+        ),
+    ]
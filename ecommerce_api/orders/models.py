@@ -2,12 +2,29 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
-from django.utils import timezone
-from products.models import Product
+from products.models import Product, ProductActivity
+from products.stock import change_product_stock
+from ecommerce_api.activity import record_activity
+from collections import Counter
 from decimal import Decimal
+import logging
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+logger = logging.getLogger(__name__)
+
+
+class NumberSequence(models.Model):
+    """
+    Counter behind the order and purchase order numbers on databases
+    without native sequences; see orders.numbering.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
 
 class Order(models.Model):
     ORDER_STATUS_CHOICES = [
@@ -86,6 +103,8 @@ class Order(models.Model):
     discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     coupon = models.ForeignKey('promotions.Coupon', on_delete=models.SET_NULL, null=True, blank=True)
 
+    # Set once the order's items are in the co-purchase counts (products/copurchases.py)
+    copurchases_counted = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['-created_at']
@@ -94,6 +113,11 @@ class Order(models.Model):
             models.Index(fields=['user', 'created_at']),
             models.Index(fields=['status', 'created_at']),
             models.Index(fields=['payment_status', 'created_at']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(
+                fields=['id'], condition=models.Q(payment_status='PAID', copurchases_counted=False),
+                name='order_copurchases_pending_idx'
+            ),
         ]
 
     def __str__(self):
@@ -101,36 +125,8 @@ class Order(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.order_number:
-            # Generate order number: YYMMDDHHMMSS + random 4 digits
-            timestamp = timezone.now().strftime('%y%m%d%H%M%S')
-            import random
-            random_digits = str(random.randint(1000, 9999))
-            self.order_number = f"{timestamp}{random_digits}"
-        
-        # Set billing address to shipping address if not provided
-        if not self.billing_address:
-            self.billing_address = self.shipping_address
-            self.billing_city = self.shipping_city
-            self.billing_state = self.shipping_state
-            self.billing_zip_code = self.shipping_zip_code
-            self.billing_country = self.shipping_country
-            
-        super().save(*args, **kwargs)
-
-    def update_stock(self):
-        """Update product stock quantities when order status changes"""
-        if self.status in ['SHIPPED', 'DELIVERED']:
-            for item in self.items.all():
-                item.product.reduce_stock(item.quantity)
-
-        
-    def save(self, *args, **kwargs):
-        if not self.order_number:
-            # Generate order number
-            timestamp = timezone.now().strftime('%y%m%d%H%M%S')
-            import random
-            random_digits = str(random.randint(1000, 9999))
-            self.order_number = f"{timestamp}{random_digits}"
+            from .numbering import next_order_number
+            self.order_number = next_order_number()
         
         # Set billing address to shipping address if not provided
         if not self.billing_address:
@@ -154,32 +150,40 @@ class Order(models.Model):
 
     def update_stock(self):
         """Update product stock quantities when order status changes to shipped/delivered"""
-        for item in self.items.all():
-            try:
-                # Use the reduce_stock method from Product model
-                item.product.reduce_stock(item.quantity)
-                
-                # Also create an activity log for the stock change
-                from products.models import ProductActivity
-                ProductActivity.objects.create(
-                    product=item.product,
-                    user=None,  # System action
-                    action='stock_update',
-                    details={
-                        'order_number': self.order_number,
-                        'quantity_change': -item.quantity,
-                        'previous_stock': item.product.quantity + item.quantity,
-                        'new_stock': item.product.quantity
-                    }
+        quantities = Counter()
+        for product_id, quantity in self.items.values_list('product_id', 'quantity'):
+            quantities[product_id] += quantity
+
+        # One conditional UPDATE for every line of the order
+        levels = change_product_stock({pk: -quantity for pk, quantity in quantities.items()})
+
+        activities = []
+        for product_id, level in levels.items():
+            if level is None:
+                logger.warning(
+                    'Insufficient stock for product %s on order %s', product_id, self.order_number
                 )
-            except Exception as e:
-                # Log error but don't break the process
-                print(f"Error updating stock for product {item.product.id}: {e}")
+                continue
+            activities.append(ProductActivity(
+                product_id=product_id,
+                user=None,  # System action
+                action='stock_update',
+                details={
+                    'order_number': self.order_number,
+                    'quantity_change': -quantities[product_id],
+                    'previous_stock': level + quantities[product_id],
+                    'new_stock': level
+                }
+            ))
+        record_activity(*activities)
+        return levels
 
     def calculate_totals(self):
         """Calculate order totals based on items"""
-        subtotal = sum(item.total_price for item in self.items.all())
-        
+        self.apply_totals(sum(item.total_price for item in self.items.all()))
+
+    def apply_totals(self, subtotal):
+        """Derive tax, shipping and total from an already known subtotal"""
         # Calculate tax (simplified - you might want a more complex tax calculation)
         self.tax_amount = subtotal * Decimal('0.08')  # 8% tax
         
@@ -357,25 +361,3 @@ class Shipping(models.Model):
 
     def __str__(self):
         return f"Shipping for Order #{self.order.order_number}"
-    
-def calculate_totals(self):
-    """Calculate order totals based on items"""
-    subtotal = sum(item.total_price for item in self.items.all())
-    
-    # Calculate tax (simplified - you might want a more complex tax calculation)
-    self.tax_amount = subtotal * Decimal('0.08')  # 8% tax
-    
-    # Calculate shipping (simplified)
-    self.shipping_cost = Decimal('10.00')  # Flat rate shipping
-    
-    # Apply discounts if any
-    self.total = subtotal + self.tax_amount + self.shipping_cost - self.discount_amount
-    self.subtotal = subtotal
-
-def reduce_stock(self, quantity):
-    """Reduce product stock - add this to your Product model"""
-    if self.quantity >= quantity:
-        self.quantity -= quantity
-        self.save()
-        return True
-    return False
\ No newline at end of file
@@ -0,0 +1,89 @@
+# orders/numbering.py
+"""
+Order and purchase order numbers.
+
+Numbers come from a per-name counter, so two orders can never be handed
+the same one and no insert has to be retried:
+
+* On PostgreSQL each name is backed by a native sequence. nextval() never
+  blocks and is not rolled back, so every process draws a block of
+  NUMBER_BLOCK_SIZE values in one round trip and hands them out from
+  memory; a process that dies just leaves a gap.
+* Elsewhere a NumberSequence row is advanced with an UPDATE inside the
+  caller's transaction. The row lock serialises allocations and a rollback
+  gives the numbers back, so nothing is cached in memory.
+
+The counters are global rather than per day; the date in the formatted
+number is only for people reading it.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import NumberSequence
+
+ORDER = 'order'
+PURCHASE_ORDER = 'purchase_order'
+SEQUENCES = (ORDER, PURCHASE_ORDER)
+
+_lock = threading.Lock()
+_blocks = {}
+_pid = None
+
+
+def sequence_name(name):
+    """Name of the PostgreSQL sequence behind a counter"""
+    return f'orders_number_{name}_seq'
+
+
+def block_size():
+    return getattr(settings, 'NUMBER_BLOCK_SIZE', 50)
+
+
+def _draw_block(connection, name, size):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(%s) FROM generate_series(1, %s)', [sequence_name(name), size]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _advance_counter(using, name, count):
+    with transaction.atomic(using=using):
+        sequences = NumberSequence.objects.using(using)
+        sequences.bulk_create([NumberSequence(name=name)], ignore_conflicts=True)
+        sequences.filter(name=name).update(next_value=F('next_value') + count)
+        end = sequences.values_list('next_value', flat=True).get(name=name)
+    return list(range(end - count, end))
+
+
+def allocate(name, count=1):
+    """Reserve `count` unique numbers from the counter `name`"""
+    global _pid
+    using = router.db_for_write(NumberSequence)
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return _advance_counter(using, name, count)
+
+    with _lock:
+        if _pid != os.getpid():
+            # Blocks drawn before a fork would be handed out twice
+            _blocks.clear()
+            _pid = os.getpid()
+        block = _blocks.setdefault(name, [])
+        if len(block) < count:
+            block.extend(_draw_block(connection, name, max(block_size(), count - len(block))))
+        numbers, block[:count] = block[:count], []
+    return numbers
+
+
+def next_order_number():
+    return f"{timezone.now():%y%m%d}{allocate(ORDER)[0]:08d}"
+
+
+def next_purchase_order_number():
+    return f"PO-{timezone.now():%Y%m%d}-{allocate(PURCHASE_ORDER)[0]:06d}"
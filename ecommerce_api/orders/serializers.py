@@ -1,6 +1,11 @@
 # orders/serializers.py
+from collections import Counter
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Order, OrderItem, Payment, Shipping
+from inventory.reservations import hold_for_order
+from products.models import Product
 from products.serializers import ProductSerializer
 from decimal import Decimal
 
@@ -44,8 +49,16 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
 
 
+class OrderItemCreateSerializer(OrderItemSerializer):
+    """
+    Order line input. The product is taken as a plain id here; the parent
+    serializer resolves all of them with a single query.
+    """
+    product = serializers.IntegerField(source='product_id', min_value=1)
+
+
 class OrderCreateSerializer(serializers.ModelSerializer):
-    items = OrderItemSerializer(many=True)
+    items = OrderItemCreateSerializer(many=True)
 
     class Meta:
         model = Order
@@ -56,28 +69,65 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             'billing_country', 'email', 'phone', 'customer_notes', 'items'
         ]
 
-    from decimal import Decimal
+    def validate_items(self, items):
+        product_ids = {item['product_id'] for item in items}
+        products = Product.objects.for_serialization().in_bulk(product_ids)
+
+        errors = []
+        for item in items:
+            if item['product_id'] in products:
+                errors.append({})
+            else:
+                errors.append({'product': [
+                    f'Invalid pk "{item["product_id"]}" - object does not exist.'
+                ]})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        for item in items:
+            item['product'] = products[item.pop('product_id')]
+        return items
 
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        # Provide default zeros for required calculated fields
-        order = Order.objects.create(
-            subtotal=Decimal('0.00'),
-            tax_amount=Decimal('0.00'),
-            shipping_cost=Decimal('0.00'),
-            discount_amount=Decimal('0.00'),
-            total=Decimal('0.00'),
-            **validated_data
-        )
-        for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
-
-        order.calculate_totals()  # implement this method to sum items and update order
-        order.save()
-
-        return order
-
-    
+
+        with transaction.atomic():
+            order = Order(**validated_data)
+            # Snapshot name, sku and price at the time of purchase
+            items = [
+                OrderItem(
+                    order=order,
+                    product=item_data['product'],
+                    quantity=item_data['quantity'],
+                    price=item_data['product'].price,
+                    product_name=item_data['product'].name,
+                    product_sku=item_data['product'].sku,
+                )
+                for item_data in items_data
+            ]
+            order.apply_totals(sum((item.total_price for item in items), Decimal('0.00')))
+            order._totals_calculated = True
+            order.save()
+            # bulk_create skips OrderItem.save() and its signals, which would
+            # otherwise recalculate and save the order once per item
+            OrderItem.objects.bulk_create(items)
+
+            quantities = Counter()
+            for item in items:
+                quantities[item.product_id] += item.quantity
+            held = hold_for_order(order, quantities)
+            unavailable = [product_id for product_id, granted in held.items() if not granted]
+            if unavailable:
+                # Rolls back the order as well
+                raise serializers.ValidationError({'items': [
+                    f'Insufficient stock for product {product_id}.' for product_id in unavailable
+                ]})
+
+        # The response renders every item with its product
+        return Order.objects.prefetch_related(
+            Prefetch('items__product', queryset=Product.objects.for_serialization())
+        ).get(pk=order.pk)
+
 
 class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -6,7 +6,8 @@ from .models import Order, OrderItem
 @receiver(post_save, sender=Order)
 def update_order_totals(sender, instance, created, **kwargs):
     """Update order totals when order is saved"""
-    if created:
+    # Bulk creation computes the totals before the first save
+    if created and not getattr(instance, '_totals_calculated', False):
         instance.calculate_totals()
         instance.save()
 
@@ -0,0 +1,66 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.utils import InventoryUtils
+from orders import numbering
+from orders.models import NumberSequence, Order
+
+User = get_user_model()
+
+
+class NumberingTest(TestCase):
+    def create_order(self, user):
+        return Order.objects.create(
+            user=user, email=user.email, shipping_address='1 Street', shipping_city='City',
+            shipping_state='State', shipping_zip_code='12345', shipping_country='Country',
+            subtotal=Decimal('0.00'), tax_amount=Decimal('0.00'),
+            shipping_cost=Decimal('0.00'), total=Decimal('0.00')
+        )
+
+    def test_order_numbers_are_sequential(self):
+        user = User.objects.create_user(email='user@test.com', password='pass')
+        numbers = [self.create_order(user).order_number for _ in range(3)]
+        today = f'{timezone.now():%y%m%d}'
+        # PostgreSQL sequences are not reset between tests, so only the steps are known
+        first = int(numbers[0][len(today):])
+        self.assertEqual(numbers, [f'{today}{number:08d}' for number in range(first, first + 3)])
+        self.assertRegex(
+            InventoryUtils.generate_order_number(), rf'^PO-{timezone.now():%Y%m%d}-\d{{6}}$'
+        )
+
+    @mock.patch.object(connection, 'vendor', 'sqlite')
+    def test_allocate_ranges_and_rollback(self):
+        self.assertEqual(numbering.allocate('test', 3), [1, 2, 3])
+        try:
+            with transaction.atomic():
+                numbering.allocate('test', 5)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        # Without a native sequence a rollback gives the numbers back
+        self.assertEqual(numbering.allocate('test'), [4])
+        self.assertEqual(NumberSequence.objects.get(name='test').next_value, 5)
+
+    def test_sequence_blocks_are_served_from_memory(self):
+        drawn = []
+
+        def draw_block(connection, name, size):
+            start = len(drawn) + 1
+            drawn.extend(range(start, start + size))
+            return list(range(start, start + size))
+
+        with mock.patch.object(connection, 'vendor', 'postgresql'), \
+                mock.patch.object(numbering, '_draw_block', side_effect=draw_block) as draw, \
+                mock.patch.dict(numbering._blocks, clear=True), \
+                self.settings(NUMBER_BLOCK_SIZE=4):
+            self.assertEqual(numbering.allocate('test', 3), [1, 2, 3])
+            self.assertEqual(numbering.allocate('test', 2), [4, 5])
+            self.assertEqual(draw.call_count, 2)
+            # A forked worker never reuses its parent's block
+            with mock.patch('os.getpid', return_value=-1):
+                self.assertEqual(numbering.allocate('test'), [9])
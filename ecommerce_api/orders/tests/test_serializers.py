@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from decimal import Decimal, ROUND_HALF_UP
 from orders.serializers import (
     OrderSerializer, OrderCreateSerializer,
@@ -110,3 +112,64 @@ class OrderSerializerTests(TestCase):
         data = serializer.data
         self.assertEqual(data['shipping_method'], "STANDARD")
         self.assertEqual(data['carrier'], "CarrierX")
+
+
+class OrderCreateSerializerBulkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="buyer@example.com", password="testpass")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}", slug=f"product-{i}", description="desc",
+                price=Decimal("10.00") + i, sku=f"BULK{i}", quantity=100, status="ACTIVE"
+            )
+            for i in range(5)
+        ]
+
+    def payload(self, items):
+        return {
+            "shipping_address": "1 Main St", "shipping_city": "City",
+            "shipping_state": "State", "shipping_zip_code": "12345",
+            "shipping_country": "Country", "email": self.user.email,
+            "items": items,
+        }
+
+    def create(self, items):
+        serializer = OrderCreateSerializer(data=self.payload(items))
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer, serializer.save(user=self.user)
+
+    def test_snapshots_items_and_totals(self):
+        _, order = self.create([
+            {"product": self.products[0].id, "quantity": 2},
+            {"product": self.products[1].id, "quantity": 1},
+        ])
+        order.refresh_from_db()
+        items = list(order.items.order_by('product_id'))
+        self.assertEqual([item.product_sku for item in items], ["BULK0", "BULK1"])
+        self.assertEqual(items[0].product_name, "Product 0")
+        self.assertEqual(items[0].price, Decimal("10.00"))
+        self.assertEqual(order.subtotal, Decimal("31.00"))
+        self.assertEqual(order.tax_amount, Decimal("2.48"))
+        self.assertEqual(order.shipping_cost, Decimal("10.00"))
+        self.assertEqual(order.total, Decimal("43.48"))
+
+    def test_query_count_does_not_grow_with_items(self):
+        def queries_for(count):
+            items = [{"product": product.id, "quantity": 1} for product in self.products[:count]]
+            with CaptureQueriesContext(connection) as context:
+                serializer, _ = self.create(items)
+                self.assertEqual(len(serializer.data['items']), count)
+            return len(context)
+
+        # The first order may draw a block of order numbers on PostgreSQL
+        queries_for(1)
+        self.assertEqual(queries_for(1), queries_for(5))
+
+    def test_unknown_product(self):
+        serializer = OrderCreateSerializer(data=self.payload([
+            {"product": self.products[0].id, "quantity": 1},
+            {"product": 999999, "quantity": 1},
+        ]))
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['items'][0], {})
+        self.assertIn('product', serializer.errors['items'][1])
@@ -3,6 +3,10 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.db.models import Prefetch
+from ecommerce_api.pagination import CreatedAtKeysetPagination
+from products.models import Product
+from .exports import OrderExport
 from .models import Order, OrderItem, Payment, Shipping
 from .serializers import (
     OrderSerializer, OrderCreateSerializer, 
@@ -13,12 +17,16 @@ from .permissions import IsOrderOwner, IsStaffOrOrderOwner
 class OrderViewSet(viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated, IsStaffOrOrderOwner]
+    pagination_class = CreatedAtKeysetPagination
     
     def get_queryset(self):
         user = self.request.user
+        queryset = Order.objects.select_related('user').prefetch_related(
+            Prefetch('items__product', queryset=Product.objects.for_serialization())
+        )
         if user.is_staff:
-            return Order.objects.all()
-        return Order.objects.filter(user=user)
+            return queryset
+        return queryset.filter(user=user)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -40,6 +48,11 @@ class OrderViewSet(viewsets.ModelViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def export(self, request):
+        """Stream all matching orders as CSV or NDJSON; see ecommerce_api/exports.py"""
+        return OrderExport().response(request)
+
     @action(detail=True, methods=['get'])
     def items(self, request, pk=None):
         order = self.get_object()
@@ -1,9 +1,15 @@
 # products/admin.py
 from django.contrib import admin
-from .models import Product, Category, Brand, ProductImage, ProductReview, ProductActivity, Wishlist
+from django.db import transaction
+from .models import (
+    Product, Category, Brand, ProductImage, ProductReview, ProductActivity, ProductActivityDaily, Wishlist,
+    ProductRatingSummary
+)
 from django.utils.html import format_html
 from django.template.response import TemplateResponse
 from django.urls import path
+from ecommerce_api.counters import invalidate_counters
+from ecommerce_api.response_cache import invalidate_response_cache, product_group
 
 
 @admin.register(ProductImage)
@@ -118,21 +124,60 @@ class ProductReviewAdmin(admin.ModelAdmin):
     actions = ['approve_reviews', 'disapprove_reviews']
     
     def approve_reviews(self, request, queryset):
-        queryset.update(is_approved=True)
+        # queryset.update() skips signals, so keep rating summaries in sync here
+        with transaction.atomic():
+            pending = queryset.filter(is_approved=False)
+            product_ids = set(pending.values_list('product_id', flat=True))
+            ProductRatingSummary.objects.apply_review_changes(pending, 1)
+            pending.update(is_approved=True)
+            invalidate_counters()
+            invalidate_response_cache(*[product_group(pk) for pk in product_ids])
         self.message_user(request, "Selected reviews have been approved.")
     approve_reviews.short_description = "Approve selected reviews"
     
     def disapprove_reviews(self, request, queryset):
-        queryset.update(is_approved=False)
+        with transaction.atomic():
+            approved = queryset.filter(is_approved=True)
+            product_ids = set(approved.values_list('product_id', flat=True))
+            ProductRatingSummary.objects.apply_review_changes(approved, -1)
+            approved.update(is_approved=False)
+            invalidate_counters()
+            invalidate_response_cache(*[product_group(pk) for pk in product_ids])
         self.message_user(request, "Selected reviews have been disapproved.")
     disapprove_reviews.short_description = "Disapprove selected reviews"
 
+@admin.register(ProductRatingSummary)
+class ProductRatingSummaryAdmin(admin.ModelAdmin):
+    list_display = ['product', 'average_rating', 'review_count', 'rating_histogram']
+    search_fields = ['product__name']
+    list_select_related = ['product']
+    readonly_fields = [
+        'product', 'review_count', 'rating_sum', 'average_rating',
+        'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5'
+    ]
+
+    def rating_histogram(self, obj):
+        return " / ".join(str(count) for count in obj.histogram.values())
+    rating_histogram.short_description = 'Ratings 1-5'
+
 @admin.register(ProductActivity)
 class ProductActivityAdmin(admin.ModelAdmin):
     list_display = ['product', 'user', 'action', 'timestamp']
     list_filter = ['action', 'timestamp']
     search_fields = ['product__name', 'user__email']
     readonly_fields = ['product', 'user', 'action', 'ip_address', 'user_agent', 'details', 'timestamp']
+    list_select_related = ['product', 'user']
+    # COUNT(*) over the whole log on every page view is slow on a large table
+    show_full_result_count = False
+    date_hierarchy = 'timestamp'
+
+@admin.register(ProductActivityDaily)
+class ProductActivityDailyAdmin(admin.ModelAdmin):
+    list_display = ['product', 'date', 'views', 'purchases', 'wishlist_adds', 'reviews']
+    list_filter = ['date']
+    search_fields = ['product__name']
+    list_select_related = ['product']
+    date_hierarchy = 'date'
 
 @admin.register(Wishlist)
 class WishlistAdmin(admin.ModelAdmin):
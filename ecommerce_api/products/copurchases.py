@@ -0,0 +1,157 @@
+# products/copurchases.py
+"""
+"Frequently bought together" counts.
+
+update() walks the paid orders that are not counted yet (keyset batches of
+order ids, then their items) and accumulates a sparse co-occurrence matrix
+in memory as {product_id: Counter(other_id: orders)}. Whenever it holds
+`max_pairs` cells, and at the end, the matrix is merged into
+ProductCoPurchase and the orders it came from are marked counted in the
+transaction that claimed them, so memory stays bounded and every order is
+counted once, even when two runs overlap.
+
+Each product keeps its COPURCHASE_PAIRS_PER_PRODUCT strongest pairs. A
+pair that falls out of that list starts again from zero if it comes back,
+which only affects pairs far below the ones served.
+
+rebuild() forgets everything and recounts all paid orders.
+"""
+import heapq
+from collections import Counter, defaultdict
+from itertools import groupby, permutations
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from orders.models import Order, OrderItem
+from .models import Product, ProductCoPurchase
+
+# Orders with more lines than this say little about any one pair
+MAX_ORDER_ITEMS = 50
+# Ids per IN (...) list
+_CHUNK = 500
+# pg_advisory_xact_lock() key merges take turns on
+_MERGE_LOCK = 0x636f7075  # "copu"
+
+
+def pairs_per_product():
+    return getattr(settings, 'COPURCHASE_PAIRS_PER_PRODUCT', 100)
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), _CHUNK):
+        yield values[start:start + _CHUNK]
+
+
+def _merge(counts, order_ids, keep):
+    """
+    Add `counts` to the stored pairs and mark `order_ids` counted.
+    Concurrent merges take turns on a transaction-level advisory lock, so
+    they don't overwrite each other's counts, and product rows stay free
+    for checkouts and edits. SQLite serializes writers by itself.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [_MERGE_LOCK])
+        for product_ids in _chunks(sorted(counts)):
+            existing = defaultdict(dict)
+            for pk, product_id, other_id, count in ProductCoPurchase.objects.filter(
+                product_id__in=product_ids
+            ).values_list('pk', 'product_id', 'other_id', 'count'):
+                existing[product_id][other_id] = (pk, count)
+
+            rows, stale = [], []
+            for product_id in product_ids:
+                stored = existing[product_id]
+                merged = Counter({other_id: count for other_id, (_, count) in stored.items()})
+                merged.update(counts[product_id])
+                best = heapq.nsmallest(keep, merged.items(), key=lambda pair: (-pair[1], pair[0]))
+                kept = {other_id for other_id, _ in best}
+                stale.extend(pk for other_id, (pk, _) in stored.items() if other_id not in kept)
+                rows.extend(
+                    ProductCoPurchase(product_id=product_id, other_id=other_id, count=count)
+                    for other_id, count in best
+                    if stored.get(other_id, (None, None))[1] != count
+                )
+            ProductCoPurchase.objects.filter(pk__in=stale).delete()
+            ProductCoPurchase.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['product', 'other'],
+                update_fields=['count'],
+            )
+        for chunk in _chunks(order_ids):
+            Order.objects.filter(pk__in=chunk).update(copurchases_counted=True)
+
+
+def update(chunk_size=2000, max_pairs=200000, keep=None):
+    """
+    Fold the paid orders not counted yet into the pair counts. Returns the
+    number of orders counted.
+    """
+    keep = keep or pairs_per_product()
+    counted = 0
+    while True:
+        counts = defaultdict(Counter)
+        with transaction.atomic():
+            order_ids = _count_pending(counts, chunk_size, max_pairs)
+            if not order_ids:
+                return counted
+            _merge(counts, order_ids, keep)
+        counted += len(order_ids)
+
+
+def _count_pending(counts, chunk_size, max_pairs):
+    """
+    Claim pending paid orders until `counts` holds `max_pairs` cells and
+    add their baskets to it; returns the claimed order ids. Claimed orders
+    stay locked until the caller's transaction ends, and orders another
+    run has claimed are skipped, so no order is counted twice.
+    """
+    pending = Order.objects.filter(payment_status='PAID', copurchases_counted=False).order_by('pk')
+    cells = 0
+    order_ids = []
+    last_pk = 0
+    while cells < max_pairs:
+        batch = list(
+            pending.select_for_update(skip_locked=True).filter(pk__gt=last_pk)
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1]
+        items = OrderItem.objects.filter(order_id__in=batch).order_by('order_id').values_list(
+            'order_id', 'product_id'
+        )
+        for _, rows in groupby(items.iterator(chunk_size=chunk_size), key=itemgetter(0)):
+            basket = {product_id for _, product_id in rows}
+            if len(basket) > MAX_ORDER_ITEMS:
+                continue
+            for a, b in permutations(basket, 2):
+                if b not in counts[a]:
+                    cells += 1
+                counts[a][b] += 1
+        order_ids.extend(batch)
+    return order_ids
+
+
+def rebuild(chunk_size=2000, max_pairs=200000, keep=None):
+    """Recount every paid order from scratch"""
+    with transaction.atomic():
+        ProductCoPurchase.objects.all().delete()
+        Order.objects.filter(copurchases_counted=True).update(copurchases_counted=False)
+    return update(chunk_size=chunk_size, max_pairs=max_pairs, keep=keep)
+
+
+def bought_together(product_id, limit=10):
+    """The products most often bought with `product_id`, annotated with `copurchase_count`"""
+    return list(
+        Product.objects.filter(status='ACTIVE', bought_with__product_id=product_id)
+        .for_serialization()
+        .annotate(copurchase_count=F('bought_with__count'))
+        .order_by('-copurchase_count', 'pk')[:limit]
+    )
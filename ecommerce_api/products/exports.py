@@ -0,0 +1,24 @@
+# products/exports.py
+from ecommerce_api.exports import Export
+from .filters import ProductExportFilter
+from .models import Product
+
+
+class ProductExport(Export):
+    name = 'products'
+    model = Product
+    filterset_class = ProductExportFilter
+    columns = [
+        ('id', 'id'),
+        ('sku', 'sku'),
+        ('name', 'name'),
+        ('slug', 'slug'),
+        ('category', 'category__name'),
+        ('brand', 'brand__name'),
+        ('price', 'price'),
+        ('quantity', 'quantity'),
+        ('status', 'status'),
+        ('is_featured', 'is_featured'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]
@@ -13,5 +13,12 @@ class ProductFilter(django_filters.FilterSet):
 
     def filter_in_stock(self, queryset, name, value):
         if value:
-            return queryset.filter(stock_quantity__gt=0)
-        return queryset
\ No newline at end of file
+            return queryset.filter(quantity__gt=0)
+        return queryset
+
+
+class ProductExportFilter(ProductFilter):
+    """ProductFilter plus the product list's filterset_fields and status"""
+    class Meta:
+        model = Product
+        fields = ['category', 'min_price', 'max_price', 'in_stock', 'brand', 'is_featured', 'status']
\ No newline at end of file
@@ -0,0 +1,369 @@
+# products/imports.py
+"""
+Bulk product import from CSV or NDJSON, upserting on `sku`.
+
+Rows are read lazily and processed in chunks. Each chunk runs in its own
+transaction and takes a fixed number of queries whatever its size:
+
+- Cleaning uses the Product model fields themselves (to_python, choices,
+  max_length and decimal digits), plus the checks ProductSerializer makes.
+- One query loads the products whose sku already exists. Columns a row
+  leaves out keep their stored values.
+- Categories, brands and tags are resolved through in-memory name maps.
+  Names not seen before are loaded in one query, and the missing ones are
+  created.
+- Unique slugs for new and renamed products come from one query over the
+  taken slugs per SLUG_BATCH names. The `base`, `base-1`, ... scheme is
+  Product.save()'s. A slug another writer takes in the meantime fails the
+  chunk's insert, and the slugs are picked again.
+- One bulk_create(update_conflicts=True) on sku writes the chunk.
+
+bulk_create() sends no signals, so the importer does their work itself,
+per chunk: rating summaries, tags, the search index and cached cart
+summaries. It also expires the catalog caches at the end.
+
+Invalid rows are reported with their line number and skipped; the rest
+of the file is imported.
+"""
+import csv
+import gzip
+import io
+import json
+import time
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+from taggit.models import Tag, TaggedItem
+
+from ecommerce_api.counters import invalidate_counters
+from ecommerce_api.response_cache import CATALOG, invalidate_response_cache
+from .models import Brand, Category, Product, ProductRatingSummary
+from .search import get_search_backend
+from .utils import generate_unique_slug
+
+# Columns copied onto Product as they are; plus sku, category, brand and tags
+IMPORT_FIELDS = [
+    'name', 'description', 'price', 'compare_price', 'cost', 'barcode', 'quantity',
+    'low_stock_threshold', 'status', 'is_featured', 'is_digital', 'weight', 'length',
+    'width', 'height', 'seo_title', 'seo_description',
+]
+REQUIRED_FIELDS = ['name', 'description', 'price']
+# Slug bases looked up per query; SQLite rejects an OR much longer than this
+SLUG_BATCH = 250
+# Times a chunk's slugs are picked before a concurrent writer's conflict is raised
+SLUG_ATTEMPTS = 3
+# Errors kept in full; the rest are only counted
+MAX_ERRORS = 100
+
+
+def read_rows(stream, format='csv'):
+    """Yield (line number, row dict) from a text stream of CSV or NDJSON"""
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield line_number, {'__error__': f'Invalid JSON: {error}'}
+            continue
+        yield line_number, row if isinstance(row, dict) else {'__error__': 'Expected a JSON object'}
+
+
+def file_format(filename, format=None):
+    """The explicit `format`, else the one the file name suggests"""
+    if format:
+        return format
+    name = filename.lower().removesuffix('.gz')
+    return 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def open_rows(binary, filename, format=None):
+    """read_rows() over a binary file, gunzipped when the name ends in .gz"""
+    if filename.lower().endswith('.gz'):
+        binary = gzip.GzipFile(fileobj=binary)
+    stream = io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+    return read_rows(stream, file_format(filename, format))
+
+
+def _tag_names(value):
+    if value in (None, ''):
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return sorted({str(name).strip() for name in value if str(name).strip()})
+
+
+def _relation_name(value):
+    return str(value).strip() if value not in (None, '') else None
+
+
+class ProductImporter:
+    """
+    Import rows with run(). The instance keeps the name -> id maps, so
+    later chunks reuse what earlier ones resolved.
+    """
+
+    def __init__(self, user=None, chunk_size=1000, progress=None):
+        self.user = user
+        self.chunk_size = chunk_size
+        # Called with the stats dict after every chunk
+        self.progress = progress
+        self.fields = {name: Product._meta.get_field(name) for name in IMPORT_FIELDS + ['sku']}
+        self.categories = {}
+        self.brands = {}
+        self.tags = {}
+        self.content_type = ContentType.objects.get_for_model(Product)
+        self.stats = {
+            'rows': 0, 'created': 0, 'updated': 0, 'failed': 0,
+            'errors': [], 'seconds': 0.0, 'rows_per_second': 0.0,
+        }
+
+    def run(self, rows):
+        """Import an iterable of (line number, row dict); returns the stats"""
+        started = time.perf_counter()
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                self._report(started)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk)
+        self._report(started)
+
+        invalidate_counters()
+        invalidate_response_cache(CATALOG)
+        return self.stats
+
+    def _report(self, started):
+        self.stats['seconds'] = round(time.perf_counter() - started, 3)
+        if self.stats['seconds']:
+            self.stats['rows_per_second'] = round(self.stats['rows'] / self.stats['seconds'], 1)
+        if self.progress:
+            self.progress(self.stats)
+
+    def _fail(self, line, sku, errors):
+        self.stats['failed'] += 1
+        if len(self.stats['errors']) < MAX_ERRORS:
+            self.stats['errors'].append({'line': line, 'sku': sku, 'errors': errors})
+
+    # Cleaning
+
+    def _clean(self, raw):
+        """(sku, values, relations, errors) of one row"""
+        errors = {}
+        if '__error__' in raw:
+            return None, {}, {}, {'row': [raw['__error__']]}
+
+        sku = str(raw.get('sku') or '').strip()
+        try:
+            self.fields['sku'].clean(sku, None)
+        except ValidationError as error:
+            errors['sku'] = error.messages
+
+        values = {}
+        for name in IMPORT_FIELDS:
+            if name not in raw:
+                continue
+            value = raw[name]
+            if isinstance(value, str):
+                value = value.strip()
+            field = self.fields[name]
+            if value in ('', None):
+                if field.null:
+                    values[name] = None
+                    continue
+                if field.has_default():
+                    values[name] = field.get_default()
+                    continue
+                if name not in REQUIRED_FIELDS:
+                    values[name] = ''
+                    continue
+            try:
+                values[name] = field.clean(value, None)
+            except ValidationError as error:
+                errors[name] = error.messages
+
+        relations = {}
+        for name in ('category', 'brand'):
+            if name in raw:
+                relations[name] = _relation_name(raw[name])
+        if 'tags' in raw:
+            relations['tags'] = _tag_names(raw['tags'])
+        return sku, values, relations, errors
+
+    def _validate(self, values):
+        """ProductSerializer's checks, on the row merged with the stored product"""
+        errors = {}
+        for name in REQUIRED_FIELDS:
+            if values.get(name) in (None, ''):
+                errors[name] = ['This field is required.']
+        if values.get('price') is not None and values['price'] <= 0:
+            errors['price'] = ['Price must be greater than zero.']
+        if values.get('quantity') is not None and values['quantity'] < 0:
+            errors['quantity'] = ['Quantity cannot be negative.']
+        compare_price, price = values.get('compare_price'), values.get('price')
+        if compare_price and price and compare_price <= price:
+            errors['compare_price'] = ['Compare price must be greater than regular price.']
+        return errors
+
+    # Name maps
+
+    def _resolve(self, model, cache, names):
+        missing = {name for name in names if name and name not in cache}
+        if not missing:
+            return
+        cache.update(model.objects.filter(name__in=missing).values_list('name', 'pk'))
+        for name in missing - cache.keys():
+            if model is Category:
+                obj = Category.objects.create(name=name, slug=generate_unique_slug(Category, name))
+            elif model is Tag:
+                # Tag.save() finds a unique slug itself
+                obj = Tag.objects.create(name=name)
+            else:
+                obj = model.objects.create(name=name)
+            cache[name] = obj.pk
+
+    # Slugs
+
+    def _assign_slugs(self, products, existing):
+        """Give new and renamed products unique slugs, with one query per SLUG_BATCH bases"""
+        pending = []
+        for product in products:
+            stored = existing.get(product.sku)
+            if stored and stored['name'] == product.name:
+                product.slug = stored['slug']
+            else:
+                base = slugify(product.name) or slugify(product.sku) or 'product'
+                pending.append((product, base, stored['slug'] if stored else None))
+        if not pending:
+            return
+
+        bases = sorted({base for _, base, _ in pending})
+        taken = set()
+        for start in range(0, len(bases), SLUG_BATCH):
+            taken.update(Product.objects.filter(reduce(or_, [
+                Q(slug=base) | Q(slug__startswith=f'{base}-') for base in bases[start:start + SLUG_BATCH]
+            ])).values_list('slug', flat=True))
+        for product, base, own in pending:
+            slug, counter = base, 1
+            while slug in taken and slug != own:
+                slug = f'{base}-{counter}'
+                counter += 1
+            taken.add(slug)
+            product.slug = slug
+
+    # Chunks
+
+    def _import_chunk(self, rows):
+        self.stats['rows'] += len(rows)
+        cleaned = {}
+        for line, raw in rows:
+            sku, values, relations, errors = self._clean(raw)
+            if errors:
+                self._fail(line, sku, errors)
+                continue
+            # The last row for a sku wins
+            cleaned[sku] = (line, values, relations)
+        if not cleaned:
+            return
+
+        with transaction.atomic():
+            self._write(cleaned)
+
+    def _write(self, cleaned):
+        existing = {
+            row['sku']: row for row in Product.objects.filter(sku__in=cleaned).values(
+                'pk', 'sku', 'slug', 'published_at', 'category_id', 'brand_id', *IMPORT_FIELDS
+            )
+        }
+        self._resolve(Category, self.categories, [
+            relations.get('category') for _, _, relations in cleaned.values()
+        ])
+        self._resolve(Brand, self.brands, [relations.get('brand') for _, _, relations in cleaned.values()])
+        self._resolve(Tag, self.tags, [
+            name for _, _, relations in cleaned.values() for name in relations.get('tags', [])
+        ])
+
+        now = timezone.now()
+        products, tag_rows = [], {}
+        for sku, (line, values, relations) in cleaned.items():
+            stored = existing.get(sku)
+            merged = {name: stored[name] for name in IMPORT_FIELDS} if stored else {}
+            merged.update(values)
+            errors = self._validate(merged)
+            if errors:
+                self._fail(line, sku, errors)
+                continue
+
+            product = Product(sku=sku, **merged)
+            product.category_id = stored['category_id'] if stored else None
+            product.brand_id = stored['brand_id'] if stored else None
+            if 'category' in relations:
+                product.category_id = self.categories.get(relations['category'])
+            if 'brand' in relations:
+                product.brand_id = self.brands.get(relations['brand'])
+            product.published_at = stored['published_at'] if stored else None
+            if product.status == 'ACTIVE' and not product.published_at:
+                product.published_at = now
+            product.created_by = product.updated_by = self.user
+            products.append(product)
+            if 'tags' in relations:
+                tag_rows[sku] = relations['tags']
+        if not products:
+            return
+
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            self._assign_slugs(products, existing)
+            try:
+                with transaction.atomic():
+                    Product.objects.bulk_create(
+                        products,
+                        update_conflicts=True,
+                        unique_fields=['sku'],
+                        update_fields=IMPORT_FIELDS + [
+                            'category', 'brand', 'slug', 'published_at', 'updated_by', 'updated_at'
+                        ],
+                    )
+                break
+            except IntegrityError:
+                # The sku conflicts are upserted; a slug was taken since it was picked
+                if attempt == SLUG_ATTEMPTS:
+                    raise
+        # bulk_create() doesn't return the ids of upserted rows
+        ids = dict(Product.objects.filter(sku__in=[p.sku for p in products]).values_list('sku', 'pk'))
+        created = [ids[p.sku] for p in products if p.sku not in existing]
+        updated = [ids[p.sku] for p in products if p.sku in existing]
+        self.stats['created'] += len(created)
+        self.stats['updated'] += len(updated)
+
+        ProductRatingSummary.objects.bulk_create(
+            [ProductRatingSummary(product_id=pk) for pk in created], ignore_conflicts=True
+        )
+        if tag_rows:
+            TaggedItem.objects.filter(
+                content_type=self.content_type, object_id__in=[ids[sku] for sku in tag_rows]
+            ).delete()
+            TaggedItem.objects.bulk_create([
+                TaggedItem(content_type=self.content_type, object_id=ids[sku], tag_id=self.tags[name])
+                for sku, names in tag_rows.items() for name in names
+            ])
+        get_search_backend().index_products(Product.objects.filter(pk__in=ids.values()))
+        if updated and getattr(settings, 'CART_SUMMARY_CACHE_TIMEOUT', 0):
+            from cart.models import Cart, CartItem
+            Cart.invalidate_cached_summaries(set(
+                CartItem.objects.filter(product_id__in=updated).values_list('cart_id', flat=True)
+            ))
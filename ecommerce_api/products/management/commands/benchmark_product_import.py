@@ -0,0 +1,100 @@
+import random
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.imports import ProductImporter
+from products.models import Brand, Category, Product
+from products.serializers import ProductSerializer
+
+STATUSES = ['ACTIVE', 'ACTIVE', 'DRAFT']
+
+
+def serializer_import(rows, user):
+    """The row-by-row path: resolve names, then ProductSerializer.save() per row"""
+    request = SimpleNamespace(user=user)
+    for _, row in rows:
+        data = dict(row)
+        data['category'] = Category.objects.get_or_create(
+            name=row['category'], defaults={'slug': f"bench-{row['category'].lower().replace(' ', '-')}"}
+        )[0].pk
+        data['brand'] = Brand.objects.get_or_create(name=row['brand'])[0].pk
+        data['tags'] = row['tags'].split(',')
+        instance = Product.objects.filter(sku=row['sku']).first()
+        serializer = ProductSerializer(instance, data=data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+
+class Command(BaseCommand):
+    help = (
+        'Time ProductImporter on synthetic rows, against saving each row through '
+        'ProductSerializer. Everything runs in a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1000, 10000, 100000],
+            help='Numbers of rows to import',
+        )
+        parser.add_argument(
+            '--serializer-max',
+            type=int,
+            default=10000,
+            help='Largest size the serializer path is timed at',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows the importer writes per chunk',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        for size in options['sizes']:
+            rows = self._rows(size, rng)
+            self.stdout.write(self.style.SUCCESS(f'{size} rows'))
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(email='benchmark-import@example.com')
+                importer = ProductImporter(user=user, chunk_size=options['batch_size'])
+                self._report('importer, new', size, *self._time(lambda: importer.run(rows)))
+                importer = ProductImporter(user=user, chunk_size=options['batch_size'])
+                self._report('importer, update', size, *self._time(lambda: importer.run(rows)))
+                transaction.set_rollback(True)
+            if size <= options['serializer_max']:
+                with transaction.atomic():
+                    user = get_user_model().objects.create_user(email='benchmark-import@example.com')
+                    self._report('serializer, new', size, *self._time(lambda: serializer_import(rows, user)))
+                    transaction.set_rollback(True)
+
+    def _rows(self, size, rng):
+        return [
+            (i + 2, {
+                'sku': f'BENCH-IMPORT-{i}',
+                'name': f'Benchmark import {i}',
+                'description': 'Synthetic product',
+                'price': f'{rng.randint(100, 50000) / 100:.2f}',
+                'quantity': str(rng.randint(0, 500)),
+                'status': rng.choice(STATUSES),
+                'category': f'Benchmark category {rng.randrange(50)}',
+                'brand': f'Benchmark brand {rng.randrange(20)}',
+                'tags': ','.join(sorted({f'bench-{rng.randrange(100)}' for _ in range(3)})),
+            })
+            for i in range(size)
+        ]
+
+    def _time(self, func):
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started,
+
+    def _report(self, label, size, seconds):
+        self.stdout.write(f'  {label + ":":18} {seconds * 1000:10.1f} ms {size / seconds:10.0f} rows/s')
@@ -0,0 +1,113 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.models import Category, Product
+from products.utils import generate_product_report
+
+STATUSES = ['ACTIVE', 'ACTIVE', 'ACTIVE', 'DRAFT', 'INACTIVE']
+
+
+def legacy_report(products_queryset):
+    """The previous implementation: three passes over the rows, one category query per product"""
+    report = {
+        'total_products': products_queryset.count(),
+        'active_products': products_queryset.filter(status='ACTIVE').count(),
+        'out_of_stock': products_queryset.filter(quantity=0).count(),
+        'low_stock': products_queryset.filter(quantity__lte=5, quantity__gt=0).count(),
+        'total_value': sum([p.price * p.quantity for p in products_queryset]),
+        'average_price': 0,
+        'by_category': {},
+        'by_status': {}
+    }
+    if report['total_products'] > 0:
+        report['average_price'] = report['total_value'] / sum([p.quantity for p in products_queryset])
+    for product in products_queryset:
+        category_name = product.category.name if product.category else 'Uncategorized'
+        report['by_category'][category_name] = report['by_category'].get(category_name, 0) + 1
+        report['by_status'][product.status] = report['by_status'].get(product.status, 0) + 1
+    return report
+
+
+class Command(BaseCommand):
+    help = (
+        'Time generate_product_report() on synthetic catalogues, against the previous '
+        'row-by-row implementation. Everything runs in a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10000, 100000, 1000000],
+            help='Catalogue sizes to benchmark',
+        )
+        parser.add_argument(
+            '--legacy-max',
+            type=int,
+            default=100000,
+            help='Largest size the previous implementation is timed at',
+        )
+        parser.add_argument(
+            '--categories',
+            type=int,
+            default=50,
+            help='Number of synthetic categories',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of synthetic products inserted per query',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        for size in options['sizes']:
+            with transaction.atomic():
+                self._create_products(size, rng, options['categories'], options['batch_size'])
+                self._run(size, options['legacy_max'])
+                transaction.set_rollback(True)
+
+    def _create_products(self, size, rng, categories, batch_size):
+        categories = Category.objects.bulk_create([
+            Category(name=f'Benchmark {size} {i}', slug=f'benchmark-{size}-{i}')
+            for i in range(categories)
+        ]) + [None]
+        for start in range(0, size, batch_size):
+            Product.objects.bulk_create([
+                Product(
+                    name=f'Benchmark {start + i}',
+                    slug=f'benchmark-{size}-{start + i}',
+                    price=Decimal(rng.randint(100, 50000)) / 100,
+                    quantity=rng.choice([0, rng.randint(1, 5), rng.randint(6, 500)]),
+                    sku=f'BENCH-{size}-{start + i}',
+                    status=rng.choice(STATUSES),
+                    category=rng.choice(categories),
+                )
+                for i in range(min(batch_size, size - start))
+            ], batch_size=batch_size)
+
+    def _time(self, func):
+        started = time.perf_counter()
+        result = func()
+        return (time.perf_counter() - started) * 1000, result
+
+    def _run(self, size, legacy_max):
+        queryset = Product.objects.all()
+        report_ms, report = self._time(lambda: generate_product_report(queryset))
+        csv_ms, _ = self._time(lambda: sum(len(chunk) for chunk in generate_product_report(queryset, format='csv')))
+
+        self.stdout.write(self.style.SUCCESS(f'{size} products'))
+        self.stdout.write(f'  report:          {report_ms:10.1f} ms')
+        self.stdout.write(f'  csv report:      {csv_ms:10.1f} ms')
+        if size <= legacy_max:
+            legacy_ms, legacy = self._time(lambda: legacy_report(queryset))
+            self.stdout.write(f'  previous report: {legacy_ms:10.1f} ms')
+            if legacy['by_category'] != report['by_category'] or legacy['total_products'] != report['total_products']:
+                self.stdout.write(self.style.ERROR('  reports differ'))
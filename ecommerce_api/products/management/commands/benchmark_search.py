@@ -0,0 +1,116 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from taggit.models import Tag, TaggedItem
+
+from products.models import Product
+from products.search import DatabaseSearchBackend, InvertedIndexSearchBackend
+
+WORDS = [
+    'wireless', 'bluetooth', 'portable', 'ergonomic', 'compact', 'premium', 'classic', 'smart',
+    'leather', 'cotton', 'steel', 'bamboo', 'ceramic', 'organic', 'vintage', 'modern',
+    'laptop', 'keyboard', 'mouse', 'speaker', 'headphones', 'camera', 'charger', 'monitor',
+    'backpack', 'jacket', 'sneakers', 'watch', 'lamp', 'blender', 'kettle', 'mug',
+    'black', 'white', 'silver', 'red', 'blue', 'green', 'large', 'small',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the in-process inverted index with the database search query on synthetic '
+        'products. Everything runs in a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10000, 100000, 1000000],
+            help='Catalogue sizes to benchmark',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=50,
+            help='Number of random queries timed per size',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of synthetic products inserted per query',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        queries = [
+            ' '.join(rng.sample(WORDS, rng.choice([1, 1, 2])))
+            for _ in range(options['queries'])
+        ]
+
+        for size in options['sizes']:
+            with transaction.atomic():
+                self._create_products(size, rng, options['batch_size'])
+                self._run(size, queries)
+                transaction.set_rollback(True)
+
+    def _create_products(self, size, rng, batch_size):
+        tags = [Tag.objects.get_or_create(name=word)[0] for word in WORDS[:16]]
+        content_type = ContentType.objects.get_for_model(Product)
+
+        for start in range(0, size, batch_size):
+            count = min(batch_size, size - start)
+            products = Product.objects.bulk_create([
+                Product(
+                    name=' '.join(rng.sample(WORDS, 3)).title(),
+                    slug=f'benchmark-{size}-{start + i}',
+                    description=' '.join(rng.choices(WORDS, k=12)),
+                    price=Decimal('9.99'),
+                    sku=f'BENCH-{size}-{start + i}',
+                    status='ACTIVE',
+                )
+                for i in range(count)
+            ], batch_size=batch_size)
+            TaggedItem.objects.bulk_create([
+                TaggedItem(content_type=content_type, object_id=product.pk, tag=tag)
+                for product in products
+                for tag in rng.sample(tags, 2)
+            ], batch_size=batch_size)
+
+    def _time(self, func, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            func(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return statistics.mean(timings), timings[int(len(timings) * 0.95) - 1]
+
+    def _run(self, size, queries):
+        queryset = Product.objects.filter(status='ACTIVE')
+        database = DatabaseSearchBackend()
+        index = InvertedIndexSearchBackend()
+
+        started = time.perf_counter()
+        index.build()
+        build_ms = (time.perf_counter() - started) * 1000
+
+        # Both sides run the query they hand to the view and fetch the ids
+        db_mean, db_p95 = self._time(
+            lambda q: list(database.search(queryset, q).values_list('pk', flat=True)), queries
+        )
+        index_mean, index_p95 = self._time(
+            lambda q: list(index.search(queryset, q).values_list('pk', flat=True)), queries
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'{size} products'))
+        self.stdout.write(f'  index build:     {build_ms:10.1f} ms')
+        self.stdout.write(f'  database query:  mean {db_mean:8.2f} ms  p95 {db_p95:8.2f} ms')
+        self.stdout.write(f'  inverted index:  mean {index_mean:8.2f} ms  p95 {index_p95:8.2f} ms')
@@ -0,0 +1,138 @@
+import queue
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from products.models import Product
+from products.stock import change_product_stock
+
+
+def legacy_checkout(product_ids):
+    """The read-modify-write path the stock engine replaced"""
+    sold = 0
+    for pk in product_ids:
+        product = Product.objects.get(pk=pk)
+        if product.quantity >= 1:
+            product.quantity -= 1
+            product.save()
+            sold += 1
+    return sold
+
+
+def atomic_checkout(product_ids):
+    levels = change_product_stock({pk: -1 for pk in product_ids})
+    return sum(1 for level in levels.values() if level is not None)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent checkouts against a few products with the old read-modify-write '
+        'path and the conditional UPDATE stock engine, then report oversell and throughput. '
+        'The synthetic products are deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--checkouts',
+            type=int,
+            default=400,
+            help='Number of checkouts run per path',
+        )
+        parser.add_argument(
+            '--products',
+            type=int,
+            default=5,
+            help='Number of contended products',
+        )
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=3,
+            help='Distinct products bought by each checkout, one unit each',
+        )
+        parser.add_argument(
+            '--stock',
+            type=int,
+            default=100,
+            help='Initial stock of every product',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Stock benchmark {i}',
+                slug=f'stock-benchmark-{i}',
+                description='Stock benchmark product',
+                price=Decimal('9.99'),
+                sku=f'STOCK-BENCH-{i}',
+                quantity=options['stock'],
+                status='ACTIVE',
+            )
+            for i in range(options['products'])
+        ])
+        product_ids = [product.pk for product in products]
+        checkouts = [
+            rng.sample(product_ids, min(options['items'], len(product_ids)))
+            for _ in range(options['checkouts'])
+        ]
+
+        try:
+            for label, checkout in (('read-modify-write', legacy_checkout),
+                                    ('conditional UPDATE', atomic_checkout)):
+                Product.objects.filter(pk__in=product_ids).update(quantity=options['stock'])
+                self._run(label, checkout, checkouts, product_ids, options)
+        finally:
+            Product.objects.filter(pk__in=product_ids).delete()
+
+    def _run(self, label, checkout, checkouts, product_ids, options):
+        work = queue.Queue()
+        for product_ids_bought in checkouts:
+            work.put(product_ids_bought)
+        results = {'sold': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        product_ids_bought = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        sold = checkout(product_ids_bought)
+                    except OperationalError:
+                        # e.g. SQLite giving up on a locked database
+                        with lock:
+                            results['errors'] += 1
+                        continue
+                    with lock:
+                        results['sold'] += sold
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        initial = options['stock'] * len(product_ids)
+        remaining = sum(
+            Product.objects.filter(pk__in=product_ids).values_list('quantity', flat=True)
+        )
+        oversold = results['sold'] - (initial - remaining)
+
+        self.stdout.write(self.style.SUCCESS(label))
+        self.stdout.write(f'  units sold:     {results["sold"]:8} of {initial} in stock')
+        self.stdout.write(f'  units oversold: {oversold:8}')
+        self.stdout.write(f'  failed calls:   {results["errors"]:8}')
+        self.stdout.write(f'  throughput:     {len(checkouts) / elapsed:8.1f} checkouts/s')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from products.recommendations import build, per_product
+
+
+class Command(BaseCommand):
+    help = 'Precompute the recommended products of every active product'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--per-product',
+            type=int,
+            default=None,
+            help='Recommendations stored per product (default: RECOMMENDATIONS_PER_PRODUCT)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows read and written per query',
+        )
+
+    def handle(self, *args, **options):
+        k = options['per_product'] or per_product()
+        written = build(k=k, batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Built {k} recommendations for each of {written} products')
+        )
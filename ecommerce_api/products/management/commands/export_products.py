@@ -0,0 +1,7 @@
+from ecommerce_api.exports import ExportCommand
+from products.exports import ProductExport
+
+
+class Command(ExportCommand):
+    help = 'Stream products as CSV or NDJSON, with the export endpoint filters'
+    export_class = ProductExport
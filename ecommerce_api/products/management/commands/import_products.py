@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from products.imports import ProductImporter, open_rows
+
+
+class Command(BaseCommand):
+    help = 'Create or update products from a CSV or NDJSON file, matching on sku'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file, optionally gzipped')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='File format (default: from the file extension)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows written per chunk',
+        )
+        parser.add_argument('--user', help='Email of the user recorded as creator/updater')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(email=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}")
+
+        importer = ProductImporter(user=user, chunk_size=options['batch_size'], progress=self._progress)
+        try:
+            with open(options['path'], 'rb') as binary:
+                stats = importer.run(open_rows(binary, options['path'], options['format']))
+        except OSError as error:
+            raise CommandError(str(error))
+
+        for error in stats['errors']:
+            self.stderr.write(f"line {error['line']} ({error['sku'] or 'no sku'}): {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['rows']} rows in {stats['seconds']:.1f} s: {stats['created']} created, "
+            f"{stats['updated']} updated, {stats['failed']} failed ({stats['rows_per_second']:.0f} rows/s)"
+        ))
+
+    def _progress(self, stats):
+        self.stdout.write(
+            f"{stats['rows']} rows: {stats['created']} created, {stats['updated']} updated, "
+            f"{stats['failed']} failed ({stats['rows_per_second']:.0f} rows/s)"
+        )
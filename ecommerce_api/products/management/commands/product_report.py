@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.utils import generate_product_report
+
+
+class Command(BaseCommand):
+    help = 'Write the catalog statistics report as JSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=['json', 'csv'],
+            default='json',
+            help='json: the whole report; csv: one line per category and status',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write (default: standard output)',
+        )
+        parser.add_argument('--status', help='Only products with this status')
+        parser.add_argument('--category', help='Only products in this category (slug)')
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+        if options['category']:
+            queryset = queryset.filter(category__slug=options['category'])
+
+        chunks = generate_product_report(queryset, format=options['format'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            self.stdout.write('')
+            return
+        with open(options['output'], 'w', newline='') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Wrote the product report to {options['output']}"))
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ecommerce_api.partitions import add_months, ensure_partitions, expire_months, month_start
+from products.models import ProductActivity, ProductActivityDaily
+from users.models import UserActivity
+
+
+class Command(BaseCommand):
+    help = (
+        'Roll up recent product activity into daily counts, create the upcoming monthly '
+        'partitions and archive (or drop) activity months older than --keep-months'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months',
+            type=int,
+            default=getattr(settings, 'ACTIVITY_RETENTION_MONTHS', 12),
+            help='Number of months of raw activity kept, including the current one',
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop expired months instead of archiving them',
+        )
+        parser.add_argument(
+            '--rollup-days',
+            type=int,
+            default=2,
+            help='Number of recent days whose daily counts are recomputed',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=2,
+            help='Number of future monthly partitions kept ready (PostgreSQL)',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        cutoff = add_months(month_start(today), 1 - options['keep_months'])
+
+        rolled_up = ProductActivityDaily.objects.rollup(
+            today - timedelta(days=options['rollup_days']), today
+        )
+        # Expiring months are rolled up in full before their raw rows go
+        oldest = ProductActivity.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        if oldest and timezone.localtime(oldest).date() < cutoff:
+            rolled_up += ProductActivityDaily.objects.rollup(
+                timezone.localtime(oldest).date(), cutoff - timedelta(days=1)
+            )
+        self.stdout.write(f'Rolled up {rolled_up} product activity days')
+
+        for model in (ProductActivity, UserActivity):
+            ensure_partitions(model, months_ahead=options['months_ahead'])
+            months = expire_months(model, cutoff, archive=not options['drop'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{'Dropped' if options['drop'] else 'Archived'} {len(months)} months of "
+                f"{model._meta.verbose_name} rows older than {cutoff}"
+            ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from products.models import ProductRatingSummary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized product rating summaries from approved reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of summaries written per query',
+        )
+
+    def handle(self, *args, **options):
+        written = ProductRatingSummary.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt rating summaries for {written} products')
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.search import full_text_search_available, update_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Recompute the full-text search vector for every product (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of products updated per statement',
+        )
+
+    def handle(self, *args, **options):
+        if not full_text_search_available():
+            self.stdout.write(
+                self.style.WARNING('Full-text search requires PostgreSQL; nothing to do')
+            )
+            return
+
+        updated = update_search_vectors(Product.objects.all(), chunk_size=options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt search vectors for {updated} products')
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from products.copurchases import rebuild, update
+
+
+class Command(BaseCommand):
+    help = 'Fold newly paid orders into the "frequently bought together" counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Forget the stored counts and recount every paid order',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of orders read per query',
+        )
+        parser.add_argument(
+            '--max-pairs',
+            type=int,
+            default=200000,
+            help='Product pairs held in memory before they are written',
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild if options['rebuild'] else update
+        counted = count(chunk_size=options['batch_size'], max_pairs=options['max_pairs'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Counted the products bought together in {counted} orders')
+        )
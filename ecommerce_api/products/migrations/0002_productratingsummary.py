@@ -0,0 +1,56 @@
+# Generated by Django 4.2.13 on 2026-10-17 02:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q, Sum
+
+
+def populate_rating_summaries(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductReview = apps.get_model('products', 'ProductReview')
+    ProductRatingSummary = apps.get_model('products', 'ProductRatingSummary')
+
+    totals = ProductReview.objects.filter(is_approved=True).order_by().values('product_id').annotate(
+        review_count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'rating_{rating}': Count('id', filter=Q(rating=rating)) for rating in range(1, 6)}
+    )
+    totals_by_product = {row.pop('product_id'): row for row in totals}
+
+    summaries = []
+    for product_id in Product.objects.values_list('pk', flat=True).iterator():
+        row = totals_by_product.get(product_id, {})
+        summary = ProductRatingSummary(product_id=product_id, **row)
+        if summary.review_count:
+            summary.average_rating = summary.rating_sum / summary.review_count
+        summaries.append(summary)
+    ProductRatingSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='products.product')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.FloatField(default=0)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Product rating summaries',
+                'indexes': [models.Index(fields=['average_rating', 'review_count'], name='products_pr_average_1c585c_idx')],
+            },
+        ),
+        migrations.RunPython(populate_rating_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.13 on 2026-10-17 03:05
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_INDEX = 'products_product_search_vector_gin'
+
+
+def create_search_vector_index(apps, schema_editor):
+    # GIN indexes only exist on PostgreSQL; other backends use the icontains fallback
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {SEARCH_VECTOR_INDEX} '
+        f'ON products_product USING gin (search_vector)'
+    )
+
+
+def drop_search_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {SEARCH_VECTOR_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_productratingsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector_index, drop_search_vector_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-17 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='products_pr_status_0db408_idx'),
+        ),
+    ]
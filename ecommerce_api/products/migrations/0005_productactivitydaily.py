@@ -0,0 +1,34 @@
+# Generated by Django 4.2.13 on 2026-10-17 04:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_products_pr_status_0db408_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductActivityDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('purchases', models.PositiveIntegerField(default=0)),
+                ('wishlist_adds', models.PositiveIntegerField(default=0)),
+                ('reviews', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to='products.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Product daily activity',
+                'indexes': [models.Index(fields=['date'], name='products_pr_date_85f4f3_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productactivitydaily',
+            constraint=models.UniqueConstraint(fields=('product', 'date'), name='unique_product_activity_day'),
+        ),
+    ]
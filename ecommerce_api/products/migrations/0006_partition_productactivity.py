@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from ecommerce_api.partitions import partition_by_month, unpartition
+
+
+def partition(apps, schema_editor):
+    # Monthly partitions on PostgreSQL; a no-op on other databases
+    partition_by_month(schema_editor, apps.get_model('products', 'ProductActivity'))
+
+
+def merge_partitions(apps, schema_editor):
+    unpartition(schema_editor, apps.get_model('products', 'ProductActivity'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_productactivitydaily'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, merge_partitions),
+    ]
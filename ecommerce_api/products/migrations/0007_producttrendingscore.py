@@ -0,0 +1,24 @@
+# Generated by Django 4.2.13 on 2026-10-17 04:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_partition_productactivity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTrendingScore',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending_score', serialize=False, to='products.product')),
+                ('score', models.FloatField(default=0)),
+                ('decay_at', models.FloatField(default=0)),
+                ('rank', models.FloatField(db_index=True, default=0)),
+                ('total_views', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.13 on 2026-10-17 04:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_producttrendingscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRecommendation',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendation', serialize=False, to='products.product')),
+                ('product_ids', models.JSONField(default=list)),
+                ('built_at', models.DateTimeField()),
+            ],
+        ),
+    ]
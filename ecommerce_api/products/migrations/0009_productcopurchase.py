@@ -0,0 +1,30 @@
+# Generated by Django 4.2.13 on 2026-10-17 04:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_productrecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCoPurchase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bought_with', to='products.product')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='copurchases', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', '-count'], name='products_pr_product_019a99_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productcopurchase',
+            constraint=models.UniqueConstraint(fields=('product', 'other'), name='unique_product_copurchase'),
+        ),
+    ]
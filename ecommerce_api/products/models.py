@@ -1,4 +1,8 @@
+from datetime import datetime, time, timedelta
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Avg, Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, TruncDate
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -38,6 +42,33 @@ class Brand(models.Model):
     def get_absolute_url(self):
         return reverse('products:brand_detail', kwargs={'pk': self.pk})
 
+class ProductQuerySet(models.QuerySet):
+    def with_catalog_aggregates(self):
+        """
+        Annotate approved-review rating average and count for each product.
+
+        Values are read from the denormalized ProductRatingSummary row, and
+        `average_rating` is exposed as an alias so it can be used in
+        order_by() / OrderingFilter.
+        """
+        return self.alias(
+            average_rating=F('rating_summary__average_rating'),
+        ).annotate(
+            annotated_average_rating=F('rating_summary__average_rating'),
+            annotated_review_count=Coalesce(F('rating_summary__review_count'), 0),
+        )
+
+    def for_serialization(self):
+        """
+        Apply the query plan used by ProductSerializer: rating aggregates,
+        the foreign keys it dereferences and the tags/images it nests.
+        Serializing a page then costs a fixed number of queries.
+        """
+        return self.with_catalog_aggregates().select_related(
+            'category', 'brand', 'created_by', 'updated_by'
+        ).prefetch_related('tags', 'images')
+
+
 class Product(models.Model):
     STATUS_CHOICES = [
         ('DRAFT', 'Draft'),
@@ -82,6 +113,11 @@ class Product(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     published_at = models.DateTimeField(null=True, blank=True)
 
+    # Maintained by products.signals; GIN-indexed on PostgreSQL (see migration 0003)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -89,6 +125,7 @@ class Product(models.Model):
             models.Index(fields=['category', 'status']),
             models.Index(fields=['is_featured', 'status']),
             models.Index(fields=['name']),  # Added for search optimization
+            models.Index(fields=['status', 'created_at', 'id']),  # Keyset pagination
         ]
 
     def __str__(self):
@@ -118,12 +155,14 @@ class Product(models.Model):
         super().save(*args, **kwargs)
 
     def reduce_stock(self, quantity):
-        """Reduce stock quantity - required by the specifications"""
-        if self.quantity >= quantity:
-            self.quantity -= quantity
-            self.save()
-            return True
-        return False
+        """Reduce stock quantity atomically; False if there isn't enough left"""
+        from .stock import change_product_stock
+
+        level = change_product_stock({self.pk: -quantity})[self.pk]
+        if level is None:
+            return False
+        self.quantity = level
+        return True
     
 
     @property
@@ -142,13 +181,19 @@ class Product(models.Model):
         
     @property
     def average_rating(self):
-        reviews = self.reviews.filter(is_approved=True)
-        if reviews.exists():
-            return round(sum([review.rating for review in reviews]) / reviews.count(), 1)
+        # Use the value from with_catalog_aggregates() when available
+        if hasattr(self, 'annotated_average_rating'):
+            average = self.annotated_average_rating if self.annotated_review_count else None
+        else:
+            average = self.reviews.filter(is_approved=True).aggregate(avg=Avg('rating'))['avg']
+        if average is not None:
+            return round(average, 1)
         return 0
         
     @property
     def review_count(self):
+        if hasattr(self, 'annotated_review_count'):
+            return self.annotated_review_count
         return self.reviews.filter(is_approved=True).count()
     
     @property
@@ -210,6 +255,131 @@ class ProductReview(models.Model):
     def __str__(self):
         return f"Review by {self.user.email} for {self.product.name}"
 
+class ProductRatingSummaryManager(models.Manager):
+    def apply_review_delta(self, product_id, rating, count=1):
+        """
+        Add (count > 0) or remove (count < 0) approved reviews with the given
+        rating from a product's summary in a single UPDATE statement.
+        """
+        rating_field = ProductRatingSummary.RATING_FIELDS[rating]
+        rating_sum = rating * count
+
+        updated = self.filter(product_id=product_id).update(
+            review_count=F('review_count') + count,
+            rating_sum=F('rating_sum') + rating_sum,
+            average_rating=Case(
+                When(
+                    review_count__gt=-count,
+                    then=Cast(F('rating_sum') + rating_sum, FloatField()) / (F('review_count') + count)
+                ),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+            **{rating_field: F(rating_field) + count}
+        )
+
+        # Summary row missing (e.g. product created via bulk_create)
+        if not updated and count > 0:
+            self.get_or_create(product_id=product_id)
+            self.apply_review_delta(product_id, rating, count)
+
+    def apply_review_changes(self, reviews, count):
+        """
+        Apply `count` (+1 or -1) for every review in a queryset, grouped so
+        there is at most one UPDATE per product and rating.
+        """
+        grouped = reviews.order_by().values('product_id', 'rating').annotate(total=Count('id'))
+        for row in list(grouped):
+            self.apply_review_delta(row['product_id'], row['rating'], row['total'] * count)
+
+    def rebuild(self, batch_size=1000):
+        """
+        Recompute every product's summary from the approved reviews.
+        Returns the number of summaries written.
+        """
+        totals = ProductReview.objects.filter(is_approved=True).order_by().values('product_id').annotate(
+            review_count=Count('id'),
+            rating_sum=Sum('rating'),
+            **{
+                field: Count('id', filter=Q(rating=rating))
+                for rating, field in ProductRatingSummary.RATING_FIELDS.items()
+            }
+        )
+        totals_by_product = {row.pop('product_id'): row for row in totals}
+
+        update_fields = ['review_count', 'rating_sum', 'average_rating'] + list(
+            ProductRatingSummary.RATING_FIELDS.values()
+        )
+        written = 0
+        batch = []
+        for product_id in Product.objects.order_by().values_list('pk', flat=True).iterator(chunk_size=batch_size):
+            row = totals_by_product.get(product_id, {})
+            summary = ProductRatingSummary(product_id=product_id, **row)
+            if summary.review_count:
+                summary.average_rating = summary.rating_sum / summary.review_count
+            batch.append(summary)
+
+            if len(batch) >= batch_size:
+                written += self._upsert(batch, update_fields)
+                batch = []
+
+        if batch:
+            written += self._upsert(batch, update_fields)
+        return written
+
+    def _upsert(self, summaries, update_fields):
+        self.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=update_fields,
+        )
+        return len(summaries)
+
+
+class ProductRatingSummary(models.Model):
+    """
+    Denormalized approved-review statistics for a product, maintained
+    incrementally from ProductReview changes (see products/signals.py).
+    """
+    RATING_FIELDS = {
+        1: 'rating_1',
+        2: 'rating_2',
+        3: 'rating_3',
+        4: 'rating_4',
+        5: 'rating_5',
+    }
+
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary'
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0)
+
+    # Histogram of approved ratings
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    objects = ProductRatingSummaryManager()
+
+    class Meta:
+        verbose_name_plural = "Product rating summaries"
+        indexes = [
+            models.Index(fields=['average_rating', 'review_count']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.average_rating:.1f} ({self.review_count} reviews)"
+
+    @property
+    def histogram(self):
+        return {rating: getattr(self, field) for rating, field in self.RATING_FIELDS.items()}
+
+
 class ProductActivity(models.Model):
     ACTION_CHOICES = [
         ('view', 'Product View'),
@@ -228,7 +398,8 @@ class ProductActivity(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     details = models.JSONField(default=dict)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # The time of the event; rows may be written later, see ecommerce_api/activity.py
+    timestamp = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-timestamp']
@@ -241,6 +412,119 @@ class ProductActivity(models.Model):
     def __str__(self):
         return f"{self.action} - {self.product.name}"
 
+class ProductActivityDailyManager(models.Manager):
+    def rollup(self, start, end):
+        """
+        Recompute the daily rows for the days start..end (inclusive) from the
+        raw ProductActivity rows, in one GROUP BY. Returns the rows written.
+        """
+        tz = timezone.get_current_timezone()
+        activities = ProductActivity.objects.filter(
+            timestamp__gte=timezone.make_aware(datetime.combine(start, time.min), tz),
+            timestamp__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+        )
+        totals = activities.order_by().values('product_id', day=TruncDate('timestamp')).annotate(**{
+            field: Count('id', filter=Q(action=action))
+            for action, field in ProductActivityDaily.ACTION_FIELDS.items()
+        })
+        rows = [ProductActivityDaily(date=row.pop('day'), **row) for row in totals]
+        # Days whose raw rows are gone (archived) aren't in totals and keep their counts
+        self.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['product', 'date'],
+            update_fields=list(ProductActivityDaily.ACTION_FIELDS.values()),
+        )
+        return len(rows)
+
+
+class ProductActivityDaily(models.Model):
+    """
+    Per product and day counts of ProductActivity, kept after the raw rows
+    are archived; see ProductActivityDailyManager.rollup().
+    """
+    ACTION_FIELDS = {
+        'view': 'views',
+        'purchase': 'purchases',
+        'wishlist_add': 'wishlist_adds',
+        'review': 'reviews',
+    }
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_activity')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    purchases = models.PositiveIntegerField(default=0)
+    wishlist_adds = models.PositiveIntegerField(default=0)
+    reviews = models.PositiveIntegerField(default=0)
+
+    objects = ProductActivityDailyManager()
+
+    class Meta:
+        verbose_name_plural = "Product daily activity"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'date'], name='unique_product_activity_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.date}: {self.views} views, {self.purchases} purchases"
+
+class ProductTrendingScore(models.Model):
+    """
+    Exponentially decayed view count of a product; see products/trending.py.
+
+    `score` is the decayed count as of `decay_at` (a time measured in
+    half-lives); `rank` = log2(score) + decay_at orders products by their
+    current score without touching the rows that got no new views.
+    """
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name='trending_score'
+    )
+    score = models.FloatField(default=0)
+    decay_at = models.FloatField(default=0)
+    rank = models.FloatField(default=0, db_index=True)
+    total_views = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product_id} - {self.total_views} views"
+
+class ProductCoPurchase(models.Model):
+    """
+    How many paid orders contained both `product` and `other`: one row per
+    direction of a pair, the top COPURCHASE_PAIRS_PER_PRODUCT per product.
+    See products/copurchases.py.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='copurchases')
+    other = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='bought_with')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'other'], name='unique_product_copurchase'),
+        ]
+        indexes = [
+            models.Index(fields=['product', '-count']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} + {self.other_id}: {self.count} orders"
+
+class ProductRecommendation(models.Model):
+    """
+    A product's top recommended product ids, best first, precomputed by the
+    build_recommendations command; see products/recommendations.py.
+    """
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name='recommendation'
+    )
+    product_ids = models.JSONField(default=list)
+    built_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.product_id} - {len(self.product_ids)} recommendations"
+
 class Wishlist(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='wishlist_items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='wishlisted_by')
@@ -0,0 +1,158 @@
+# products/recommendations.py
+"""
+Precomputed product recommendations.
+
+build() scores, for every active product, the other active products that
+share its category, its tags (Jaccard overlap of the two tag sets) or its
+orders (the ProductCoPurchase counts, cosine normalised), and stores the
+best RECOMMENDATIONS_PER_PRODUCT ids in ProductRecommendation. The
+build_recommendations command and a daily Celery task run it.
+
+Serving a product page is then one primary key lookup of that row and a
+random.sample() over the stored ids, instead of ORDER BY RANDOM() over a
+category.
+"""
+import heapq
+import random
+from collections import Counter, defaultdict
+from math import sqrt
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from orders.models import OrderItem
+from . import copurchases
+from .models import Product, ProductCoPurchase, ProductRecommendation
+
+CATEGORY_WEIGHT = 0.5
+TAG_WEIGHT = 1.0
+PURCHASE_WEIGHT = 2.0
+# Tags on more products than this are too common to find candidates with
+MAX_TAG_PRODUCTS = 1000
+
+
+def per_product():
+    return getattr(settings, 'RECOMMENDATIONS_PER_PRODUCT', 20)
+
+
+def co_purchases(active, chunk_size=2000):
+    """
+    Paid-order counts over the `active` product ids: (orders per product,
+    {product_id: {other product id: orders with both}}). Newly paid orders
+    are folded into the ProductCoPurchase counts first.
+    """
+    copurchases.update(chunk_size=chunk_size)
+    orders = Counter(dict(
+        OrderItem.objects.filter(order__payment_status='PAID').order_by().values('product_id')
+        .annotate(orders=Count('order_id', distinct=True)).values_list('product_id', 'orders')
+    ))
+    pairs = defaultdict(dict)
+    for product_id, other_id, count in ProductCoPurchase.objects.values_list(
+        'product_id', 'other_id', 'count'
+    ).iterator(chunk_size=chunk_size):
+        if product_id in active and other_id in active:
+            pairs[product_id][other_id] = count
+    return orders, pairs
+
+
+def build(k=None, batch_size=1000):
+    """
+    Recompute every active product's recommendations. Rows of products
+    that are no longer active are deleted. Returns the rows written.
+    """
+    k = k or per_product()
+    started = timezone.now()
+
+    # Featured first, then newest: the tie-break and the fill order
+    categories = dict(
+        Product.objects.filter(status='ACTIVE').order_by('-is_featured', '-created_at')
+        .values_list('pk', 'category_id')
+    )
+    preference = {product_id: position for position, product_id in enumerate(categories)}
+    featured = list(
+        Product.objects.filter(status='ACTIVE', is_featured=True).order_by('-created_at')
+        .values_list('pk', flat=True)[:k + 1]
+    )
+    by_category = defaultdict(list)
+    for product_id, category_id in categories.items():
+        if category_id is not None and len(by_category[category_id]) <= k:
+            by_category[category_id].append(product_id)
+
+    tags = defaultdict(set)
+    tagged = defaultdict(set)
+    for product_id, tag_id in Product.objects.filter(
+        status='ACTIVE', tags__isnull=False
+    ).values_list('pk', 'tags').iterator(chunk_size=batch_size):
+        tags[product_id].add(tag_id)
+        tagged[tag_id].add(product_id)
+
+    orders, pairs = co_purchases(categories, chunk_size=batch_size)
+
+    written = 0
+    batch = []
+    for product_id, category_id in categories.items():
+        scores = defaultdict(float)
+        own = tags.get(product_id, set())
+        for tag_id in own:
+            if len(tagged[tag_id]) > MAX_TAG_PRODUCTS:
+                continue
+            for other in tagged[tag_id]:
+                if other not in scores:
+                    overlap = len(own & tags[other])
+                    scores[other] = TAG_WEIGHT * overlap / (len(own) + len(tags[other]) - overlap)
+        for other, shared in pairs.get(product_id, {}).items():
+            scores[other] += PURCHASE_WEIGHT * shared / sqrt(orders[product_id] * orders[other])
+        if category_id is not None:
+            for other in by_category[category_id]:
+                scores.setdefault(other, 0.0)
+            for other in scores:
+                if categories[other] == category_id:
+                    scores[other] += CATEGORY_WEIGHT
+        scores.pop(product_id, None)
+        if not scores:
+            scores = {other: 0.0 for other in featured if other != product_id}
+
+        best = heapq.nsmallest(k, scores, key=lambda other: (-scores[other], preference[other]))
+        batch.append(ProductRecommendation(product_id=product_id, product_ids=best, built_at=started))
+        if len(batch) >= batch_size:
+            written += _upsert(batch)
+            batch = []
+
+    if batch:
+        written += _upsert(batch)
+    ProductRecommendation.objects.filter(built_at__lt=started).delete()
+    return written
+
+
+def _upsert(rows):
+    ProductRecommendation.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=['product_ids', 'built_at'],
+    )
+    return len(rows)
+
+
+def _fallback_ids(product):
+    """Candidates for a product added since the last build, by one indexed query"""
+    candidates = Product.objects.filter(status='ACTIVE').exclude(pk=product.pk)
+    if product.category_id:
+        candidates = candidates.filter(category_id=product.category_id)
+    else:
+        candidates = candidates.filter(is_featured=True)
+    return list(candidates.order_by('-created_at').values_list('pk', flat=True)[:per_product()])
+
+
+def recommend(product, limit=4):
+    """`limit` products picked at random from `product`'s recommendations"""
+    product_ids = ProductRecommendation.objects.filter(
+        product_id=product.pk
+    ).values_list('product_ids', flat=True).first()
+    if product_ids is None:
+        product_ids = _fallback_ids(product)
+
+    chosen = random.sample(product_ids, min(limit, len(product_ids)))
+    products = Product.objects.filter(status='ACTIVE').for_serialization().in_bulk(chosen)
+    return [products[product_id] for product_id in chosen if product_id in products]
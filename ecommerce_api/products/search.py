@@ -0,0 +1,400 @@
+# products/search.py
+import logging
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.core.cache import cache
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F, OuterRef, Q, Subquery, TextField, Value
+from django.utils.module_loading import import_string
+
+SEARCH_CONFIG = 'english'
+
+logger = logging.getLogger(__name__)
+
+
+def full_text_search_available(using='default'):
+    """PostgreSQL full-text search is only used on the postgresql backend"""
+    return connections[using].vendor == 'postgresql'
+
+
+def search_vector():
+    """
+    The weighted search vector of a product, as an expression one UPDATE
+    can compute for any number of rows.
+
+    Name carries the most weight, then tags/brand/category, then description.
+    Tag, brand and category names are read with correlated subqueries, since
+    UPDATE can't join.
+    """
+    from taggit.models import Tag, TaggedItem
+    from .models import Brand, Category, Product
+
+    tag_names = (
+        Tag.objects.filter(
+            taggit_taggeditem_items__content_type=ContentType.objects.get_for_model(Product),
+            taggit_taggeditem_items__object_id=OuterRef('pk'),
+        )
+        .annotate(group=Value(1)).values('group')
+        .annotate(names=StringAgg('name', ' ')).values('names')
+    )
+    brand_name = Brand.objects.filter(pk=OuterRef('brand_id')).values('name')
+    category_name = Category.objects.filter(pk=OuterRef('category_id')).values('name')
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(
+            Subquery(tag_names, output_field=TextField()),
+            Subquery(brand_name), Subquery(category_name),
+            weight='B', config=SEARCH_CONFIG
+        )
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(queryset, chunk_size=500):
+    """
+    Recompute the stored search vector for every product in the queryset,
+    with one UPDATE per `chunk_size` products.
+    Does nothing when full-text search is not available.
+    Returns the number of products updated.
+    """
+    if not full_text_search_available(queryset.db):
+        return 0
+
+    from .models import Product
+
+    product_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    vector = search_vector()
+    updated = 0
+    for start in range(0, len(product_ids), chunk_size):
+        # update() skips save() and signals, so this cannot recurse
+        updated += Product.objects.filter(pk__in=product_ids[start:start + chunk_size]).update(
+            search_vector=vector
+        )
+    return updated
+
+
+class SearchBackend:
+    """
+    Interface shared by the product search backends.
+
+    `search` narrows a Product queryset to the rows matching `query`. The
+    `index_products`/`remove_products` hooks are called from the product
+    signals, inside the writing transaction, so a backend can keep whatever
+    it searches over up to date.
+    """
+
+    def search(self, queryset, query):
+        raise NotImplementedError('subclasses of SearchBackend must provide a search() method')
+
+    def index_products(self, queryset):
+        """Called with the products whose searchable content has changed"""
+
+    def remove_products(self, product_ids):
+        """Called with the ids of products that have been deleted"""
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """
+    Product search backed by the database.
+
+    On PostgreSQL this matches the stored, GIN-indexed `search_vector` column
+    and orders by rank. Elsewhere (e.g. SQLite in tests) it falls back to the
+    icontains lookups over name, description and tags.
+    """
+
+    def search(self, queryset, query):
+        if not query:
+            return queryset
+
+        if full_text_search_available(queryset.db):
+            search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+            return queryset.filter(search_vector=search_query).annotate(
+                search_rank=SearchRank(F('search_vector'), search_query)
+            ).order_by('-search_rank', '-created_at')
+
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(tags__name__icontains=query)
+        ).distinct()
+
+    def index_products(self, queryset):
+        update_search_vectors(queryset)
+
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Shared-cache log of the products each committed write changed, so every
+# process can bring its own inverted index up to date
+INDEX_VERSION_KEY = 'search-index:version'
+INDEX_CHANGE_TIMEOUT = 86400
+# A process further behind than this rebuilds instead of replaying the log
+MAX_REPLAYED_CHANGES = 1000
+
+
+def _change_key(version):
+    return f'search-index:change:{version}'
+
+
+def _start_change_log():
+    """Current log version, starting the log when there is none"""
+    # Start from the clock so a lost counter can't come back at a version
+    # some process has already seen
+    cache.add(INDEX_VERSION_KEY, int(time.time() * 1000), None)
+    return cache.get(INDEX_VERSION_KEY)
+
+
+def tokenize(text):
+    """Split text into lower-cased word tokens"""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class InvertedIndexSearchBackend(SearchBackend):
+    """
+    In-process inverted index over active products.
+
+    Name, description and tag names are tokenized and each token maps to a
+    sorted `array('q')` of product ids. The index is built from the database
+    when a server process starts (see warm_up()), or else on the first
+    search. Every query token must match, and each one matches any indexed
+    token it is a prefix of, so "lap" finds "laptop".
+
+    The index lives in the memory of each process. Once a write commits,
+    the changed product ids are logged in the shared cache under a new
+    version, and every process replays the entries it hasn't seen before
+    it searches. A process that finds a gap in the log rebuilds.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}
+            self._documents = {}
+            self._vocabulary = []
+            self._version = None
+            self._built = False
+
+    @property
+    def is_built(self):
+        return self._built
+
+    def __len__(self):
+        return len(self._documents)
+
+    @staticmethod
+    def product_tokens(product):
+        """Distinct tokens for a product, tags taken from the prefetch cache when present"""
+        tokens = set(tokenize(product.name))
+        tokens.update(tokenize(product.description))
+        for tag in product.tags.all():
+            tokens.update(tokenize(tag.name))
+        return frozenset(tokens)
+
+    def build(self, queryset=None, chunk_size=2000):
+        """(Re)build the whole index, returning the number of products indexed"""
+        from .models import Product
+
+        if queryset is None:
+            queryset = Product.objects.filter(status='ACTIVE')
+        queryset = queryset.order_by('pk')
+        # Read before the rows, so changes logged meanwhile are replayed
+        version = _start_change_log()
+
+        # Read plain tuples rather than model instances; this is most of the
+        # cost of a build on a large catalogue.
+        tag_names = {}
+        tagged = queryset.filter(tags__isnull=False).values_list('pk', 'tags__name')
+        for product_id, tag_name in tagged.iterator(chunk_size=chunk_size):
+            tag_names.setdefault(product_id, []).append(tag_name)
+
+        postings = {}
+        documents = {}
+        rows = queryset.values_list('pk', 'name', 'description')
+        for product_id, name, description in rows.iterator(chunk_size=chunk_size):
+            tokens = set(tokenize(name))
+            tokens.update(tokenize(description))
+            for tag_name in tag_names.get(product_id, ()):
+                tokens.update(tokenize(tag_name))
+            tokens = frozenset(tokens)
+            documents[product_id] = tokens
+            for token in tokens:
+                # Rows come back in pk order, so every posting list stays sorted
+                postings.setdefault(token, array('q')).append(product_id)
+
+        with self._lock:
+            self._postings = postings
+            self._documents = documents
+            self._vocabulary = sorted(postings)
+            self._version = version
+            self._built = True
+        return len(documents)
+
+    def _add(self, product_id, tokens):
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                self._postings[token] = array('q', [product_id])
+                insort(self._vocabulary, token)
+            else:
+                insort(posting, product_id)
+        self._documents[product_id] = tokens
+
+    def _remove(self, product_id):
+        tokens = self._documents.pop(product_id, None)
+        if not tokens:
+            return
+        for token in tokens:
+            posting = self._postings[token]
+            position = bisect_left(posting, product_id)
+            if position < len(posting) and posting[position] == product_id:
+                del posting[position]
+            if not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def _reindex(self, product_ids):
+        from .models import Product
+
+        products = list(
+            Product.objects.filter(pk__in=product_ids, status='ACTIVE')
+            .only('id', 'name', 'description').prefetch_related('tags')
+        )
+        with self._lock:
+            for product_id in product_ids:
+                self._remove(product_id)
+            for product in products:
+                self._add(product.pk, self.product_tokens(product))
+
+    def sync(self, product_ids=()):
+        """
+        Reindex `product_ids` and the products other processes logged as
+        changed since this index was last brought up to date
+        """
+        if not self._built:
+            # Built on the next search, from the current rows
+            return
+        changed = set(product_ids)
+        current = cache.get(INDEX_VERSION_KEY)
+        seen = self._version
+        if current is not None and current != seen:
+            if seen is None or not 0 < current - seen <= MAX_REPLAYED_CHANGES:
+                self.build()
+                return
+            keys = [_change_key(version) for version in range(seen + 1, current + 1)]
+            entries = cache.get_many(keys)
+            if len(entries) < len(keys):
+                # Evicted or expired entries; the log can't be trusted
+                self.build()
+                return
+            for ids in entries.values():
+                changed.update(ids)
+        if changed:
+            self._reindex(changed)
+        if current is not None:
+            with self._lock:
+                self._version = max(current, self._version or current)
+
+    def _publish(self, product_ids):
+        """Log changed products under a new version, then apply them here"""
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        for _ in range(3):
+            try:
+                version = cache.incr(INDEX_VERSION_KEY)
+            except ValueError:
+                _start_change_log()
+                continue
+            # incr isn't atomic on the file cache; never overwrite an entry
+            if cache.add(_change_key(version), product_ids, INDEX_CHANGE_TIMEOUT):
+                break
+        self.sync(product_ids)
+
+    def index_products(self, queryset):
+        # Logged once the write commits, so no process reads the old rows
+        transaction.on_commit(
+            lambda: self._publish(queryset.values_list('pk', flat=True)), using=queryset.db
+        )
+
+    def remove_products(self, product_ids):
+        product_ids = list(product_ids)
+        transaction.on_commit(lambda: self._publish(product_ids))
+
+    def _prefix_matches(self, prefix):
+        position = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            yield self._postings[self._vocabulary[position]]
+            position += 1
+
+    def matching_ids(self, query):
+        """Ids of the indexed products matching every token of the query"""
+        if not self._built:
+            self.build()
+        else:
+            self.sync()
+
+        query_tokens = set(tokenize(query))
+        if not query_tokens:
+            return set()
+
+        matches = None
+        with self._lock:
+            # Start with the most selective token to keep intersections small
+            for token in sorted(query_tokens, key=len, reverse=True):
+                ids = set()
+                for posting in self._prefix_matches(token):
+                    ids.update(posting)
+                matches = ids if matches is None else matches & ids
+                if not matches:
+                    return set()
+        return matches
+
+    def search(self, queryset, query):
+        """
+        Narrow `queryset` to every match; callers filter, order and paginate
+        the result like any other queryset
+        """
+        if not query:
+            return queryset
+        return queryset.filter(pk__in=sorted(self.matching_ids(query)))
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_search_backend():
+    """Return the search backend selected by settings.PRODUCT_SEARCH_BACKEND"""
+    return _load_backend(
+        getattr(settings, 'PRODUCT_SEARCH_BACKEND', 'products.search.DatabaseSearchBackend')
+    )
+
+
+def warm_up():
+    """
+    Build the configured backend's in-process index, if it keeps one, so
+    the first search doesn't pay for it. Called when a server process
+    starts; the index lives in each process, so a management command
+    couldn't build it for the servers.
+    """
+    backend = get_search_backend()
+    if not hasattr(backend, 'build'):
+        return
+    try:
+        backend.build()
+    except DatabaseError:
+        # Left to the first search
+        logger.exception('Could not build the search index at startup')
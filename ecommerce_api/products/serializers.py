@@ -1,6 +1,7 @@
 # products/serializers.py
+from django.db import models
 from rest_framework import serializers
-from .models import Product, Category, Brand, ProductReview, Wishlist, ProductImage
+from .models import Product, ProductQuerySet, Category, Brand, ProductReview, Wishlist, ProductImage
 from django.contrib.auth import get_user_model
 from taggit.serializers import TaggitSerializer, TagListSerializerField
 
@@ -66,6 +67,21 @@ class ProductReviewSerializer(serializers.ModelSerializer):
         validated_data['user'] = user
         return super().create(validated_data)
 
+class ProductListSerializer(serializers.ListSerializer):
+    """
+    Applies Product.objects.for_serialization() to querysets and related
+    managers that have not been evaluated or prefetched yet, so nested
+    `many=True` usages don't fall back to per-row queries.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        if isinstance(data, ProductQuerySet) and data._result_cache is None:
+            data = data.for_serialization()
+        return super().to_representation(data)
+
+
 class ProductSerializer(TaggitSerializer, serializers.ModelSerializer):
     tags = TagListSerializerField(required=False)
     images = ProductImageSerializer(many=True, read_only=True)
@@ -93,6 +109,7 @@ class ProductSerializer(TaggitSerializer, serializers.ModelSerializer):
             'is_in_stock', 'is_low_stock', 'discount_percentage',
             'average_rating', 'review_count'
         ]
+        list_serializer_class = ProductListSerializer
         read_only_fields = [
             'id', 'slug', 'created_by', 'updated_by', 'created_at', 'updated_at',
             'published_at', 'is_in_stock', 'is_low_stock', 'discount_percentage',
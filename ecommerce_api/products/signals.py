@@ -0,0 +1,131 @@
+# products/signals.py
+from django.db.models.signals import post_save, pre_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Product, ProductReview, ProductRatingSummary, ProductImage, Category, Brand
+from .search import get_search_backend, update_search_vectors
+from ecommerce_api.counters import invalidate_counters
+from ecommerce_api.response_cache import CATALOG, invalidate_response_cache, product_group
+
+
+@receiver(post_save, sender=Product)
+def create_rating_summary(sender, instance, created, raw=False, **kwargs):
+    """Create an empty rating summary for new products"""
+    if created and not raw:
+        ProductRatingSummary.objects.get_or_create(product=instance)
+
+
+@receiver(pre_save, sender=ProductReview)
+def remember_previous_review_state(sender, instance, raw=False, **kwargs):
+    """Store the persisted approval state so post_save can compute a delta"""
+    instance._previous_rating_state = None
+    if instance.pk and not raw:
+        instance._previous_rating_state = sender.objects.filter(pk=instance.pk).values(
+            'product_id', 'rating', 'is_approved'
+        ).first()
+
+
+@receiver(post_save, sender=ProductReview)
+def update_rating_summary_on_save(sender, instance, raw=False, **kwargs):
+    """Incrementally update the product rating summary"""
+    if raw:
+        return
+
+    previous = getattr(instance, '_previous_rating_state', None)
+    current = {
+        'product_id': instance.product_id,
+        'rating': instance.rating,
+        'is_approved': instance.is_approved,
+    }
+    if previous == current:
+        return
+
+    if previous and previous['is_approved']:
+        ProductRatingSummary.objects.apply_review_delta(previous['product_id'], previous['rating'], -1)
+    if instance.is_approved:
+        ProductRatingSummary.objects.apply_review_delta(instance.product_id, instance.rating, 1)
+
+
+@receiver(post_delete, sender=ProductReview)
+def update_rating_summary_on_delete(sender, instance, **kwargs):
+    """Remove a deleted approved review from the product rating summary"""
+    if instance.is_approved:
+        ProductRatingSummary.objects.apply_review_delta(instance.product_id, instance.rating, -1)
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_index(sender, instance, raw=False, **kwargs):
+    """Reindex a product in the active search backend when it is saved"""
+    if not raw:
+        get_search_backend().index_products(Product.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_search_index(sender, instance, **kwargs):
+    """Drop a deleted product from the active search backend"""
+    get_search_backend().remove_products([instance.pk])
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def update_search_index_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Tags are searchable, so reindex the affected products when they change"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        get_search_backend().index_products(Product.objects.filter(pk=instance.pk))
+    elif pk_set:
+        get_search_backend().index_products(Product.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+def update_search_vectors_for_related_products(sender, instance, created, raw=False, **kwargs):
+    """
+    Category and brand names are part of the stored search vectors. The
+    in-process index doesn't read them, so it isn't reindexed here.
+    """
+    if not created and not raw:
+        update_search_vectors(instance.products.all())
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_site_counters(sender, raw=False, **kwargs):
+    """Products, approved reviews and categories are counted on the home page"""
+    if not raw:
+        invalidate_counters()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def invalidate_catalog_responses(sender, raw=False, **kwargs):
+    """Category and brand names show up in every cached catalog response"""
+    if not raw:
+        invalidate_response_cache(CATALOG)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def invalidate_product_responses(sender, instance, raw=False, **kwargs):
+    """Expire the cached responses of the one product that changed"""
+    if not raw:
+        invalidate_response_cache(product_group(instance.pk if sender is Product else instance.product_id))
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def invalidate_product_responses_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_response_cache(product_group(instance.pk))
+    elif pk_set:
+        invalidate_response_cache(*[product_group(pk) for pk in pk_set])
@@ -0,0 +1,151 @@
+# products/stock.py
+"""
+Atomic stock changes.
+
+Every change is applied by the database as a single conditional UPDATE:
+
+    UPDATE ... SET quantity = quantity + CASE id WHEN ... END
+    WHERE id IN (...) AND quantity + CASE id WHEN ... END >= 0
+
+so concurrent checkouts can never drive a counter below zero or lose each
+other's updates, no row is read into Python first, and no model signals
+fire. All the rows of one call (e.g. every line of an order) are changed by
+the same statement. On PostgreSQL and SQLite the new levels come back from
+the UPDATE itself via RETURNING; other backends fall back to one
+conditional UPDATE per row.
+"""
+from collections import defaultdict
+
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.db.models.lookups import GreaterThanOrEqual, LessThanOrEqual
+from django.utils import timezone
+
+from ecommerce_api.response_cache import invalidate_response_cache, product_group
+
+
+class InsufficientStock(ValueError):
+    """Raised by all-or-nothing changes when some rows would go negative"""
+
+    def __init__(self, failed):
+        self.failed = failed
+        super().__init__(
+            f"Insufficient stock for {', '.join(str(pk) for pk in failed)}"
+        )
+
+
+def _merge(changes):
+    deltas = defaultdict(int)
+    pairs = changes.items() if hasattr(changes, 'items') else changes
+    for pk, delta in pairs:
+        deltas[pk] += delta
+    return dict(deltas)
+
+
+def _can_return_from_update(connection):
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def _update_returning(model, field, deltas, ceiling, using):
+    """
+    Add `deltas` ({pk: delta}) to `field` with one conditional UPDATE ...
+    RETURNING written against the table; returns {pk: new level} for the
+    rows that were changed.
+    """
+    connection = connections[using]
+    meta = model._meta
+    quote = connection.ops.quote_name
+    pk = quote(meta.pk.column)
+    column = quote(meta.get_field(field).column)
+
+    delta = 'CASE {} {} END'.format(pk, ' '.join(['WHEN %s THEN %s'] * len(deltas)))
+    delta_params = [value for pair in deltas.items() for value in pair]
+    assignments = [f'{column} = {column} + {delta}']
+    params = list(delta_params)
+    now = timezone.now()
+    for model_field in meta.concrete_fields:
+        if getattr(model_field, 'auto_now', False):
+            assignments.append(f'{quote(model_field.column)} = %s')
+            params.append(model_field.get_db_prep_save(now, connection))
+
+    conditions = [f'{pk} IN ({", ".join(["%s"] * len(deltas))})', f'{column} + {delta} >= 0']
+    params += list(deltas) + delta_params
+    if ceiling is not None:
+        conditions.append(f'{column} + {delta} <= {quote(meta.get_field(ceiling).column)}')
+        params += delta_params
+
+    sql = (
+        f'UPDATE {quote(meta.db_table)} SET {", ".join(assignments)} '
+        f'WHERE {" AND ".join(conditions)} RETURNING {pk}, {column}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return dict(cursor.fetchall())
+
+
+def _update_each(model, field, deltas, ceiling, using):
+    """_update_returning() for backends without RETURNING: one conditional UPDATE per row"""
+    manager = model._default_manager.using(using)
+    values = {}
+    now = timezone.now()
+    for model_field in model._meta.concrete_fields:
+        if getattr(model_field, 'auto_now', False):
+            values[model_field.attname] = now
+
+    updated = []
+    for pk, delta in deltas.items():
+        conditions = [GreaterThanOrEqual(F(field) + delta, 0)]
+        if ceiling is not None:
+            conditions.append(LessThanOrEqual(F(field) + delta, F(ceiling)))
+        if manager.filter(*conditions, pk=pk).update(**{field: F(field) + delta}, **values):
+            updated.append(pk)
+    return dict(manager.filter(pk__in=updated).values_list('pk', field))
+
+
+def apply_stock_changes(model, field, changes, *, ceiling=None, all_or_nothing=False, using=None):
+    """
+    Add signed deltas to an integer stock column without letting it go negative.
+
+    `changes` maps primary keys to deltas (negative removes stock); an
+    iterable of (pk, delta) pairs is accepted too and repeated keys are
+    summed. Returns {pk: new level}, with None for rows that were left
+    untouched because they don't have enough stock (or don't exist).
+
+    `ceiling` names another column the new level may not exceed, e.g.
+    reservations can't grow past the stock level of the same row.
+
+    With `all_or_nothing` a single failure rolls back the whole change and
+    raises InsufficientStock.
+    """
+    deltas = _merge(changes)
+    if not deltas:
+        return {}
+    using = using or router.db_for_write(model)
+    if _can_return_from_update(connections[using]):
+        update = _update_returning
+    else:
+        update = _update_each
+
+    with transaction.atomic(using=using):
+        levels = dict.fromkeys(deltas)
+        levels.update(update(model, field, deltas, ceiling, using))
+        failed = [pk for pk, level in levels.items() if level is None]
+        if all_or_nothing and failed:
+            raise InsufficientStock(failed)
+    return levels
+
+
+def change_product_stock(changes, **kwargs):
+    """apply_stock_changes() for Product.quantity"""
+    from .models import Product
+
+    levels = apply_stock_changes(Product, 'quantity', changes, **kwargs)
+    changed = [product_group(pk) for pk, level in levels.items() if level is not None]
+    if changed:
+        # Stock shows up in the cached product responses, and update() sends no signals
+        invalidate_response_cache(*changed)
+    return levels
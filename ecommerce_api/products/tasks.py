@@ -0,0 +1,26 @@
+from celery import shared_task
+from django.core.management import call_command
+from .copurchases import update
+from .recommendations import build
+
+@shared_task
+def build_product_recommendations_task():
+    """
+    Celery task to recompute the precomputed product recommendations
+    """
+    return build()
+
+@shared_task
+def update_copurchases_task():
+    """
+    Celery task to fold newly paid orders into the co-purchase counts
+    """
+    return update()
+
+@shared_task
+def prune_activity_task():
+    """
+    Celery task to roll up product activity, create the upcoming monthly
+    partitions and archive expired activity months
+    """
+    call_command('prune_activity')
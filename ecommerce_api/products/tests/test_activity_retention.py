@@ -0,0 +1,162 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from ecommerce_api.partitions import (
+    add_months, ensure_partitions, expire_months, is_partitioned, month_start, partition_by_month,
+    partition_name, unpartition
+)
+from products.models import Product, ProductActivity, ProductActivityDaily
+from users.models import UserActivity
+
+User = get_user_model()
+
+
+def at(day, hour=12):
+    return timezone.make_aware(datetime.combine(day, time(hour)))
+
+
+class ActivityRetentionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='user@example.com', password='pass')
+        self.product = Product.objects.create(
+            name='Lamp', slug='lamp', price=Decimal('10.00'), sku='LAMP1'
+        )
+        UserActivity.objects.all().delete()
+
+    def activity(self, day, action='view', hour=12):
+        return ProductActivity.objects.create(
+            product=self.product, user=self.user, action=action, timestamp=at(day, hour)
+        )
+
+    def archived(self, table, month):
+        with connection.cursor() as cursor:
+            if partition_name(table, month) not in connection.introspection.table_names(cursor):
+                return None
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(partition_name(table, month))}')
+            return cursor.fetchone()[0]
+
+    def test_rollup_counts_actions_per_day(self):
+        for action in ('view', 'view', 'purchase', 'stock_update'):
+            self.activity(date(2024, 3, 1), action)
+        self.activity(date(2024, 3, 2), 'wishlist_add', hour=0)
+
+        self.assertEqual(ProductActivityDaily.objects.rollup(date(2024, 3, 1), date(2024, 3, 2)), 2)
+        self.assertEqual(
+            list(ProductActivityDaily.objects.order_by('date').values_list(
+                'date', 'views', 'purchases', 'wishlist_adds'
+            )),
+            [(date(2024, 3, 1), 2, 1, 0), (date(2024, 3, 2), 0, 0, 1)]
+        )
+        # Rerunning replaces the counts instead of adding to them
+        self.activity(date(2024, 3, 1))
+        ProductActivityDaily.objects.rollup(date(2024, 3, 1), date(2024, 3, 1))
+        self.assertEqual(ProductActivityDaily.objects.get(date=date(2024, 3, 1)).views, 3)
+
+    def test_expired_months_are_archived(self):
+        for day in (date(2024, 1, 10), date(2024, 1, 31), date(2024, 2, 5), date(2024, 3, 1)):
+            self.activity(day)
+
+        removed = expire_months(ProductActivity, date(2024, 3, 15))
+        self.assertEqual(removed, [date(2024, 1, 1), date(2024, 2, 1)])
+        table = ProductActivity._meta.db_table
+        self.assertEqual(self.archived(table, date(2024, 1, 1)), 2)
+        self.assertEqual(self.archived(table, date(2024, 2, 1)), 1)
+        self.assertEqual(ProductActivity.objects.count(), 1)
+
+    def test_expired_months_can_be_dropped(self):
+        self.activity(date(2024, 1, 10))
+        self.assertEqual(expire_months(ProductActivity, date(2024, 2, 1), archive=False), [date(2024, 1, 1)])
+        self.assertIsNone(self.archived(ProductActivity._meta.db_table, date(2024, 1, 1)))
+        self.assertFalse(ProductActivity.objects.exists())
+
+    def test_prune_command_rolls_up_before_archiving(self):
+        this_month = month_start(timezone.localdate())
+        old_month = add_months(this_month, -3)
+        self.activity(old_month)
+        self.activity(old_month, 'purchase')
+        self.activity(timezone.localdate())
+        UserActivity.objects.create(user=self.user, action='login', timestamp=at(old_month))
+
+        call_command('prune_activity', '--keep-months', '2', stdout=StringIO())
+
+        self.assertEqual(ProductActivity.objects.count(), 1)
+        self.assertFalse(UserActivity.objects.exists())
+        self.assertEqual(self.archived(UserActivity._meta.db_table, old_month), 1)
+        daily = ProductActivityDaily.objects.get(date=old_month)
+        self.assertEqual((daily.views, daily.purchases), (1, 1))
+        self.assertTrue(ProductActivityDaily.objects.filter(date=timezone.localdate(), views=1).exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Table partitioning needs PostgreSQL')
+class PartitionedActivityTest(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Lamp', slug='lamp', price=Decimal('10.00'), sku='LAMP1'
+        )
+        self.table = ProductActivity._meta.db_table
+
+    def partition_rows(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(name)}')
+            return cursor.fetchone()[0]
+
+    def test_migrations_partition_both_tables(self):
+        self.assertTrue(is_partitioned(connection, self.table))
+        self.assertTrue(is_partitioned(connection, UserActivity._meta.db_table))
+
+    def test_rows_in_the_default_partition_get_their_month(self):
+        later = add_months(month_start(timezone.localdate()), 6)
+        ProductActivity.objects.create(product=self.product, action='view', timestamp=at(later))
+        self.assertEqual(self.partition_rows(f'{self.table}_default'), 1)
+
+        # Would fail with "updated partition constraint for default partition would be violated"
+        ensure_partitions(ProductActivity, months_ahead=6)
+        self.assertEqual(self.partition_rows(f'{self.table}_default'), 0)
+        self.assertEqual(self.partition_rows(partition_name(self.table, later)), 1)
+        self.assertEqual(ProductActivity.objects.count(), 1)
+
+    def test_expired_rows_in_the_default_partition_are_archived(self):
+        ProductActivity.objects.create(product=self.product, action='view', timestamp=at(date(2024, 1, 10)))
+        self.assertEqual(expire_months(ProductActivity, date(2024, 3, 1)), [date(2024, 1, 1)])
+        self.assertFalse(ProductActivity.objects.exists())
+        self.assertEqual(self.partition_rows(partition_name(self.table, date(2024, 1, 1))), 1)
+
+    def test_unpartition_and_partition_again_keep_rows(self):
+        for day in (date(2024, 1, 10), date(2024, 2, 10), timezone.localdate()):
+            ProductActivity.objects.create(product=self.product, action='view', timestamp=at(day))
+        ids = set(ProductActivity.objects.values_list('id', flat=True))
+        with connection.cursor() as cursor:
+            # Deferred foreign key checks would block the table rewrites
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+        with connection.schema_editor() as schema_editor:
+            unpartition(schema_editor, ProductActivity)
+        self.assertFalse(is_partitioned(connection, self.table))
+        self.assertEqual(set(ProductActivity.objects.values_list('id', flat=True)), ids)
+        self.assertGreater(
+            ProductActivity.objects.create(product=self.product, action='view', timestamp=timezone.now()).id,
+            max(ids)
+        )
+
+        with connection.schema_editor() as schema_editor:
+            partition_by_month(schema_editor, ProductActivity)
+        self.assertTrue(is_partitioned(connection, self.table))
+        self.assertEqual(ProductActivity.objects.count(), 4)
+        self.assertEqual(self.partition_rows(partition_name(self.table, date(2024, 2, 1))), 1)
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, self.table)
+        self.assertIn(f'{self.table}_pkey', constraints)
+        self.assertEqual(
+            sorted(
+                info['foreign_key'][0] for info in constraints.values() if info['foreign_key']
+            ),
+            ['products_product', 'users_customuser'],
+        )
@@ -0,0 +1,135 @@
+import threading
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from orders.models import Order, OrderItem
+from products import copurchases
+from products.models import Product, ProductCoPurchase
+
+User = get_user_model()
+
+
+class CoPurchaseTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(email='buyer@example.com', password='pass')
+        self.a, self.b, self.c, self.d = [
+            Product.objects.create(
+                name=name, slug=name.lower(), price=Decimal('3.00'), sku=f'CO{name}', status='ACTIVE'
+            )
+            for name in 'ABCD'
+        ]
+        self.order([self.a, self.b, self.c], 'PAID')
+        self.order([self.a, self.b], 'PAID')
+        self.pending = self.order([self.a, self.c], 'PENDING')
+        self.order([self.a, self.d], 'PAID')
+
+    def order(self, products, payment_status):
+        order = Order.objects.create(
+            user=self.user, shipping_address='1 Street', shipping_city='City',
+            shipping_state='State', shipping_zip_code='12345', shipping_country='Country',
+            email='buyer@example.com', subtotal=Decimal('0.00'), tax_amount=Decimal('0.00'),
+            shipping_cost=Decimal('0.00'), total=Decimal('0.00'), payment_status=payment_status
+        )
+        for product in products:
+            OrderItem.objects.create(
+                order=order, product=product, quantity=1, price=product.price,
+                product_name=product.name, product_sku=product.sku
+            )
+        return order
+
+    def pairs(self, product):
+        return dict(ProductCoPurchase.objects.filter(product=product).values_list('other_id', 'count'))
+
+
+class CoPurchaseTest(CoPurchaseTestMixin, TestCase):
+    def test_update_counts_new_paid_orders_once(self):
+        self.assertEqual(copurchases.update(), 3)
+        self.assertEqual(self.pairs(self.a), {self.b.pk: 2, self.c.pk: 1, self.d.pk: 1})
+        self.assertEqual(self.pairs(self.c), {self.a.pk: 1, self.b.pk: 1})
+        self.assertEqual(copurchases.update(), 0)
+
+        self.pending.payment_status = 'PAID'
+        self.pending.save()
+        self.assertEqual(copurchases.update(), 1)
+        self.assertEqual(self.pairs(self.a), {self.b.pk: 2, self.c.pk: 2, self.d.pk: 1})
+
+    def test_bounded_memory_and_pairs(self):
+        # Writing after every batch gives the same counts
+        self.assertEqual(copurchases.update(chunk_size=1, max_pairs=1), 3)
+        self.assertEqual(self.pairs(self.a), {self.b.pk: 2, self.c.pk: 1, self.d.pk: 1})
+
+        self.assertEqual(copurchases.rebuild(keep=2), 3)
+        self.assertEqual(self.pairs(self.a), {self.b.pk: 2, self.c.pk: 1})
+
+    def test_endpoint(self):
+        out = StringIO()
+        call_command('update_copurchases', stdout=out)
+        self.assertIn('in 3 orders', out.getvalue())
+
+        client = APIClient()
+        # The products with their tags and images
+        with self.assertNumQueries(3):
+            response = client.get(f'/api/products/{self.a.pk}/bought-together/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['id'], row['bought_together_count']) for row in response.json()],
+            [(self.b.pk, 2), (self.c.pk, 1), (self.d.pk, 1)]
+        )
+        response = client.get(f'/api/products/{self.a.pk}/bought-together/', {'limit': 1})
+        self.assertEqual([row['id'] for row in response.json()], [self.b.pk])
+        self.assertEqual(client.get('/api/products/999999/bought-together/').status_code, 404)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Row locks need PostgreSQL')
+class ConcurrentCoPurchaseTest(CoPurchaseTestMixin, TransactionTestCase):
+    def test_orders_claimed_by_another_run_are_skipped(self):
+        locked, release = threading.Event(), threading.Event()
+
+        def other_run():
+            with transaction.atomic():
+                list(Order.objects.select_for_update().filter(payment_status='PAID'))
+                locked.set()
+                release.wait(10)
+            connection.close()
+
+        thread = threading.Thread(target=other_run)
+        thread.start()
+        locked.wait(10)
+        try:
+            self.assertEqual(copurchases.update(), 0)
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(copurchases.update(), 3)
+        self.assertEqual(self.pairs(self.a), {self.b.pk: 2, self.c.pk: 1, self.d.pk: 1})
+
+    def test_merge_leaves_product_rows_unlocked(self):
+        locked, release = threading.Event(), threading.Event()
+
+        def checkout():
+            with transaction.atomic():
+                # What the stock UPDATEs of a checkout hold
+                list(Product.objects.select_for_update(no_key=True))
+                locked.set()
+                release.wait(10)
+            connection.close()
+
+        thread = threading.Thread(target=checkout)
+        thread.start()
+        locked.wait(10)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SET lock_timeout = '2s'")
+            self.assertEqual(copurchases.update(), 3)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('RESET lock_timeout')
+            release.set()
+            thread.join()
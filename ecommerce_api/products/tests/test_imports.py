@@ -0,0 +1,173 @@
+import gzip
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from products.imports import ProductImporter, read_rows
+from products.models import Brand, Category, Product, ProductRatingSummary
+
+User = get_user_model()
+
+CSV = (
+    'sku,name,description,price,quantity,status,category,brand,tags\n'
+    'IMP1,Desk Lamp,Bright,19.99,5,ACTIVE,Lighting,Acme,"desk, light"\n'
+    'IMP2,Desk Lamp,Dim,9.50,0,DRAFT,Lighting,,\n'
+)
+
+
+def rows(text, format='csv'):
+    return read_rows(StringIO(text), format)
+
+
+class ProductImportTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', password='pass', is_staff=True)
+
+    def test_creates_products(self):
+        stats = ProductImporter(user=self.staff).run(rows(CSV))
+        self.assertEqual((stats['rows'], stats['created'], stats['updated'], stats['failed']), (2, 2, 0, 0))
+
+        lamp = Product.objects.get(sku='IMP1')
+        self.assertEqual(lamp.price, Decimal('19.99'))
+        self.assertEqual(lamp.category.name, 'Lighting')
+        self.assertEqual(lamp.brand.name, 'Acme')
+        self.assertEqual(sorted(lamp.tags.names()), ['desk', 'light'])
+        self.assertEqual(lamp.created_by, self.staff)
+        self.assertIsNotNone(lamp.published_at)
+        self.assertTrue(ProductRatingSummary.objects.filter(product=lamp).exists())
+
+        other = Product.objects.get(sku='IMP2')
+        self.assertIsNone(other.brand)
+        self.assertIsNone(other.published_at)
+        # Same name, different slugs
+        self.assertEqual((lamp.slug, other.slug), ('desk-lamp', 'desk-lamp-1'))
+        self.assertEqual(Category.objects.filter(name='Lighting').count(), 1)
+
+    def test_updates_keep_omitted_columns(self):
+        ProductImporter().run(rows(CSV))
+        lamp = Product.objects.get(sku='IMP1')
+
+        stats = ProductImporter().run(rows('{"sku": "IMP1", "price": "24.00"}\n', 'ndjson'))
+        self.assertEqual((stats['created'], stats['updated']), (0, 1))
+        updated = Product.objects.get(sku='IMP1')
+        self.assertEqual(updated.pk, lamp.pk)
+        self.assertEqual(updated.price, Decimal('24.00'))
+        self.assertEqual((updated.name, updated.slug, updated.quantity), ('Desk Lamp', 'desk-lamp', 5))
+        self.assertEqual(updated.category_id, lamp.category_id)
+        self.assertEqual(sorted(updated.tags.names()), ['desk', 'light'])
+
+        ProductImporter().run(rows('{"sku": "IMP1", "name": "Floor Lamp", "tags": ["floor"]}\n', 'ndjson'))
+        updated = Product.objects.get(sku='IMP1')
+        self.assertEqual(updated.slug, 'floor-lamp')
+        self.assertEqual(list(updated.tags.names()), ['floor'])
+
+    def test_slugs_avoid_existing_products(self):
+        Product.objects.create(name='Desk Lamp', slug='desk-lamp', sku='OLD1', price=Decimal('1.00'))
+        Product.objects.create(name='Desk Lamp', slug='desk-lamp-1', sku='OLD2', price=Decimal('1.00'))
+        ProductImporter().run(rows(CSV))
+        self.assertEqual(
+            sorted(Product.objects.filter(sku__startswith='IMP').values_list('slug', flat=True)),
+            ['desk-lamp-2', 'desk-lamp-3'],
+        )
+
+    def test_slugs_taken_meanwhile_are_picked_again(self):
+        importer = ProductImporter()
+        assign_slugs = importer._assign_slugs
+
+        def racing_writer(products, existing):
+            assign_slugs(products, existing)
+            if not Product.objects.filter(sku='RACE').exists():
+                Product.objects.create(name='Desk Lamp', slug='desk-lamp', sku='RACE', price=Decimal('1.00'))
+
+        with mock.patch.object(importer, '_assign_slugs', side_effect=racing_writer):
+            stats = importer.run(rows(CSV))
+        self.assertEqual((stats['created'], stats['failed']), (2, 0))
+        self.assertEqual(
+            sorted(Product.objects.filter(sku__startswith='IMP').values_list('slug', flat=True)),
+            ['desk-lamp-1', 'desk-lamp-2'],
+        )
+
+    def test_invalid_rows_are_reported(self):
+        text = (
+            'sku,name,description,price,quantity,compare_price\n'
+            'BAD1,Lamp,Text,free,1,\n'
+            'BAD2,Lamp,Text,5.00,-1,\n'
+            'BAD3,Lamp,Text,5.00,1,4.00\n'
+            ',Lamp,Text,5.00,1,\n'
+            'GOOD,Lamp,Text,5.00,1,6.00\n'
+        )
+        stats = ProductImporter().run(rows(text))
+        self.assertEqual((stats['created'], stats['failed']), (1, 4))
+        errors = {error['line']: error for error in stats['errors']}
+        self.assertEqual(sorted(errors), [2, 3, 4, 5])
+        self.assertIn('price', errors[2]['errors'])
+        self.assertIn('quantity', errors[3]['errors'])
+        self.assertIn('compare_price', errors[4]['errors'])
+        self.assertIn('sku', errors[5]['errors'])
+
+        # New products need the required columns; bad JSON is reported per line
+        stats = ProductImporter().run(rows('{"sku": "NEW", "price": "2.00"}\nnot json\n[1]\n', 'ndjson'))
+        self.assertEqual(stats['failed'], 3)
+        self.assertEqual([error['line'] for error in stats['errors']], [2, 3, 1])
+        self.assertIn('name', stats['errors'][2]['errors'])
+
+    def test_queries_per_chunk_are_constant(self):
+        def queries(size):
+            text = ''.join(
+                json.dumps({
+                    'sku': f'Q{size}-{i}', 'name': f'Item {size} {i}', 'description': 'x', 'price': '1.00',
+                    'category': f'Category {i % 3}', 'brand': 'Acme', 'tags': ['a', 'b'],
+                }) + '\n'
+                for i in range(size)
+            )
+            importer = ProductImporter(chunk_size=1000)
+            # Warm the name maps so both runs create nothing but products
+            importer.run(rows(text.replace('"Q', '"W'), 'ndjson'))
+            with CaptureQueriesContext(connection) as context:
+                importer.run(rows(text, 'ndjson'))
+            return len(context)
+
+        # Small enough for one bulk INSERT under SQLite's parameter limit
+        self.assertEqual(queries(5), queries(30))
+
+    def test_command(self):
+        out, err = StringIO(), StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'products.csv.gz')
+            with gzip.open(path, 'wt') as file:
+                file.write(CSV + 'IMP3,Broken,,x,1,,,,\n')
+            call_command(
+                'import_products', path, '--batch-size', '2', '--user', 'staff@example.com',
+                stdout=out, stderr=err
+            )
+        self.assertIn('2 rows: 2 created, 0 updated, 0 failed', out.getvalue())
+        self.assertIn('Imported 3 rows', out.getvalue())
+        self.assertIn('line 4 (IMP3)', err.getvalue())
+        self.assertEqual(Product.objects.get(sku='IMP1').created_by, self.staff)
+
+    def test_staff_endpoint(self):
+        client = APIClient()
+        url = '/api/products/import/'
+        client.force_authenticate(User.objects.create_user(email='user@example.com', password='pass'))
+        upload = SimpleUploadedFile('products.csv', CSV.encode())
+        self.assertEqual(client.post(url, {'file': upload}).status_code, 403)
+
+        client.force_authenticate(self.staff)
+        self.assertEqual(client.post(url, {}).status_code, 400)
+        upload = SimpleUploadedFile('products.ndjson', b'{"sku": "IMP9", "name": "Rug", "description": "Red", "price": "30"}\n')
+        response = client.post(url, {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(Product.objects.get(sku='IMP9').updated_by, self.staff)
+        self.assertFalse(Brand.objects.exists())
@@ -1,9 +1,15 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.contrib.admin.sites import AdminSite
+from django.core.management import call_command
 from django.utils import timezone
 from decimal import Decimal
+from io import StringIO
+from unittest.mock import MagicMock
+from products.admin import ProductReviewAdmin
 from products.models import (
-    Category, Brand, Product, ProductImage, ProductReview, ProductActivity, Wishlist
+    Category, Brand, Product, ProductImage, ProductReview, ProductActivity, Wishlist,
+    ProductRatingSummary
 )
 
 User = get_user_model()
@@ -120,6 +126,32 @@ class ProductModelTest(TestCase):
         self.assertEqual(self.product.average_rating, 5)
         self.assertEqual(self.product.review_count, 1)
 
+    def test_with_catalog_aggregates(self):
+        user2 = User.objects.create_user(email='user2@example.com', password='pass1234')
+        user3 = User.objects.create_user(email='user3@example.com', password='pass1234')
+        ProductReview.objects.create(
+            product=self.product, user=self.user, rating=5,
+            title="Great!", comment="Loved it", is_approved=True
+        )
+        ProductReview.objects.create(
+            product=self.product, user=user2, rating=4,
+            title="Good", comment="Nice", is_approved=True
+        )
+        ProductReview.objects.create(
+            product=self.product, user=user3, rating=1,
+            title="Bad", comment="Pending", is_approved=False
+        )
+
+        product = Product.objects.with_catalog_aggregates().get(pk=self.product.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(product.average_rating, 4.5)
+            self.assertEqual(product.review_count, 2)
+
+    def test_with_catalog_aggregates_no_reviews(self):
+        product = Product.objects.with_catalog_aggregates().get(pk=self.product.pk)
+        self.assertEqual(product.average_rating, 0)
+        self.assertEqual(product.review_count, 0)
+
 
 class ProductImageModelTest(TestCase):
     def setUp(self):
@@ -167,6 +199,82 @@ class ProductReviewModelTest(TestCase):
         self.assertIn(self.product.name, str(self.review))
 
 
+class ProductRatingSummaryTest(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f'rater{i}@example.com', password='pass')
+            for i in range(3)
+        ]
+        self.product = Product.objects.create(
+            name="Rated Product", slug="rated-product", description="desc", price=Decimal('20.00'), sku="SKU5"
+        )
+
+    def summary(self):
+        return ProductRatingSummary.objects.get(product=self.product)
+
+    def test_summary_created_with_product(self):
+        summary = self.summary()
+        self.assertEqual(summary.review_count, 0)
+        self.assertEqual(summary.average_rating, 0)
+
+    def test_approved_reviews_update_summary(self):
+        ProductReview.objects.create(
+            product=self.product, user=self.users[0], rating=5, title="t", comment="c", is_approved=True
+        )
+        pending = ProductReview.objects.create(
+            product=self.product, user=self.users[1], rating=2, title="t", comment="c"
+        )
+        summary = self.summary()
+        self.assertEqual(summary.review_count, 1)
+        self.assertEqual(summary.rating_sum, 5)
+
+        pending.is_approved = True
+        pending.save()
+        summary = self.summary()
+        self.assertEqual(summary.review_count, 2)
+        self.assertEqual(summary.average_rating, 3.5)
+        self.assertEqual(summary.histogram, {1: 0, 2: 1, 3: 0, 4: 0, 5: 1})
+
+        pending.rating = 4
+        pending.save()
+        self.assertEqual(self.summary().histogram, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+        pending.delete()
+        summary = self.summary()
+        self.assertEqual(summary.review_count, 1)
+        self.assertEqual(summary.average_rating, 5)
+
+    def test_admin_bulk_actions_update_summary(self):
+        for user, rating in zip(self.users, [5, 4, 3]):
+            ProductReview.objects.create(
+                product=self.product, user=user, rating=rating, title="t", comment="c"
+            )
+        review_admin = ProductReviewAdmin(ProductReview, AdminSite())
+        review_admin.message_user = MagicMock()
+
+        review_admin.approve_reviews(None, ProductReview.objects.all())
+        self.assertEqual(self.summary().review_count, 3)
+        self.assertEqual(self.summary().average_rating, 4)
+
+        review_admin.disapprove_reviews(None, ProductReview.objects.filter(rating=3))
+        self.assertEqual(self.summary().review_count, 2)
+        self.assertEqual(self.summary().average_rating, 4.5)
+
+    def test_rebuild_command(self):
+        ProductReview.objects.create(
+            product=self.product, user=self.users[0], rating=4, title="t", comment="c", is_approved=True
+        )
+        ProductRatingSummary.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_rating_summaries', stdout=out)
+        summary = self.summary()
+        self.assertEqual(summary.review_count, 1)
+        self.assertEqual(summary.rating_4, 1)
+        self.assertEqual(summary.average_rating, 4)
+        self.assertIn('Rebuilt rating summaries', out.getvalue())
+
+
 class ProductActivityModelTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(email='tester@example.com', password='pass')
@@ -0,0 +1,105 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from orders.models import Order, OrderItem
+from products.models import Category, Product, ProductRecommendation
+from products.recommendations import build, recommend
+
+User = get_user_model()
+
+
+class RecommendationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='buyer@example.com', password='pass')
+        lighting = Category.objects.create(name='Lighting', slug='lighting')
+        parts = Category.objects.create(name='Parts', slug='parts')
+        self.lamp = self.product('Lamp', lighting, ['light', 'desk'])
+        self.bulb = self.product('Bulb', parts, ['light'])
+        self.desk_lamp = self.product('Desk lamp', lighting, ['light', 'desk'])
+        self.chair = self.product('Chair', lighting)
+        self.mug = self.product('Mug', is_featured=True)
+        self.orphan = self.product('Orphan')
+
+        for _ in range(2):
+            self.order([self.lamp, self.bulb], 'PAID')
+        self.order([self.lamp, self.chair], 'PENDING')
+
+    def product(self, name, category=None, tags=(), is_featured=False):
+        product = Product.objects.create(
+            name=name, slug=name.lower().replace(' ', '-'), price=Decimal('10.00'),
+            sku=name.upper().replace(' ', ''), category=category, is_featured=is_featured,
+            status='ACTIVE'
+        )
+        product.tags.add(*tags)
+        return product
+
+    def order(self, products, payment_status):
+        order = Order.objects.create(
+            user=self.user, shipping_address='1 Street', shipping_city='City',
+            shipping_state='State', shipping_zip_code='12345', shipping_country='Country',
+            email='buyer@example.com', subtotal=Decimal('0.00'), tax_amount=Decimal('0.00'),
+            shipping_cost=Decimal('0.00'), total=Decimal('0.00'), payment_status=payment_status
+        )
+        for product in products:
+            OrderItem.objects.create(
+                order=order, product=product, quantity=1, price=product.price,
+                product_name=product.name, product_sku=product.sku
+            )
+
+    def ids(self, product):
+        return ProductRecommendation.objects.get(product=product).product_ids
+
+    def test_build_scores_category_tags_and_purchases(self):
+        self.assertEqual(build(), 6)
+        # Bought together twice beats identical tags in the same category
+        self.assertEqual(self.ids(self.lamp), [self.bulb.pk, self.desk_lamp.pk, self.chair.pk])
+        self.assertEqual(self.ids(self.bulb), [self.lamp.pk, self.desk_lamp.pk])
+        # Nothing in common with anything: featured products
+        self.assertEqual(self.ids(self.orphan), [self.mug.pk])
+        self.assertEqual(self.ids(self.mug), [])
+
+        self.assertEqual(build(k=1), 6)
+        self.assertEqual(self.ids(self.lamp), [self.bulb.pk])
+
+    def test_only_product_in_category_or_tag_gets_featured(self):
+        alone = self.product('Vase', Category.objects.create(name='Decor', slug='decor'))
+        unique_tag = self.product('Rug', tags=['woven'])
+        build()
+        self.assertEqual(self.ids(alone), [self.mug.pk])
+        self.assertEqual(self.ids(unique_tag), [self.mug.pk])
+
+    def test_rebuild_drops_inactive_products(self):
+        build()
+        self.chair.status = 'INACTIVE'
+        self.chair.save()
+        build()
+        self.assertFalse(ProductRecommendation.objects.filter(product=self.chair).exists())
+        self.assertNotIn(self.chair.pk, self.ids(self.lamp))
+
+    def test_recommend_samples_the_stored_ids(self):
+        build()
+        with CaptureQueriesContext(connection) as queries:
+            picked = recommend(self.lamp, limit=2)
+        self.assertEqual(len(picked), 2)
+        self.assertTrue({product.pk for product in picked} <= {self.bulb.pk, self.desk_lamp.pk, self.chair.pk})
+        self.assertFalse(any('RANDOM' in query['sql'].upper() for query in queries))
+
+    def test_recommend_before_first_build(self):
+        picked = recommend(self.lamp, limit=5)
+        self.assertEqual({product.pk for product in picked}, {self.desk_lamp.pk, self.chair.pk})
+
+    def test_api_and_command(self):
+        out = StringIO()
+        call_command('build_recommendations', '--per-product', '2', stdout=out)
+        self.assertIn('Built 2 recommendations for each of 6 products', out.getvalue())
+
+        response = APIClient().get(f'/api/products/{self.lamp.pk}/recommendations/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['id'] for row in response.json()}, {self.bulb.pk, self.desk_lamp.pk})
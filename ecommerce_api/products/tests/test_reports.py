@@ -0,0 +1,82 @@
+import csv
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+from products.utils import generate_product_report
+
+User = get_user_model()
+
+
+class ProductReportTest(TestCase):
+    def setUp(self):
+        lighting = Category.objects.create(name='Lighting', slug='lighting')
+        # (category, status, quantity, price)
+        rows = [
+            (lighting, 'ACTIVE', 0, '10.00'),
+            (lighting, 'ACTIVE', 4, '2.50'),
+            (lighting, 'DRAFT', 10, '1.00'),
+            (None, 'ACTIVE', 6, '5.00'),
+        ]
+        for i, (category, status, quantity, price) in enumerate(rows):
+            Product.objects.create(
+                name=f'Item {i}', slug=f'item-{i}', sku=f'REP{i}', category=category,
+                status=status, quantity=quantity, price=Decimal(price)
+            )
+
+    def test_report_is_one_query(self):
+        with self.assertNumQueries(1):
+            report = generate_product_report(Product.objects.all())
+        self.assertEqual(report, {
+            'total_products': 4,
+            'active_products': 3,
+            'out_of_stock': 1,
+            'low_stock': 1,
+            'total_value': Decimal('50.00'),
+            'average_price': Decimal('2.50'),
+            'by_category': {'Lighting': 3, 'Uncategorized': 1},
+            'by_status': {'ACTIVE': 3, 'DRAFT': 1},
+        })
+
+    def test_empty_and_zero_stock(self):
+        Product.objects.update(quantity=0)
+        self.assertEqual(generate_product_report(Product.objects.all())['average_price'], Decimal('0.00'))
+        self.assertEqual(generate_product_report(Product.objects.none())['total_products'], 0)
+
+    def test_csv_and_json(self):
+        lines = list(csv.reader(''.join(generate_product_report(Product.objects.all(), format='csv')).splitlines()))
+        self.assertEqual(lines[0], ['category', 'status', 'products', 'out_of_stock', 'low_stock', 'quantity', 'value'])
+        self.assertIn(['Lighting', 'ACTIVE', '2', '1', '1', '4', '10.00'], lines)
+        self.assertEqual(len(lines), 4)
+
+        report = json.loads(''.join(generate_product_report(Product.objects.all(), format='json')))
+        self.assertEqual(report['total_value'], '50.00')
+
+    def test_staff_endpoint(self):
+        client = APIClient()
+        url = '/api/products/report/'
+        client.force_authenticate(User.objects.create_user(email='user@example.com', password='pass'))
+        self.assertEqual(client.get(url).status_code, 403)
+
+        client.force_authenticate(User.objects.create_user(
+            email='staff@example.com', password='pass', is_staff=True
+        ))
+        response = client.get(url, {'status': 'ACTIVE'})
+        self.assertEqual(response.json()['total_products'], 3)
+
+        response = client.get(url, {'output': 'csv', 'category': 'lighting'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 3)
+        self.assertEqual(client.get(url, {'output': 'xml'}).status_code, 400)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('product_report', '--format', 'csv', '--status', 'DRAFT', stdout=out)
+        self.assertEqual(out.getvalue().splitlines()[1], 'Lighting,DRAFT,1,0,0,10,10.00')
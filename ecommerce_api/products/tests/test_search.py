@@ -0,0 +1,201 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from decimal import Decimal
+from products.models import Product, Category, Brand
+from products.search import (
+    INDEX_VERSION_KEY, DatabaseSearchBackend, InvertedIndexSearchBackend, _change_key,
+    full_text_search_available, get_search_backend, tokenize, update_search_vectors, warm_up
+)
+
+
+class DatabaseSearchBackendTest(TestCase):
+    def setUp(self):
+        self.backend = DatabaseSearchBackend()
+        self.category = Category.objects.create(name="Computers", slug="computers")
+        self.brand = Brand.objects.create(name="Acme")
+        self.laptop = Product.objects.create(
+            name="Ultrabook Pro", description="Thin and light laptop", price=Decimal('999.00'),
+            sku="LAP1", category=self.category, brand=self.brand, status='ACTIVE'
+        )
+        self.laptop.tags.add("portable")
+        self.mouse = Product.objects.create(
+            name="Wireless Mouse", description="Ergonomic mouse", price=Decimal('25.00'),
+            sku="MOU1", category=self.category, status='ACTIVE'
+        )
+
+    def test_empty_query_returns_queryset_unchanged(self):
+        queryset = Product.objects.all()
+        self.assertIs(self.backend.search(queryset, ''), queryset)
+
+    def test_search_matches_name_description_and_tags(self):
+        queryset = Product.objects.filter(status='ACTIVE')
+        self.assertEqual(list(self.backend.search(queryset, 'ultrabook')), [self.laptop])
+        self.assertEqual(list(self.backend.search(queryset, 'ergonomic')), [self.mouse])
+        self.assertEqual(list(self.backend.search(queryset, 'portable')), [self.laptop])
+
+    def test_search_results_are_distinct(self):
+        self.laptop.tags.add("pro-laptop")
+        results = self.backend.search(Product.objects.all(), 'laptop')
+        self.assertEqual(list(results), [self.laptop])
+
+    def test_rename_updates_vectors_in_one_statement(self):
+        if not full_text_search_available():
+            self.skipTest("Search vectors need PostgreSQL")
+        queryset = Product.objects.filter(status='ACTIVE')
+        self.assertEqual(list(self.backend.search(queryset, 'acme portable')), [self.laptop])
+
+        for i in range(5):
+            Product.objects.create(
+                name=f"Cable {i}", price=Decimal('5.00'), sku=f"CAB{i}", category=self.category
+            )
+        self.category.name = "Hardware"
+        # The save, the product ids and one UPDATE for all six products
+        with self.assertNumQueries(3):
+            self.category.save()
+        self.assertEqual(list(self.backend.search(queryset, 'hardware ultrabook')), [self.laptop])
+        self.assertEqual(list(self.backend.search(queryset, 'computers')), [])
+
+    def test_search_vectors_skipped_without_postgres(self):
+        if full_text_search_available():
+            self.skipTest("Only applies to non-PostgreSQL databases")
+        self.assertEqual(update_search_vectors(Product.objects.all()), 0)
+        self.laptop.refresh_from_db()
+        self.assertIsNone(self.laptop.search_vector)
+
+
+@override_settings(PRODUCT_SEARCH_BACKEND='products.search.InvertedIndexSearchBackend')
+class InvertedIndexSearchBackendTest(TestCase):
+    def setUp(self):
+        self.backend = get_search_backend()
+        self.backend.clear()
+        self.category = Category.objects.create(name="Computers", slug="computers")
+        self.laptop = Product.objects.create(
+            name="Ultrabook Pro", description="Thin and light laptop", price=Decimal('999.00'),
+            sku="LAP1", category=self.category, status='ACTIVE'
+        )
+        self.laptop.tags.add("portable")
+        self.mouse = Product.objects.create(
+            name="Wireless Mouse", description="Ergonomic mouse for laptop users", price=Decimal('25.00'),
+            sku="MOU1", category=self.category, status='ACTIVE'
+        )
+        self.draft = Product.objects.create(
+            name="Prototype Laptop", description="Not for sale", price=Decimal('1.00'),
+            sku="DRA1", category=self.category, status='DRAFT'
+        )
+
+    def tearDown(self):
+        self.backend.clear()
+
+    def search_ids(self, query):
+        return set(self.backend.search(Product.objects.all(), query).values_list('pk', flat=True))
+
+    def test_settings_select_backend(self):
+        self.assertIsInstance(self.backend, InvertedIndexSearchBackend)
+        self.assertIs(get_search_backend(), self.backend)
+        with self.settings(PRODUCT_SEARCH_BACKEND='products.search.DatabaseSearchBackend'):
+            self.assertIsInstance(get_search_backend(), DatabaseSearchBackend)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Ultra-Book PRO 2"), ['ultra', 'book', 'pro', '2'])
+        self.assertEqual(tokenize(''), [])
+
+    def test_index_built_on_first_search(self):
+        self.assertFalse(self.backend.is_built)
+        self.assertEqual(self.search_ids('ultrabook'), {self.laptop.pk})
+        self.assertTrue(self.backend.is_built)
+        self.assertEqual(len(self.backend), 2)
+
+    def test_matches_name_description_tags_and_prefixes(self):
+        self.assertEqual(self.search_ids('laptop'), {self.laptop.pk, self.mouse.pk})
+        self.assertEqual(self.search_ids('ergonomic'), {self.mouse.pk})
+        self.assertEqual(self.search_ids('portable'), {self.laptop.pk})
+        self.assertEqual(self.search_ids('ultra'), {self.laptop.pk})
+        self.assertEqual(self.search_ids('LAPTOP mouse'), {self.mouse.pk})
+        self.assertEqual(self.search_ids('laptop keyboard'), set())
+        self.assertEqual(self.search_ids('!!!'), set())
+
+    def test_only_active_products_are_indexed(self):
+        self.assertNotIn(self.draft.pk, self.search_ids('prototype'))
+
+    def test_empty_query_returns_queryset_unchanged(self):
+        queryset = Product.objects.all()
+        self.assertIs(self.backend.search(queryset, ''), queryset)
+
+    def test_index_follows_product_changes(self):
+        self.backend.build()
+
+        self.mouse.name = "Trackball"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mouse.save()
+            # Not before the write commits
+            self.assertEqual(self.search_ids('trackball'), set())
+        self.assertEqual(self.search_ids('wireless'), set())
+        self.assertEqual(self.search_ids('trackball'), {self.mouse.pk})
+
+        self.draft.status = 'ACTIVE'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.save()
+        self.assertEqual(self.search_ids('prototype'), {self.draft.pk})
+
+        self.laptop.status = 'INACTIVE'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.laptop.save()
+        self.assertEqual(self.search_ids('ultrabook'), set())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mouse.delete()
+        self.assertEqual(self.search_ids('trackball'), set())
+        self.assertEqual(len(self.backend), 1)
+
+    def test_index_follows_tag_changes(self):
+        self.backend.build()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mouse.tags.add("gaming")
+        self.assertEqual(self.search_ids('gaming'), {self.mouse.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.laptop.tags.remove("portable")
+        self.assertEqual(self.search_ids('portable'), set())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mouse.tags.clear()
+        self.assertEqual(self.search_ids('gaming'), set())
+
+    def test_search_views_use_configured_backend(self):
+        response = self.client.get('/api/products/search/', {'q': 'ultra'})
+        self.assertEqual([item['id'] for item in response.data], [self.laptop.pk])
+        self.assertTrue(self.backend.is_built)
+
+    def test_warm_up_builds_the_index(self):
+        warm_up()
+        self.assertTrue(self.backend.is_built)
+        self.assertEqual(len(self.backend), 2)
+
+    def test_changes_from_other_processes_are_replayed(self):
+        self.backend.build()
+        other_process = InvertedIndexSearchBackend()
+        Product.objects.filter(pk=self.mouse.pk).update(name="Trackball")
+        with self.captureOnCommitCallbacks(execute=True):
+            other_process.index_products(Product.objects.filter(pk=self.mouse.pk))
+        with mock.patch.object(self.backend, 'build') as build:
+            self.assertEqual(self.search_ids('trackball'), {self.mouse.pk})
+        build.assert_not_called()
+
+        # A gap in the log means a rebuild
+        Product.objects.filter(pk=self.laptop.pk).update(name="Notebook")
+        with self.captureOnCommitCallbacks(execute=True):
+            other_process.index_products(Product.objects.filter(pk=self.laptop.pk))
+        cache.delete(_change_key(cache.get(INDEX_VERSION_KEY)))
+        with mock.patch.object(self.backend, 'build', wraps=self.backend.build) as build:
+            self.assertEqual(self.search_ids('notebook'), {self.laptop.pk})
+        build.assert_called_once_with()
+
+    def test_category_changes_do_not_reindex(self):
+        self.backend.build()
+        with mock.patch.object(self.backend, 'index_products') as index_products:
+            self.category.name = 'Hardware'
+            self.category.save()
+        index_products.assert_not_called()
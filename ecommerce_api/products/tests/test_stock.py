@@ -0,0 +1,153 @@
+import threading
+from decimal import Decimal
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import Inventory
+from inventory.utils import InventoryUtils
+from orders.models import Order, OrderItem
+from products.models import Product, ProductActivity
+from products.stock import InsufficientStock, apply_stock_changes, change_product_stock
+from products.utils import ProductInventoryManager
+
+User = get_user_model()
+
+
+def make_products(count, quantity):
+    return [
+        Product.objects.create(
+            name=f"Stock {i}", slug=f"stock-{i}", description="desc",
+            price=Decimal('10.00'), sku=f"STOCK{i}", quantity=quantity, status='ACTIVE'
+        )
+        for i in range(count)
+    ]
+
+
+def update_statements(context):
+    return [query for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+
+
+class StockEngineTest(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c = make_products(3, 5)
+
+    def quantities(self):
+        return list(
+            Product.objects.filter(pk__in=[self.a.pk, self.b.pk, self.c.pk])
+            .order_by('pk').values_list('quantity', flat=True)
+        )
+
+    def test_batch_reports_each_row_in_one_statement(self):
+        with CaptureQueriesContext(connection) as context:
+            levels = change_product_stock({self.a.pk: -2, self.b.pk: -6, self.c.pk: 3})
+        self.assertEqual(levels, {self.a.pk: 3, self.b.pk: None, self.c.pk: 8})
+        self.assertEqual(self.quantities(), [3, 5, 8])
+        self.assertEqual(len(update_statements(context)), 1)
+
+    def test_fallback_without_returning(self):
+        with patch('products.stock._can_return_from_update', return_value=False):
+            levels = change_product_stock({self.a.pk: -2, self.b.pk: -6})
+        self.assertEqual(levels, {self.a.pk: 3, self.b.pk: None})
+        self.assertEqual(self.quantities(), [3, 5, 5])
+
+    def test_repeated_keys_are_summed(self):
+        levels = change_product_stock([(self.a.pk, -3), (self.a.pk, -3)])
+        self.assertEqual(levels, {self.a.pk: None})
+        self.assertEqual(change_product_stock([(self.a.pk, -2), (self.a.pk, -3)]), {self.a.pk: 0})
+
+    def test_all_or_nothing_rolls_back(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            change_product_stock({self.a.pk: -1, self.b.pk: -10}, all_or_nothing=True)
+        self.assertEqual(raised.exception.failed, [self.b.pk])
+        self.assertEqual(self.quantities(), [5, 5, 5])
+
+    def test_touches_auto_now_fields(self):
+        updated_at = self.a.updated_at
+        change_product_stock({self.a.pk: -1})
+        self.a.refresh_from_db()
+        self.assertGreater(self.a.updated_at, updated_at)
+
+    def test_reduce_stock(self):
+        self.assertTrue(self.a.reduce_stock(5))
+        self.assertEqual(self.a.quantity, 0)
+        self.assertFalse(self.a.reduce_stock(1))
+        self.assertEqual(self.a.quantity, 0)
+
+    def test_order_update_stock_batches_lines(self):
+        user = User.objects.create_user(email="buyer@example.com", password="testpass")
+        order = Order.objects.create(
+            user=user, shipping_address="1 Main St", shipping_city="City",
+            shipping_state="State", shipping_zip_code="12345", shipping_country="Country",
+            email=user.email, subtotal=0, tax_amount=0, shipping_cost=0, total=0
+        )
+        for product, quantity in ((self.a, 2), (self.b, 9), (self.c, 1)):
+            OrderItem.objects.create(order=order, product=product, quantity=quantity)
+
+        with CaptureQueriesContext(connection) as context:
+            levels = order.update_stock()
+        product_updates = [
+            query for query in update_statements(context)
+            if Product._meta.db_table in query['sql'].split('SET')[0]
+        ]
+        self.assertEqual(len(product_updates), 1)
+        self.assertEqual(levels, {self.a.pk: 3, self.b.pk: None, self.c.pk: 4})
+        activity = ProductActivity.objects.get(product=self.a, action='stock_update')
+        self.assertEqual(activity.details['previous_stock'], 5)
+        self.assertEqual(activity.details['new_stock'], 3)
+
+    def test_inventory_manager_is_all_or_nothing(self):
+        with self.assertRaises(ValueError):
+            ProductInventoryManager.bulk_update_stock([(self.a, -1), (self.b, -6)])
+        self.assertEqual(self.quantities(), [5, 5, 5])
+
+        product = ProductInventoryManager.update_stock(self.a, 4)
+        self.assertEqual(product.quantity, 9)
+
+    def test_inventory_stock_levels(self):
+        inventory = Inventory.objects.create(product=self.a, stock_level=3, reserved_stock=1)
+        InventoryUtils.update_stock_level(inventory, 2, 'out')
+        self.assertEqual(inventory.stock_level, 1)
+        with self.assertRaises(ValidationError):
+            InventoryUtils.update_stock_level(inventory, 2, 'out')
+        InventoryUtils.update_stock_level(inventory, 5, 'release')
+        inventory.refresh_from_db()
+        self.assertEqual((inventory.stock_level, inventory.reserved_stock), (1, 0))
+        self.assertEqual(apply_stock_changes(Inventory, 'stock_level', {inventory.pk: 4}),
+                         {inventory.pk: 5})
+
+
+@skipIf(connection.vendor == 'sqlite', "SQLite serialises writers and locks the shared test database")
+class StockEngineConcurrencyTest(TransactionTestCase):
+    threads = 8
+    attempts = 25
+
+    def test_concurrent_checkouts_never_oversell(self):
+        products = make_products(2, 50)
+        sold = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                for _ in range(self.attempts):
+                    levels = change_product_stock({product.pk: -1 for product in products})
+                    with lock:
+                        sold.extend(pk for pk, level in levels.items() if level is not None)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for product in products:
+            product.refresh_from_db()
+            self.assertEqual(product.quantity, 0)
+            self.assertEqual(sold.count(product.pk), 50)
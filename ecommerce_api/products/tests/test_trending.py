@@ -0,0 +1,94 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from products import trending
+from products.models import Product, ProductTrendingScore
+
+HOUR = 3600
+
+
+@override_settings(TRENDING_HALF_LIFE=HOUR, TRENDING_TOP_SIZE=3)
+class TrendingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.products = [
+            Product.objects.create(name=f'Item {i}', slug=f'item-{i}', price=Decimal('5.00'), sku=f'TRD{i}',
+                                   status='ACTIVE')
+            for i in range(4)
+        ]
+
+    def test_views_decay_by_half_life(self):
+        a, b, c, _ = self.products
+        start = 1_000_000 * HOUR
+        trending.apply_views({a.pk: 8}, now=start)
+        trending.apply_views({b.pk: 3}, now=start + 2 * HOUR)
+        trending.apply_views({a.pk: 1, c.pk: 1}, now=start + 3 * HOUR)
+
+        # a: 8 views three half-lives ago plus one now
+        score = ProductTrendingScore.objects.get(product=a)
+        self.assertAlmostEqual(score.score, 2.0)
+        self.assertEqual(score.total_views, 9)
+        results = trending.trending(3, now=start + 3 * HOUR)
+        self.assertEqual([product for product, _ in results], [a, b, c])
+        self.assertEqual([round(score, 6) for _, score in results], [2.0, 1.5, 1.0])
+
+        # Products that were not viewed again keep sliding down
+        trending.apply_views({c.pk: 2}, now=start + 4 * HOUR)
+        self.assertEqual([product for product, _ in trending.trending(3, now=start + 4 * HOUR)], [c, a, b])
+
+    def test_unknown_products_are_ignored(self):
+        self.assertEqual(trending.apply_views({self.products[0].pk: 1, 999999: 4}), 1)
+        self.assertEqual(ProductTrendingScore.objects.count(), 1)
+
+    def test_counter_flushes_in_one_batch(self):
+        counter = trending.ViewCounter()
+        with mock.patch.object(trending.ViewCounter, '_start_writer', return_value=object()):
+            for product in self.products[:3]:
+                for _ in range(product.pk % 3 + 1):
+                    counter.add(product.pk)
+        self.assertFalse(ProductTrendingScore.objects.exists())
+
+        self.assertEqual(counter.flush(), 3)
+        self.assertEqual(
+            dict(ProductTrendingScore.objects.values_list('product_id', 'total_views')),
+            {product.pk: product.pk % 3 + 1 for product in self.products[:3]}
+        )
+        self.assertEqual(counter.flush(), 0)
+
+    def test_detail_views_do_not_write(self):
+        product = self.products[0]
+        counter = trending.ViewCounter()
+        with self.settings(ACTIVITY_SINK_MODE='thread'), \
+                mock.patch.object(trending, 'counter', counter), \
+                mock.patch.object(trending.ViewCounter, '_start_writer', return_value=object()):
+            self.client.get(f'/api/products/{product.pk}/')
+            # The second request is a response cache hit
+            with self.assertNumQueries(0):
+                response = self.client.get(f'/api/products/{product.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ProductTrendingScore.objects.exists())
+
+        counter.flush()
+        self.assertEqual(ProductTrendingScore.objects.get(product=product).total_views, 2)
+
+    def test_endpoint(self):
+        a, b, c, d = self.products
+        trending.apply_views({a.pk: 1, b.pk: 5, c.pk: 3, d.pk: 2})
+        d.status = 'INACTIVE'
+        d.save()
+        trending.refresh_top()
+
+        response = self.client.get('/api/products/trending/', {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()], [b.pk, c.pk])
+        self.assertAlmostEqual(response.json()[0]['trending_score'], 5, places=2)
+
+        # limit is capped at TRENDING_TOP_SIZE, and inactive products are left out
+        response = self.client.get('/api/products/trending/', {'limit': 50})
+        self.assertEqual([row['id'] for row in response.json()], [b.pk, c.pk, a.pk])
+        self.assertEqual(self.client.get('/api/products/trending/', {'limit': 'x'}).status_code, 400)
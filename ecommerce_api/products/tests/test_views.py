@@ -1,8 +1,10 @@
 from django.urls import reverse
-from rest_framework.test import APITestCase, APIClient
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from products.models import Product, Category, Brand, Wishlist, ProductReview
+from products.models import Product, ProductImage, Category, Brand, Wishlist, ProductReview
+from products.serializers import ProductSerializer
+from products.views import ProductListAPIView
 from decimal import Decimal
 
 User = get_user_model()
@@ -111,6 +113,31 @@ class ProductAPIViewTests(APITestCase):
         # Non admin is disallowed, expect 403 or 405 depending on your permission setup
         self.assertIn(response.status_code, [status.HTTP_403_FORBIDDEN, status.HTTP_405_METHOD_NOT_ALLOWED])
 
+    def test_product_list_ordering_by_average_rating(self):
+        other_user = User.objects.create_user(email="other@test.com", password="pass123")
+        top_product = Product.objects.create(
+            name="Top Product",
+            description="Best rated",
+            price=Decimal("49.99"),
+            sku="SKU5678",
+            quantity=5,
+            category=self.category,
+            status="ACTIVE",
+        )
+        ProductReview.objects.create(
+            product=top_product, user=other_user, rating=5,
+            title="Excellent", comment="Top", is_approved=True,
+        )
+
+        # '' is routed to api_root first, so call the list view directly
+        request = APIRequestFactory().get('/api/products/', {'ordering': '-average_rating'})
+        response = ProductListAPIView.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([p['id'] for p in results], [top_product.id, self.product.id])
+        self.assertEqual(results[0]['average_rating'], 5)
+        self.assertEqual(results[1]['review_count'], 1)
+
     def test_product_recommendations_api(self):
         url = reverse('products:product_recommendations', kwargs={'product_id': self.product.id})
         response = self.client.get(url)
@@ -136,3 +163,58 @@ class ProductAPIViewTests(APITestCase):
         else:
             results = data
         self.assertTrue(any(p['id'] == self.product.id for p in results))
+
+
+class ProductSerializationQueryCountTests(APITestCase):
+    """The product serialization plan keeps queries per page constant"""
+
+    # count + page + tags prefetch + images prefetch
+    MAX_QUERIES_PER_PAGE = 4
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.users = [
+            User.objects.create_user(email=f"reviewer{i}@test.com", password="pass123")
+            for i in range(3)
+        ]
+        category = Category.objects.create(name="Electronics", slug="electronics")
+        brand = Brand.objects.create(name="BrandX")
+        for i in range(10):
+            product = Product.objects.create(
+                name=f"Product {i}",
+                description="Description",
+                price=Decimal("10.00"),
+                sku=f"SKU-{i}",
+                quantity=10,
+                category=category,
+                brand=brand,
+                created_by=self.users[0],
+                updated_by=self.users[1],
+                status="ACTIVE",
+            )
+            product.tags.add("gadget", f"tag-{i}")
+            ProductImage.objects.create(product=product, image=f"products/{i}.jpg", is_primary=True)
+            for user in self.users:
+                ProductReview.objects.create(
+                    product=product, user=user, rating=4,
+                    title="Good", comment="Nice", is_approved=True,
+                )
+
+    def test_product_list_page_query_count(self):
+        request = self.factory.get('/api/products/')
+        with self.assertNumQueries(self.MAX_QUERIES_PER_PAGE):
+            response = ProductListAPIView.as_view()(request)
+            response.render()
+        self.assertEqual(response.data['count'], 10)
+        first = response.data['results'][0]
+        self.assertEqual(first['category_name'], "Electronics")
+        self.assertEqual(first['review_count'], 3)
+        self.assertEqual(len(first['images']), 1)
+        self.assertIn("gadget", first['tags'])
+
+    def test_nested_product_list_uses_plan(self):
+        serializer = ProductSerializer(Product.objects.all(), many=True)
+        # page + tags prefetch + images prefetch
+        with self.assertNumQueries(3):
+            data = serializer.data
+        self.assertEqual(len(data), 10)
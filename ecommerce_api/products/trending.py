@@ -0,0 +1,127 @@
+# products/trending.py
+"""
+Trending products.
+
+Product detail requests call record_view(), which only bumps an in-memory
+counter. A background thread folds the counts into ProductTrendingScore
+every TRENDING_FLUSH_INTERVAL seconds with a single UPDATE:
+
+    score = score * 2^(decay_at - now) + views,  decay_at = now,
+    rank  = log2(score) + now
+
+with times measured in TRENDING_HALF_LIFE units, so every view loses half
+its weight per half-life. `rank` orders products by their current score
+even though only the rows with new views are written, and it is indexed.
+
+After each flush the top TRENDING_TOP_SIZE (product_id, rank) pairs are
+read off that index into the cache, and trending() serves the first N of
+the list: O(N) per request plus one query for the products themselves.
+"""
+import atexit
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Log, Power
+
+from ecommerce_api.activity import BackgroundFlusher
+from .models import Product, ProductTrendingScore
+
+TOP_KEY = 'trending:top'
+
+
+def half_lives(now=None):
+    """A point in time in half-lives since the epoch"""
+    now = time.time() if now is None else now
+    return now / getattr(settings, 'TRENDING_HALF_LIFE', 21600)
+
+
+def top_size():
+    return getattr(settings, 'TRENDING_TOP_SIZE', 100)
+
+
+def refresh_top():
+    """Cache the top (product_id, rank) pairs of the active products"""
+    top = list(
+        ProductTrendingScore.objects.filter(product__status='ACTIVE')
+        .order_by('-rank').values_list('product_id', 'rank')[:top_size()]
+    )
+    cache.set(TOP_KEY, top, None)
+    return top
+
+
+def apply_views(counts, now=None):
+    """Fold {product_id: views} into the trending scores; returns the products updated"""
+    counts = {product_id: views for product_id, views in counts.items() if views > 0}
+    if not counts:
+        return 0
+    product_ids = list(Product.objects.filter(pk__in=counts).values_list('pk', flat=True))
+    if not product_ids:
+        return 0
+
+    t = half_lives(now)
+    ProductTrendingScore.objects.bulk_create(
+        [ProductTrendingScore(product_id=product_id, decay_at=t) for product_id in product_ids],
+        ignore_conflicts=True
+    )
+    views = Case(
+        *[When(product_id=product_id, then=Value(float(counts[product_id]))) for product_id in product_ids],
+        output_field=FloatField(),
+    )
+    # Every assignment sees the old column values
+    score = F('score') * Power(Value(2.0), F('decay_at') - Value(t)) + views
+    ProductTrendingScore.objects.filter(product_id__in=product_ids).update(
+        score=score,
+        decay_at=Value(t),
+        rank=Log(Value(2.0), score) + Value(t),
+        total_views=F('total_views') + views,
+    )
+    refresh_top()
+    return len(product_ids)
+
+
+def trending(limit, now=None):
+    """The `limit` top products as (product, current score) pairs"""
+    top = cache.get(TOP_KEY)
+    if top is None:
+        top = refresh_top()
+    top = top[:limit]
+    products = Product.objects.filter(status='ACTIVE').for_serialization().in_bulk(
+        [product_id for product_id, _ in top]
+    )
+    t = half_lives(now)
+    return [
+        (products[product_id], 2 ** (rank - t))
+        for product_id, rank in top if product_id in products
+    ]
+
+
+class ViewCounter(BackgroundFlusher):
+    thread_name = 'view-counter'
+    interval_setting = 'TRENDING_FLUSH_INTERVAL'
+
+    def _reset(self):
+        self._pending = Counter()
+
+    def add(self, product_id):
+        with self._lock:
+            self._locked()
+            self._pending[product_id] += 1
+
+    def flush(self):
+        """Fold the counted views into the scores; returns the products updated"""
+        return apply_views(self._take())
+
+
+counter = ViewCounter()
+atexit.register(counter.flush)
+
+
+def record_view(product_id):
+    """Count a product view without touching the database (except in 'sync' mode)"""
+    if getattr(settings, 'ACTIVITY_SINK_MODE', 'thread') == 'sync':
+        apply_views({product_id: 1})
+    else:
+        counter.add(product_id)
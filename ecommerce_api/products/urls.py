@@ -26,7 +26,12 @@ urlpatterns = [
     path('reviews/', ProductReviewListAPIView.as_view(), name='review_list'),
     path('wishlist/', WishlistAPIView.as_view(), name='wishlist'),
     path('<int:product_id>/recommendations/', views.product_recommendations_api, name='product_recommendations'),
+    path('<int:product_id>/bought-together/', views.bought_together_api, name='bought_together'),
     path('search/', views.product_search_api, name='product_search'),
+    path('trending/', views.trending_products_api, name='trending_products'),
+    path('report/', views.product_report_api, name='product_report'),
+    path('export/', views.product_export_api, name='product_export'),
+    path('import/', views.product_import_api, name='product_import'),
     path('<int:pk>/', ProductDetailAPIView.as_view(), name='product_detail'),
     path('', ProductListAPIView.as_view(), name='product_list'),
 
@@ -1,13 +1,21 @@
 # products/utils.py
+import json
 import os
 import uuid
+from decimal import Decimal
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, DecimalField, F, Q, Sum
 from django.utils.text import slugify
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from PIL import Image
 from io import BytesIO
 from django.conf import settings
+from ecommerce_api.activity import record_activity
+from ecommerce_api.money import quantize_money
+from ecommerce_api.streaming import csv_lines
 from .models import ProductActivity
+from .stock import InsufficientStock, change_product_stock
 
 def generate_unique_slug(model, value, slug_field='slug'):
     """
@@ -77,7 +85,9 @@ def track_product_activity(product, user, action, **details):
         activity_data['ip_address'] = get_client_ip(request)
         activity_data['user_agent'] = request.META.get('HTTP_USER_AGENT', '')
     
-    return ProductActivity.objects.create(**activity_data)
+    activity = ProductActivity(**activity_data)
+    record_activity(activity)
+    return activity
 
 def get_client_ip(request):
     """
@@ -101,57 +111,76 @@ def calculate_average_rating(product):
 
 def get_product_recommendations(product, limit=4):
     """
-    Get recommended products based on similar category, tags, or other criteria.
+    Get recommended products based on similar category, tags and purchases.
+    Picks at random among the precomputed ones; see products/recommendations.py.
     """
-    from .models import Product
-    
-    recommendations = Product.objects.filter(
-        status='ACTIVE'
-    ).exclude(
-        id=product.id
-    )
-    
-    # Prioritize same category
-    if product.category:
-        same_category = recommendations.filter(category=product.category)
-        if same_category.exists():
-            return same_category.order_by('?')[:limit]
-    
-    # Then same tags
-    if product.tags.exists():
-        same_tags = recommendations.filter(tags__in=product.tags.all()).distinct()
-        if same_tags.exists():
-            return same_tags.order_by('?')[:limit]
-    
-    # Fallback to featured products
-    return recommendations.filter(is_featured=True).order_by('?')[:limit]
+    from .recommendations import recommend
+
+    return recommend(product, limit=limit)
+
+REPORT_COLUMNS = ['category', 'status', 'products', 'out_of_stock', 'low_stock', 'quantity', 'value']
+
+def product_report_rows(products_queryset):
+    """
+    Per (category, status) product counts, stock and stock value, computed
+    by the database in a single GROUP BY query.
+    """
+    money = DecimalField(max_digits=14, decimal_places=2)
+    return products_queryset.order_by().values('category_id', 'category__name', 'status').annotate(
+        products=Count('pk'),
+        out_of_stock=Count('pk', filter=Q(quantity=0)),
+        low_stock=Count('pk', filter=Q(quantity__lte=5, quantity__gt=0)),
+        total_quantity=Sum('quantity'),
+        value=Sum(F('price') * F('quantity'), output_field=money),
+    ).order_by('category__name', 'status')
 
 def generate_product_report(products_queryset, format='dict'):
     """
     Generate a report of products with various statistics.
-    """
+
+    Everything comes from one GROUP BY query (product_report_rows()). With
+    format='dict' the report is returned as a dict; 'json' and 'csv' return
+    an iterator of text chunks for streaming, the CSV holding one line per
+    category and status.
+    """
+    rows = product_report_rows(products_queryset)
+    if format == 'csv':
+        return csv_lines(REPORT_COLUMNS, (
+            [row['category__name'] or 'Uncategorized', row['status'], row['products'],
+             row['out_of_stock'], row['low_stock'], row['total_quantity'], quantize_money(row['value'])]
+            for row in rows.iterator()
+        ))
+
     report = {
-        'total_products': products_queryset.count(),
-        'active_products': products_queryset.filter(status='ACTIVE').count(),
-        'out_of_stock': products_queryset.filter(quantity=0).count(),
-        'low_stock': products_queryset.filter(quantity__lte=5, quantity__gt=0).count(),
-        'total_value': sum([p.price * p.quantity for p in products_queryset]),
-        'average_price': 0,
+        'total_products': 0,
+        'active_products': 0,
+        'out_of_stock': 0,
+        'low_stock': 0,
+        'total_value': Decimal('0.00'),
+        'average_price': Decimal('0.00'),
         'by_category': {},
         'by_status': {}
     }
-    
-    # Calculate average price
-    if report['total_products'] > 0:
-        report['average_price'] = report['total_value'] / sum([p.quantity for p in products_queryset])
-    
-    # Count by category
-    for product in products_queryset:
-        category_name = product.category.name if product.category else 'Uncategorized'
-        report['by_category'][category_name] = report['by_category'].get(category_name, 0) + 1
-        
-        report['by_status'][product.status] = report['by_status'].get(product.status, 0) + 1
-    
+    total_quantity = 0
+    for row in rows:
+        report['total_products'] += row['products']
+        if row['status'] == 'ACTIVE':
+            report['active_products'] += row['products']
+        report['out_of_stock'] += row['out_of_stock']
+        report['low_stock'] += row['low_stock']
+        report['total_value'] += quantize_money(row['value'])
+        total_quantity += row['total_quantity'] or 0
+
+        category_name = row['category__name'] or 'Uncategorized'
+        report['by_category'][category_name] = report['by_category'].get(category_name, 0) + row['products']
+        report['by_status'][row['status']] = report['by_status'].get(row['status'], 0) + row['products']
+
+    # Average price per unit in stock
+    if total_quantity:
+        report['average_price'] = quantize_money(report['total_value'] / total_quantity)
+
+    if format == 'json':
+        return iter([json.dumps(report, cls=DjangoJSONEncoder)])
     return report
 
 def send_low_stock_notification(product):
@@ -182,39 +211,44 @@ class ProductInventoryManager:
         """
         Update product stock and track the change.
         """
-        old_quantity = product.quantity
-        product.quantity += quantity_change
-        
-        if product.quantity < 0:
-            raise ValueError("Cannot set negative stock quantity.")
-        
-        product.save()
-        
-        # Track this activity
-        track_product_activity(
-            product=product,
-            user=None,  # Could be system or admin user
-            action='stock_update',
-            old_quantity=old_quantity,
-            new_quantity=product.quantity,
-            change=quantity_change,
-            reason=reason
-        )
-        
-        # Check if stock is low after update
-        if product.is_low_stock:
-            send_low_stock_notification(product)
-        
-        return product
+        return ProductInventoryManager.bulk_update_stock([(product, quantity_change)], reason)[0]
     
     @staticmethod
     def bulk_update_stock(products_quantities, reason='bulk adjustment'):
         """
         Update stock for multiple products at once.
+
+        All changes are applied by one conditional UPDATE; if any product
+        would go negative, nothing is changed and ValueError is raised.
         """
+        products_quantities = list(products_quantities)
+        try:
+            levels = change_product_stock(
+                [(product.pk, quantity_change) for product, quantity_change in products_quantities],
+                all_or_nothing=True
+            )
+        except InsufficientStock:
+            raise ValueError("Cannot set negative stock quantity.")
+
         updated_products = []
         for product, quantity_change in products_quantities:
-            updated_products.append(
-                ProductInventoryManager.update_stock(product, quantity_change, reason)
+            old_quantity = product.quantity
+            product.quantity = levels[product.pk]
+
+            # Track this activity
+            track_product_activity(
+                product=product,
+                user=None,  # Could be system or admin user
+                action='stock_update',
+                old_quantity=old_quantity,
+                new_quantity=product.quantity,
+                change=quantity_change,
+                reason=reason
             )
-        return updated_products
\ No newline at end of file
+
+            # Check if stock is low after update
+            if product.is_low_stock:
+                send_low_stock_notification(product)
+
+            updated_products.append(product)
+        return updated_products
@@ -3,7 +3,6 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.db.models import Q
 from django.urls import reverse_lazy
 from django.core.paginator import Paginator
 from django.contrib import messages
@@ -12,11 +11,16 @@ from django.db.models import Count
 
 # Django REST Framework imports
 from rest_framework import generics, permissions, filters
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import get_user_model
 from rest_framework.reverse import reverse
+from ecommerce_api.counters import get_counters
+from ecommerce_api.pagination import CreatedAtKeysetPagination
+from ecommerce_api.response_cache import CATALOG, cache_response, product_group
+from ecommerce_api.streaming import streaming_response
 
 # Local imports
 from .models import Product, ProductReview, Category, Brand, Wishlist
@@ -25,7 +29,12 @@ from .serializers import (
     ProductSerializer, CategorySerializer, BrandSerializer,
     ProductReviewSerializer, WishlistSerializer, ProductSearchSerializer
 )
-from .utils import get_product_recommendations
+from .utils import generate_product_report, get_product_recommendations
+from .copurchases import bought_together, pairs_per_product
+from .exports import ProductExport
+from .imports import ProductImporter, open_rows
+from .search import get_search_backend
+from .trending import record_view, top_size, trending
 
 
 CustomUser = get_user_model()
@@ -45,12 +54,7 @@ class ProductListView(ListView):
         
         # Search functionality
         query = self.request.GET.get('q')
-        if query:
-            queryset = queryset.filter(
-                Q(name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(tags__name__icontains=query)
-            ).distinct()
+        queryset = get_search_backend().search(queryset, query)
         
         # Category filter
         category_slug = self.request.GET.get('category')
@@ -75,8 +79,8 @@ class ProductListView(ListView):
         if max_price:
             queryset = queryset.filter(price__lte=max_price)
             
-        # Ordering
-        ordering = self.request.GET.get('ordering', '-created_at')
+        # Ordering (search results keep their relevance order unless overridden)
+        ordering = self.request.GET.get('ordering', '' if query else '-created_at')
         if ordering in ['name', 'price', '-price', 'created_at', '-created_at']:
             queryset = queryset.order_by(ordering)
             
@@ -97,10 +101,11 @@ class HomeView(TemplateView):
         context = super().get_context_data(**kwargs)
         
         # Add stats to context
-        context['product_count'] = Product.objects.filter(status='ACTIVE').count()
-        context['user_count'] = CustomUser.objects.count()
-        context['review_count'] = ProductReview.objects.filter(is_approved=True).count()
-        context['category_count'] = Category.objects.count()
+        counters = get_counters()
+        context['product_count'] = counters['product_count']
+        context['user_count'] = counters['user_count']
+        context['review_count'] = counters['review_count']
+        context['category_count'] = counters['category_count']
         
         return context
 
@@ -230,14 +235,7 @@ def toggle_wishlist(request, slug):
 
 def search_products(request):
     query = request.GET.get('q', '')
-    products = Product.objects.filter(status='ACTIVE')
-    
-    if query:
-        products = products.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()
+    products = get_search_backend().search(Product.objects.filter(status='ACTIVE'), query)
     
     paginator = Paginator(products, 12)
     page_number = request.GET.get('page')
@@ -258,8 +256,9 @@ def search_products(request):
 # ============================================================================
 
 class ProductListAPIView(generics.ListCreateAPIView):
-    queryset = Product.objects.filter(status='ACTIVE').order_by('-created_at')  
+    queryset = Product.objects.filter(status='ACTIVE').for_serialization().order_by('-created_at')
     serializer_class = ProductSerializer
+    pagination_class = CreatedAtKeysetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'brand', 'is_featured']
     search_fields = ['name', 'description', 'tags__name']
@@ -273,7 +272,7 @@ class ProductListAPIView(generics.ListCreateAPIView):
 
 
 class ProductDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Product.objects.all()
+    queryset = Product.objects.for_serialization()
     serializer_class = ProductSerializer
     
     def get_permissions(self):
@@ -281,12 +280,25 @@ class ProductDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
             return [permissions.IsAdminUser()]
         return [permissions.AllowAny()]
 
+    def get(self, request, *args, **kwargs):
+        # Counted in memory, cache hits included; see products/trending.py
+        record_view(kwargs['pk'])
+        return self._cached_get(request, *args, **kwargs)
+
+    @cache_response(CATALOG, lambda view, request, *args, **kwargs: product_group(kwargs['pk']))
+    def _cached_get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class CategoryListAPIView(generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
 
+    @cache_response(CATALOG)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class CategoryDetailAPIView(generics.RetrieveAPIView):
     queryset = Category.objects.all()
@@ -299,6 +311,10 @@ class BrandListAPIView(generics.ListAPIView):
     serializer_class = BrandSerializer
     permission_classes = [permissions.AllowAny]
 
+    @cache_response(CATALOG)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class BrandDetailAPIView(generics.RetrieveAPIView):
     queryset = Brand.objects.all()
@@ -344,6 +360,79 @@ def product_recommendations_api(request, product_id):
         return Response({'error': 'Product not found'}, status=404)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def bought_together_api(request, product_id):
+    """The products most often bought in the same order as this one"""
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=400)
+    limit = max(1, min(limit, pairs_per_product()))
+
+    products = bought_together(product_id, limit)
+    if not products and not Product.objects.filter(id=product_id).exists():
+        return Response({'error': 'Product not found'}, status=404)
+
+    results = []
+    for product in products:
+        data = ProductSerializer(product, context={'request': request}).data
+        data['bought_together_count'] = product.copurchase_count
+        results.append(data)
+    return Response(results)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def product_report_api(request):
+    """
+    Catalog statistics. ?output=csv or ?output=json streams the report as a
+    download; ?status= and ?category= (slug) narrow the products.
+    """
+    output = request.query_params.get('output')
+    if output not in (None, 'csv', 'json'):
+        return Response({'error': 'output must be csv or json'}, status=400)
+
+    queryset = Product.objects.all()
+    product_status = request.query_params.get('status')
+    if product_status:
+        queryset = queryset.filter(status=product_status)
+    category = request.query_params.get('category')
+    if category:
+        queryset = queryset.filter(category__slug=category)
+
+    if output is None:
+        return Response(generate_product_report(queryset))
+    return streaming_response(
+        generate_product_report(queryset, format=output), f'product-report.{output}', output
+    )
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def product_export_api(request):
+    """Stream all matching products as CSV or NDJSON; see ecommerce_api/exports.py"""
+    return ProductExport().response(request)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def trending_products_api(request):
+    """The most viewed products, with recent views weighing the most"""
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=400)
+    limit = max(1, min(limit, top_size()))
+
+    results = []
+    for product, score in trending(limit):
+        data = ProductSerializer(product, context={'request': request}).data
+        data['trending_score'] = round(score, 4)
+        results.append(data)
+    return Response(results)
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([permissions.AllowAny])
 def product_search_api(request):
@@ -355,14 +444,7 @@ def product_search_api(request):
         min_price = request.GET.get('min_price')
         max_price = request.GET.get('max_price')
         
-        queryset = Product.objects.filter(status='ACTIVE')
-        
-        if query:
-            queryset = queryset.filter(
-                Q(name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(tags__name__icontains=query)
-            ).distinct()
+        queryset = get_search_backend().search(Product.objects.filter(status='ACTIVE'), query)
         
         if category:
             queryset = queryset.filter(category__slug=category)
@@ -376,6 +458,7 @@ def product_search_api(request):
         if max_price:
             queryset = queryset.filter(price__lte=max_price)
             
+        queryset = queryset.for_serialization()
         serializer = ProductSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
     
@@ -383,15 +466,12 @@ def product_search_api(request):
         # Handle POST requests with JSON body
         serializer = ProductSearchSerializer(data=request.data)
         if serializer.is_valid():
-            queryset = Product.objects.filter(status='ACTIVE')
-            
-            if serializer.validated_data.get('q'):
-                queryset = queryset.filter(
-                    Q(name__icontains=serializer.validated_data['q']) |
-                    Q(description__icontains=serializer.validated_data['q']) |
-                    Q(tags__name__icontains=serializer.validated_data['q'])
-                ).distinct()
+            queryset = get_search_backend().search(
+                Product.objects.filter(status='ACTIVE'),
+                serializer.validated_data.get('q')
+            )
             
+            queryset = queryset.for_serialization()
             results_serializer = ProductSerializer(
                 queryset, many=True, context={'request': request}
             )
@@ -409,7 +489,33 @@ def api_root(request, format=None):
         'reviews': reverse('products:review_list', request=request, format=format),
         'wishlist': reverse('products:wishlist', request=request, format=format),
         'search': reverse('products:product_search', request=request, format=format),
+        'trending': reverse('products:trending_products', request=request, format=format),
         'recommendations': 'Use /api/products/{id}/recommendations/',
+        'bought_together': 'Use /api/products/{id}/bought-together/',
         'documentation': '/api/docs/',
         'schema': '/api/schema/',
     })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+@parser_classes([MultiPartParser])
+def product_import_api(request):
+    """
+    Create or update products from an uploaded CSV or NDJSON `file`
+    (optionally gzipped), matching on sku; see products/imports.py.
+    ?output=csv|ndjson overrides the format the file name suggests.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'file is required'}, status=400)
+    output = request.query_params.get('output')
+    if output not in (None, 'csv', 'ndjson'):
+        return Response({'error': 'output must be csv or ndjson'}, status=400)
+
+    importer = ProductImporter(user=request.user)
+    try:
+        stats = importer.run(open_rows(upload, upload.name, output))
+    except (UnicodeDecodeError, OSError) as error:
+        return Response({'error': f'Could not read file: {error}'}, status=400)
+    return Response(stats)
@@ -1,8 +1,9 @@
-from django.db.models.signals import pre_save, post_save, pre_delete
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
+from ecommerce_api.response_cache import PROMOTIONS, invalidate_response_cache
 from .models import Coupon, Promotion, PromoBanner, CouponUsage, PromotionUsage
 
 @receiver(pre_save, sender=Coupon)
@@ -163,4 +164,25 @@ def prevent_delete_used_promotion(sender, instance, **kwargs):
     Prevent deletion of promotions that have been used
     """
     if instance.usages.exists():
-        raise ValidationError("Cannot delete promotion that has been used. Deactivate it instead.")
\ No newline at end of file
+        raise ValidationError("Cannot delete promotion that has been used. Deactivate it instead.")
+
+@receiver(post_save, sender=Promotion)
+@receiver(post_delete, sender=Promotion)
+@receiver(post_save, sender=PromoBanner)
+@receiver(post_delete, sender=PromoBanner)
+def invalidate_promotion_responses(sender, raw=False, **kwargs):
+    """
+    Expire cached public promotion responses when promotions or banners change
+    """
+    if not raw:
+        invalidate_response_cache(PROMOTIONS)
+
+@receiver(m2m_changed, sender=Promotion.products.through)
+@receiver(m2m_changed, sender=Promotion.categories.through)
+@receiver(m2m_changed, sender=Promotion.excluded_products.through)
+def invalidate_promotion_responses_on_m2m_change(sender, action, **kwargs):
+    """
+    Expire cached public promotion responses when promotion targets change
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_response_cache(PROMOTIONS)
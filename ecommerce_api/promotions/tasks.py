@@ -1,5 +1,6 @@
 from celery import shared_task
 from django.utils import timezone
+from ecommerce_api.response_cache import PROMOTIONS, invalidate_response_cache
 from .models import Coupon, Promotion, PromoBanner
 
 @shared_task
@@ -8,10 +9,13 @@ def deactivate_expired_promotions_task():
     Celery task to deactivate expired promotions
     """
     now = timezone.now()
-    Promotion.objects.filter(
+    updated = Promotion.objects.filter(
         end_date__lt=now,
         is_active=True
     ).update(is_active=False)
+    # update() skips the signals that expire cached responses
+    if updated:
+        invalidate_response_cache(PROMOTIONS)
 
 @shared_task
 def deactivate_expired_coupons_task():
@@ -30,10 +34,12 @@ def deactivate_expired_banners_task():
     Celery task to deactivate expired banners
     """
     now = timezone.now()
-    PromoBanner.objects.filter(
+    updated = PromoBanner.objects.filter(
         end_date__lt=now,
         is_active=True
     ).update(is_active=False)
+    if updated:
+        invalidate_response_cache(PROMOTIONS)
 
 @shared_task
 def send_promotion_notifications():
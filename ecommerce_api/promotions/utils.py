@@ -1,4 +1,6 @@
 from django.utils import timezone
+from django.db.models import Prefetch
+from products.models import Product
 from django.core.exceptions import ValidationError
 from .models import Coupon, Promotion, CouponUsage, PromotionUsage
 from decimal import Decimal
@@ -67,7 +69,10 @@ class PromotionUtils:
             is_active=True,
             start_date__lte=now,
             end_date__gte=now
-        ).prefetch_related('products', 'categories').order_by('-display_priority')
+        ).prefetch_related(
+            Prefetch('products', queryset=Product.objects.for_serialization()),
+            'categories'
+        ).order_by('-display_priority')
     
     @staticmethod
     def get_product_promotions(product):
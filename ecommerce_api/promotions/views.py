@@ -3,7 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Q, Prefetch
+from ecommerce_api.response_cache import CATALOG, PROMOTIONS, cache_response
+from products.models import Product
 from .models import (
     PromotionType, Coupon, Promotion, BundleOffer, 
     PromotionUsage, CouponUsage, PromoBanner
@@ -17,13 +19,19 @@ from .serializers import (
 from .permissions import IsPromotionManager, CanUsePromotion
 from .utils import PromotionUtils
 
+# Active banners/promotions depend on the clock, so keep their cache short
+PROMOTIONS_CACHE_TIMEOUT = 60
+
 class PromotionTypeViewSet(viewsets.ModelViewSet):
     queryset = PromotionType.objects.all()
     serializer_class = PromotionTypeSerializer
     permission_classes = [IsAuthenticated, IsPromotionManager]
 
 class CouponViewSet(viewsets.ModelViewSet):
-    queryset = Coupon.objects.prefetch_related('applicable_categories', 'applicable_products').all()
+    queryset = Coupon.objects.prefetch_related(
+        'applicable_categories',
+        Prefetch('applicable_products', queryset=Product.objects.for_serialization())
+    ).all()
     serializer_class = CouponSerializer
     permission_classes = [IsAuthenticated, IsPromotionManager]
 
@@ -48,7 +56,10 @@ class CouponViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class PromotionViewSet(viewsets.ModelViewSet):
-    queryset = Promotion.objects.prefetch_related('categories', 'products').all()
+    queryset = Promotion.objects.prefetch_related(
+        'categories',
+        Prefetch('products', queryset=Product.objects.for_serialization())
+    ).all()
     serializer_class = PromotionSerializer
     permission_classes = [IsAuthenticated, IsPromotionManager]
 
@@ -68,7 +79,10 @@ class PromotionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 class BundleOfferViewSet(viewsets.ModelViewSet):
-    queryset = BundleOffer.objects.select_related('promotion').all()
+    queryset = BundleOffer.objects.select_related('promotion').prefetch_related(
+        'promotion__categories',
+        Prefetch('promotion__products', queryset=Product.objects.for_serialization())
+    ).all()
     serializer_class = BundleOfferSerializer
     permission_classes = [IsAuthenticated, IsPromotionManager]
 
@@ -88,6 +102,7 @@ class PromoBannerViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsPromotionManager]
 
     @action(detail=False, methods=['get'], permission_classes=[])
+    @cache_response(PROMOTIONS, timeout=PROMOTIONS_CACHE_TIMEOUT)
     def active(self, request):
         now = timezone.now()
         active_banners = PromoBanner.objects.filter(
@@ -103,6 +118,9 @@ class PublicPromotionsViewSet(viewsets.ViewSet):
     permission_classes = []
 
     @action(detail=False, methods=['get'])
+    # Product edits and stock changes only expire that product's own
+    # responses, so promoted products' details may lag by up to the timeout
+    @cache_response(PROMOTIONS, CATALOG, timeout=PROMOTIONS_CACHE_TIMEOUT)
     def all_active(self, request):
         active_promotions = PromotionUtils.get_active_promotions()
         active_banners = PromoBanner.objects.filter(
@@ -124,7 +142,6 @@ class PublicPromotionsViewSet(viewsets.ViewSet):
             return Response({'error': 'product_id parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            from products.models import Product
             product = Product.objects.get(id=product_id)
             promotions = PromotionUtils.get_product_promotions(product)
             serializer = PromotionSerializer(promotions, many=True)
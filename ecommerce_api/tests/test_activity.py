@@ -0,0 +1,105 @@
+"""
+Tests for the buffered activity writer
+"""
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ecommerce_api import activity
+from ecommerce_api.activity import ActivitySink, record_activity
+from products.models import Product, ProductActivity
+from users.models import UserActivity
+
+User = get_user_model()
+
+
+@override_settings(ACTIVITY_SINK_MODE='thread', ACTIVITY_BATCH_SIZE=3, ACTIVITY_MAX_PENDING=5)
+class ActivitySinkTests(TestCase):
+    """Test buffering, flushing and backpressure without the writer thread"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='user@example.com', password='testpass123')
+        self.product = Product.objects.create(
+            name='Lamp', slug='lamp', price=Decimal('10.00'), sku='LAMP1'
+        )
+        UserActivity.objects.all().delete()
+        self.sink = ActivitySink()
+        patch.object(ActivitySink, '_start_writer').start()
+        patch.object(activity, 'sink', self.sink).start()
+        self.addCleanup(patch.stopall)
+
+    def record(self, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(count):
+                record_activity(UserActivity(user=self.user, action='login'))
+
+    def test_rows_are_written_on_flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_activity(
+                UserActivity(user=self.user, action='login'),
+                ProductActivity(product=self.product, action='view'),
+            )
+        self.assertFalse(UserActivity.objects.exists())
+
+        self.assertEqual(activity.flush_activity(), 2)
+        self.assertEqual(UserActivity.objects.get().action, 'login')
+        self.assertEqual(ProductActivity.objects.get().action, 'view')
+        self.assertEqual(activity.flush_activity(), 0)
+
+    def test_rolled_back_rows_are_never_buffered(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    record_activity(UserActivity(user=self.user, action='login'))
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.sink.flush(), 0)
+
+    def test_full_batch_wakes_the_writer(self):
+        self.record(2)
+        self.assertFalse(self.sink._wake.is_set())
+        self.record()
+        self.assertTrue(self.sink._wake.is_set())
+        self.assertFalse(UserActivity.objects.exists())
+
+    def test_backpressure_writes_in_the_request(self):
+        self.record(4)
+        self.assertFalse(UserActivity.objects.exists())
+        self.record()
+        self.assertEqual(UserActivity.objects.count(), 5)
+        self.assertEqual(self.sink._pending, [])
+
+    @override_settings(ACTIVITY_SINK_MODE='sync')
+    def test_sync_mode_writes_immediately(self):
+        record_activity(UserActivity(user=self.user, action='logout'))
+        self.assertEqual(UserActivity.objects.get().action, 'logout')
+        self.assertEqual(self.sink._pending, [])
+
+    def test_rows_keep_the_time_of_the_event(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_activity(UserActivity(user=self.user, action='login'))
+        recorded = self.sink._pending[0].timestamp
+        later = timezone.now() + timedelta(minutes=5)
+        with patch('django.utils.timezone.now', return_value=later):
+            activity.flush_activity()
+        self.assertEqual(UserActivity.objects.get().timestamp, recorded)
+
+    @override_settings(ACTIVITY_SINK_MODE='celery')
+    def test_celery_mode_sends_rows_to_a_task(self):
+        with patch.object(activity, '_send') as send:
+            with self.captureOnCommitCallbacks(execute=True):
+                record_activity(
+                    UserActivity(user=self.user, action='login'),
+                    ProductActivity(product=self.product, action='view'),
+                )
+        self.assertEqual(self.sink._pending, [])
+        rows = send.call_args[0][0]
+        # What the task receives
+        self.assertEqual(activity.write_rows(json.loads(json.dumps(activity.serialize_rows(rows)))), 2)
+        self.assertEqual(UserActivity.objects.get().timestamp, rows[0].timestamp)
+        self.assertEqual(ProductActivity.objects.get().action, 'view')
@@ -0,0 +1,89 @@
+"""
+Tests for the cached site counters
+"""
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from ecommerce_api.counters import CACHE_KEY, get_counters
+from products.admin import ProductReviewAdmin
+from products.models import Category, Product, ProductReview
+
+User = get_user_model()
+
+
+class SiteCountersTests(TestCase):
+    """Test the counters cache and its invalidation"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password='testpass123')
+        self.category = Category.objects.create(name='Books', slug='books')
+        self.product = Product.objects.create(
+            name='Novel', slug='novel', description='desc', price=Decimal('10.00'),
+            sku='BOOK1', category=self.category, status='ACTIVE'
+        )
+        Product.objects.create(
+            name='Draft', slug='draft', description='desc', price=Decimal('10.00'), sku='BOOK2'
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_counts(self):
+        counters = get_counters()
+        self.assertEqual(counters['product_count'], 1)
+        self.assertEqual(counters['user_count'], 1)
+        self.assertEqual(counters['active_users'], 1)
+        self.assertEqual(counters['new_users_today'], 1)
+        self.assertEqual(counters['review_count'], 0)
+        self.assertEqual(counters['category_count'], 1)
+        self.assertEqual(counters['users_by_role'], [{'role': self.user.role, 'count': 1}])
+
+    def test_cached_read_runs_no_queries(self):
+        get_counters()
+        with self.assertNumQueries(0):
+            get_counters()
+
+    def test_writes_invalidate(self):
+        get_counters()
+        Product.objects.create(
+            name='Atlas', slug='atlas', description='desc', price=Decimal('20.00'),
+            sku='BOOK3', status='ACTIVE'
+        )
+        self.assertEqual(get_counters()['product_count'], 2)
+
+        User.objects.create_user(email='other@example.com', password='testpass123')
+        self.assertEqual(get_counters()['user_count'], 2)
+
+        review = ProductReview.objects.create(
+            product=self.product, user=self.user, rating=5, title='Great', comment='Loved it'
+        )
+        self.assertEqual(get_counters()['review_count'], 0)
+        admin = ProductReviewAdmin(ProductReview, AdminSite())
+        with patch.object(admin, 'message_user'):
+            admin.approve_reviews(None, ProductReview.objects.filter(pk=review.pk))
+        self.assertEqual(get_counters()['review_count'], 1)
+
+    def test_login_does_not_invalidate(self):
+        get_counters()
+        self.client.login(email='user@example.com', password='testpass123')
+        self.assertIsNotNone(cache.get(CACHE_KEY))
+
+    def test_recomputed_on_a_new_day(self):
+        get_counters()
+        User.objects.filter(pk=self.user.pk).update(date_joined=timezone.now() - timedelta(days=2))
+        with patch('ecommerce_api.counters.timezone.localdate',
+                   return_value=timezone.localdate() + timedelta(days=1)):
+            self.assertEqual(get_counters()['new_users_today'], 0)
+
+    def test_home_view_reads_counters(self):
+        get_counters()
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['product_count'], 1)
+        self.assertEqual(response.context['category_count'], 1)
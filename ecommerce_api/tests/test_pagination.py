@@ -0,0 +1,102 @@
+"""
+Tests for the opt-in keyset pagination
+"""
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIRequestFactory
+from orders.models import Order
+from products.models import Product
+from products.views import ProductListAPIView
+from users.models import UserActivity
+
+User = get_user_model()
+
+
+class KeysetPaginationTests(APITestCase):
+    """Test cursor mode on the list endpoints"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        Product.objects.bulk_create([
+            Product(
+                name=f'Product {i}', slug=f'product-{i}', description='desc',
+                price=Decimal('10.00'), sku=f'SKU{i}', status='ACTIVE'
+            )
+            for i in range(120)
+        ])
+        # Identical timestamps force the id tie-breaker to do the work
+        Product.objects.update(created_at=timezone.now())
+
+    def get_products(self, params):
+        request = self.factory.get('/api/products/', params)
+        return ProductListAPIView.as_view()(request)
+
+    def test_page_number_pagination_is_default(self):
+        response = self.get_products({})
+        self.assertEqual(response.data['count'], 120)
+        self.assertEqual(len(response.data['results']), 50)
+
+    def test_cursor_mode_walks_every_row_once(self):
+        seen = []
+        response = self.get_products({'pagination': 'cursor'})
+        self.assertNotIn('count', response.data)
+        while True:
+            seen.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                break
+            self.assertIn('pagination=cursor', response.data['next'])
+            query = parse_qs(urlparse(response.data['next']).query)
+            response = self.get_products({key: value[0] for key, value in query.items()})
+
+        expected = list(Product.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_query_bounds_the_index_range(self):
+        first = self.get_products({'pagination': 'cursor'})
+        query = parse_qs(urlparse(first.data['next']).query)
+        with CaptureQueriesContext(connection) as context:
+            self.get_products({key: value[0] for key, value in query.items()})
+        page_query = next(q['sql'] for q in context.captured_queries if 'LIMIT 51' in q['sql'])
+        self.assertIn('"created_at" <= ', page_query)
+
+    def test_invalid_cursor(self):
+        response = self.get_products({'pagination': 'cursor', 'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_order_list_cursor_mode(self):
+        user = User.objects.create_user(email='buyer@test.com', password='pass')
+        for _ in range(3):
+            Order.objects.create(
+                user=user, shipping_address='1 Street', shipping_city='City',
+                shipping_state='State', shipping_zip_code='12345', shipping_country='Country',
+                email=user.email, subtotal=Decimal('10'), tax_amount=Decimal('0'),
+                shipping_cost=Decimal('0'), total=Decimal('10')
+            )
+        self.client.force_authenticate(user=user)
+        response = self.client.get('/api/orders/', {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNone(response.data['next'])
+
+    def test_activity_feed_is_stable_while_new_rows_arrive(self):
+        user = User.objects.create_user(email='active@test.com', password='pass')
+        UserActivity.objects.bulk_create([
+            UserActivity(user=user, action='LOGIN') for _ in range(25)
+        ])
+        self.client.force_authenticate(user=user)
+        existing = UserActivity.objects.filter(user=user).count()
+
+        # Each request logs a new activity, which would shift an OFFSET page
+        first = self.client.get('/api/users/user/activity/', {'pagination': 'cursor'})
+        self.assertEqual(len(first.data['results']), 20)
+        second = self.client.get(first.data['next'])
+        self.assertEqual(len(second.data['results']), existing + 1 - 20)
+        self.assertIsNone(second.data['next'])
+
+        ids = [item['id'] for item in first.data['results'] + second.data['results']]
+        self.assertEqual(len(ids), len(set(ids)))
@@ -0,0 +1,143 @@
+"""
+Tests for the public API response cache
+"""
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from products.models import Brand, Category, Product
+from products.stock import change_product_stock
+from products.views import BrandListAPIView, CategoryListAPIView, ProductDetailAPIView
+from promotions.models import PromoBanner
+from promotions.views import PromoBannerViewSet
+
+User = get_user_model()
+
+
+class ResponseCacheTests(TestCase):
+    """Test caching, invalidation and revalidation of public endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.category = Category.objects.create(name='Books', slug='books')
+        self.view = CategoryListAPIView.as_view()
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self, view, path, data=None, user=None, **extra):
+        request = self.factory.get(path, data, **extra)
+        if user is not None:
+            force_authenticate(request, user=user)
+        return view(request)
+
+    def test_second_request_served_from_cache(self):
+        first = self.get(self.view, '/api/products/categories/')
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            second = self.get(self.view, '/api/products/categories/')
+        self.assertEqual(second.content, first.content)
+        self.assertIn('ETag', second)
+        self.assertIn('Last-Modified', second)
+        self.assertIn('Authorization', second['Vary'])
+
+    def test_signals_invalidate(self):
+        self.get(self.view, '/api/products/categories/')
+        Category.objects.create(name='Music', slug='music')
+        response = self.get(self.view, '/api/products/categories/')
+        self.assertContains(response, 'Music')
+
+        brands = BrandListAPIView.as_view()
+        self.get(brands, '/api/products/brands/')
+        brand = Brand.objects.create(name='Acme')
+        self.assertContains(self.get(brands, '/api/products/brands/'), 'Acme')
+        brand.delete()
+        self.assertNotContains(self.get(brands, '/api/products/brands/'), 'Acme')
+
+    def test_varies_on_query_params_and_user(self):
+        self.get(self.view, '/api/products/categories/')
+        # A miss runs the paginated COUNT and SELECT again
+        with self.assertNumQueries(2):
+            self.get(self.view, '/api/products/categories/', {'page': 1})
+
+        user = User.objects.create_user(email='user@example.com', password='testpass123')
+        with self.assertNumQueries(2):
+            self.get(self.view, '/api/products/categories/', user=user)
+
+    def test_conditional_requests(self):
+        response = self.get(self.view, '/api/products/categories/')
+        etag = response['ETag']
+
+        response = self.get(self.view, '/api/products/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.get(
+            self.view, '/api/products/categories/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+        self.category.name = 'Novels'
+        self.category.save()
+        response = self.get(self.view, '/api/products/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_product_detail_and_errors(self):
+        product = Product.objects.create(
+            name='Novel', slug='novel', description='desc', price=Decimal('10.00'),
+            sku='BOOK1', category=self.category, status='ACTIVE'
+        )
+        detail = ProductDetailAPIView.as_view()
+        detail(self.factory.get(f'/api/products/{product.pk}/'), pk=product.pk)
+        product.name = 'Updated Novel'
+        product.save()
+
+        request = self.factory.get(f'/api/products/{product.pk}/')
+        self.assertContains(detail(request, pk=product.pk), 'Updated Novel')
+        # Errors are never cached
+        request = self.factory.get('/api/products/0/')
+        self.assertEqual(detail(request, pk=0).status_code, 404)
+        self.assertNotIn('ETag', detail(request, pk=0))
+
+    # Views are counted for trending with queries of their own
+    @mock.patch('products.views.record_view')
+    def test_product_changes_only_expire_that_product(self, record_view):
+        detail = ProductDetailAPIView.as_view()
+        novel, poem = [
+            Product.objects.create(
+                name=name, slug=name.lower(), price=Decimal('10.00'), sku=name.upper(),
+                quantity=5, category=self.category, status='ACTIVE'
+            )
+            for name in ('Novel', 'Poem')
+        ]
+        for product in (novel, poem):
+            detail(self.factory.get(f'/api/products/{product.pk}/'), pk=product.pk)
+        self.get(self.view, '/api/products/categories/')
+
+        change_product_stock({novel.pk: -2})
+        self.assertContains(detail(self.factory.get(f'/api/products/{novel.pk}/'), pk=novel.pk), '"quantity":3')
+        with self.assertNumQueries(0):
+            detail(self.factory.get(f'/api/products/{poem.pk}/'), pk=poem.pk)
+            self.get(self.view, '/api/products/categories/')
+
+        poem.name = 'Sonnet'
+        poem.save()
+        self.assertContains(detail(self.factory.get(f'/api/products/{poem.pk}/'), pk=poem.pk), 'Sonnet')
+        with self.assertNumQueries(0):
+            self.get(self.view, '/api/products/categories/')
+
+    def test_active_banners(self):
+        now = timezone.now()
+        view = PromoBannerViewSet.as_view({'get': 'active'}, **PromoBannerViewSet.active.kwargs)
+        self.assertEqual(self.get(view, '/api/promotions/promo-banners/active/').content, b'[]')
+        PromoBanner.objects.create(
+            title='Summer', image='promo_banners/summer.png',
+            start_date=now - timedelta(days=1), end_date=now + timedelta(days=1)
+        )
+        self.assertContains(self.get(view, '/api/promotions/promo-banners/active/'), 'Summer')
@@ -3,6 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
+from ecommerce_api.counters import invalidate_counters
 from .models import CustomUser, UserProfile, UserActivity
 
 @admin.register(UserProfile)
@@ -48,6 +49,9 @@ class UserActivityAdmin(admin.ModelAdmin):
     search_fields = ['user__email', 'ip_address', 'action', 'user_agent']
     readonly_fields = ['user_link', 'timestamp', 'ip_address', 'user_agent', 'details_display']
     date_hierarchy = 'timestamp'
+    list_select_related = ['user']
+    # COUNT(*) over the whole log on every page view is slow on a large table
+    show_full_result_count = False
     
     fieldsets = (
         ('Activity Information', {
@@ -199,9 +203,6 @@ class CustomUserAdmin(BaseUserAdmin):
         return format_html('<a href="{}">{} Activities</a>', url, count)
     user_activities_link.short_description = 'Activities'
     
-    def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('user_activities')
-    
     def get_readonly_fields(self, request, obj=None):
         readonly_fields = list(super().get_readonly_fields(request, obj))  
         if obj:  
@@ -230,6 +231,7 @@ admin.site.index_title = 'Welcome to E-Commerce Administration'
 # Custom actions
 def make_users_inactive(modeladmin, request, queryset):
     queryset.update(is_active=False)
+    invalidate_counters()
 make_users_inactive.short_description = "Mark selected users as inactive"
 
 def verify_users_email(modeladmin, request, queryset):
@@ -238,6 +240,7 @@ verify_users_email.short_description = "Verify email for selected users"
 
 def promote_to_staff(modeladmin, request, queryset):
     queryset.update(role=CustomUser.Role.STAFF)
+    invalidate_counters()
 promote_to_staff.short_description = "Promote to Staff role"
 
 CustomUserAdmin.actions = [make_users_inactive, verify_users_email, promote_to_staff]
\ No newline at end of file
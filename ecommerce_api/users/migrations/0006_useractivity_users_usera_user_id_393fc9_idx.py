@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-17 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_alter_useractivity_ip_address'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['user', 'timestamp', 'id'], name='users_usera_user_id_393fc9_idx'),
+        ),
+    ]
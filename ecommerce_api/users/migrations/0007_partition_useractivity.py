@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from ecommerce_api.partitions import partition_by_month, unpartition
+
+
+def partition(apps, schema_editor):
+    # Monthly partitions on PostgreSQL; a no-op on other databases
+    partition_by_month(schema_editor, apps.get_model('users', 'UserActivity'))
+
+
+def merge_partitions(apps, schema_editor):
+    unpartition(schema_editor, apps.get_model('users', 'UserActivity'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_useractivity_users_usera_user_id_393fc9_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, merge_partitions),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.13 on 2026-10-17 05:04
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_partition_useractivity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='useractivity',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -154,7 +154,8 @@ class UserActivity(models.Model):
     action = models.CharField(max_length=100, choices=ActivityType.choices)  
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # The time of the event; rows may be written later, see ecommerce_api/activity.py
+    timestamp = models.DateTimeField(default=timezone.now)
     details = models.JSONField(default=dict)
     
     class Meta:
@@ -163,6 +164,7 @@ class UserActivity(models.Model):
         indexes = [
             models.Index(fields=['timestamp']),
             models.Index(fields=['action']),
+            models.Index(fields=['user', 'timestamp', 'id']),
     ]
 
     def __str__(self):
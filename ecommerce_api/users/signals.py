@@ -1,8 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import UserProfile, UserActivity
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
 from django.contrib.auth import get_user_model
+from ecommerce_api.activity import record_activity
+from ecommerce_api.counters import invalidate_counters
 
 
 CustomUser = get_user_model()
@@ -43,13 +45,13 @@ def track_user_registration(sender, instance, created, **kwargs):
         ip_address = get_client_ip(request) if request else '127.0.0.1'
         user_agent = request.META.get('HTTP_USER_AGENT', 'System') if request else 'System'
         
-        UserActivity.objects.create(
+        record_activity(UserActivity(
             user=instance,
             action='registration',
             ip_address=ip_address,
             user_agent=user_agent,
             details={'method': 'system_created'}
-        )
+        ))
 
 # Track successful logins
 @receiver(user_logged_in)
@@ -64,21 +66,30 @@ def track_user_login(sender, request, user, **kwargs):
     if request:
         user_agent = request.META.get('HTTP_USER_AGENT', '')
     
-    UserActivity.objects.create(
+    record_activity(UserActivity(
         user=user,
         action='login',
         ip_address=ip_address,
         user_agent=user_agent,
         details={'method': 'web_login'}
-    )
+    ))
 # Track logouts
 @receiver(user_logged_out)
 def track_user_logout(sender, request, user, **kwargs):
-    UserActivity.objects.create(
+    record_activity(UserActivity(
         user=user,
         action='logout',
         ip_address=get_client_ip(request),
         user_agent=request.META.get('HTTP_USER_AGENT', ''),
         details={}
-    )
+    ))
 
+
+# Keep the dashboard user counters current
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_counters(sender, raw=False, update_fields=None, **kwargs):
+    # Logins only touch last_login, which is not counted
+    if raw or (update_fields and set(update_fields) == {'last_login'}):
+        return
+    invalidate_counters()
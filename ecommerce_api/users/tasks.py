@@ -0,0 +1,10 @@
+from celery import shared_task
+from ecommerce_api.activity import write_rows
+
+@shared_task
+def write_activity_task(data):
+    """
+    Celery task to insert the activity rows buffered by a request
+    (ACTIVITY_SINK_MODE = 'celery')
+    """
+    return write_rows(data)
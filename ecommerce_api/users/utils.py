@@ -39,18 +39,21 @@ def track_user_activity(user, action, request, details=None):
     """
     Helper function to track user activity.
     """
+    from ecommerce_api.activity import record_activity
     from .models import UserActivity
     
     if details is None:
         details = {}
     
-    return UserActivity.objects.create(
+    activity = UserActivity(
         user=user,
         action=action,
         ip_address=get_client_ip(request),
         user_agent=get_user_agent(request),
         details=details
     )
+    record_activity(activity)
+    return activity
 
 def validate_email_domain(email):
     """
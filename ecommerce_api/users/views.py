@@ -8,8 +8,6 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.utils import timezone
-from django.db.models import Count, Q
 from django.http import JsonResponse
 from .models import CustomUser, UserProfile, UserActivity
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
@@ -17,7 +15,9 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth import login, authenticate, logout
 from .forms import CustomAuthenticationForm, UserRegistrationForm
 from .utils import get_client_ip, is_staff_user, track_user_activity
-from rest_framework.pagination import PageNumberPagination
+from ecommerce_api.activity import record_activity
+from ecommerce_api.counters import get_counters
+from ecommerce_api.pagination import TimestampKeysetPagination
 from .serializers import UserActivitySerializer
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, 
@@ -116,13 +116,13 @@ def register_template_view(request):
                 messages.success(request, 'Registration successful!')
                 
                 # Track registration activity
-                UserActivity.objects.create(
+                record_activity(UserActivity(
                     user=user,
                     action='registration',
                     ip_address=get_client_ip(request),
                     user_agent=request.META.get('HTTP_USER_AGENT', ''),
                     details={'method': 'template_registration'}
-                )
+                ))
                 
                 return redirect('home')
             except Exception as e:
@@ -139,13 +139,13 @@ def logout_view(request):
     """Logout view"""
     if request.user.is_authenticated:
         # Track logout activity
-        UserActivity.objects.create(
+        record_activity(UserActivity(
             user=request.user,
             action='logout',
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             details={}
-        )
+        ))
     
     logout(request)
     messages.success(request, 'You have been logged out successfully.')
@@ -213,13 +213,13 @@ def profile_template_view(request):
         
         # Track profile update activity only if fields were actually changed
         if updated_fields:
-            UserActivity.objects.create(
+            record_activity(UserActivity(
                 user=user,
                 action='profile_update',
                 ip_address=get_client_ip(request),
                 user_agent=request.META.get('HTTP_USER_AGENT', ''),
                 details={'updated_fields': updated_fields}
-            )
+            ))
         
         messages.success(request, 'Profile updated successfully!')
         return redirect('profile-template')
@@ -233,13 +233,13 @@ def user_list_template_view(request):
     users = CustomUser.objects.all().select_related('user_profile')
     
     # Track admin viewing user list
-    UserActivity.objects.create(
+    record_activity(UserActivity(
         user=request.user,
         action='admin_view_user_list',
         ip_address=get_client_ip(request),
         user_agent=request.META.get('HTTP_USER_AGENT', ''),
         details={}
-    )
+    ))
     
     return render(request, 'users/user_list.html', {'users': users})
 
@@ -247,29 +247,25 @@ def user_list_template_view(request):
 @user_passes_test(is_staff_user)
 def admin_dashboard(request):
     """Admin dashboard with user statistics"""
-    total_users = CustomUser.objects.count()
-    active_users = CustomUser.objects.filter(is_active=True).count()
-    new_users_today = CustomUser.objects.filter(
-        date_joined__date=timezone.now().date()
-    ).count()
+    counters = get_counters()
     
     # User activity statistics
     recent_activities = UserActivity.objects.select_related('user').order_by('-timestamp')[:10]
     
     # Track admin viewing dashboard
-    UserActivity.objects.create(
+    record_activity(UserActivity(
         user=request.user,
         action='admin_view_dashboard',
         ip_address=get_client_ip(request),
         user_agent=request.META.get('HTTP_USER_AGENT', ''),
         details={}
-    )
+    ))
     
     context = {
-        'total_users': total_users,
-        'active_users': active_users,
-        'new_users_today': new_users_today,
-        'user_roles': CustomUser.objects.values('role').annotate(count=Count('id')),
+        'total_users': counters['user_count'],
+        'active_users': counters['active_users'],
+        'new_users_today': counters['new_users_today'],
+        'user_roles': counters['users_by_role'],
         'recent_activities': recent_activities,
     }
     
@@ -291,13 +287,13 @@ class UserRegistrationView(APIView):
             tokens = get_tokens_for_user(user)
             
             # Track registration activity
-            UserActivity.objects.create(
+            record_activity(UserActivity(
                 user=user,
                 action='registration',
                 ip_address=get_client_ip(request),
                 user_agent=request.META.get('HTTP_USER_AGENT', ''),
                 details={'method': 'api_registration'}
-            )
+            ))
             
             return Response(
                 {
@@ -321,13 +317,13 @@ class UserLoginView(APIView):
             tokens = get_tokens_for_user(user)
             
             # Track login activity
-            UserActivity.objects.create(
+            record_activity(UserActivity(
                 user=user,
                 action='login',
                 ip_address=get_client_ip(request),
                 user_agent=request.META.get('HTTP_USER_AGENT', ''),
                 details={'method': 'api_login'}
-            )
+            ))
             
             return Response(
                 {
@@ -343,13 +339,13 @@ class UserLoginView(APIView):
             if email:
                 try:
                     user = CustomUser.objects.get(email=email)
-                    UserActivity.objects.create(
+                    record_activity(UserActivity(
                         user=user,
                         action='login_failed',
                         ip_address=get_client_ip(request),
                         user_agent=request.META.get('HTTP_USER_AGENT', ''),
                         details={'reason': 'invalid_credentials_api'}
-                    )
+                    ))
                 except CustomUser.DoesNotExist:
                     pass
             
@@ -367,13 +363,13 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         response = super().update(request, *args, **kwargs)
         
         # Track profile update via API
-        UserActivity.objects.create(
+        record_activity(UserActivity(
             user=request.user,
             action='profile_update',
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             details={'method': 'api_update', 'updated_fields': list(request.data.keys())}
-        )
+        ))
         
         return response
 
@@ -424,13 +420,13 @@ class UserViewSet(ModelViewSet):
     def me(self, request):
         """Get current user profile"""
         # Track profile view via API
-        UserActivity.objects.create(
+        record_activity(UserActivity(
             user=request.user,
             action='profile_view',
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             details={'method': 'api_view'}
-        )
+        ))
         
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
@@ -443,13 +439,13 @@ class UserViewSet(ModelViewSet):
         serializer.save()
         
         # Track profile update via API
-        UserActivity.objects.create(
+        record_activity(UserActivity(
             user=request.user,
             action='profile_update',
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             details={'method': 'api_update_me', 'updated_fields': list(request.data.keys())}
-        )
+        ))
         
         return Response(serializer.data)
     
@@ -461,13 +457,13 @@ class UserViewSet(ModelViewSet):
         user.save()
         
         # Track deactivation activity
-        UserActivity.objects.create(
+        record_activity(UserActivity(
             user=user,
             action='deactivation',
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             details={'performed_by': request.user.email, 'method': 'api'}
-        )
+        ))
         
         return Response({'status': 'user deactivated'})
     
@@ -480,13 +476,13 @@ class UserViewSet(ModelViewSet):
         user.save()
         
         # Track promotion activity
-        UserActivity.objects.create(
+        record_activity(UserActivity(
             user=user,
             action='promotion_to_staff',
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             details={'performed_by': request.user.email, 'method': 'api'}
-        )
+        ))
         
         return Response({'status': 'user promoted to staff'})
     
@@ -494,21 +490,20 @@ class UserViewSet(ModelViewSet):
     def statistics(self, request):
         """Get user statistics (admin only)"""
         # Track admin viewing statistics
-        UserActivity.objects.create(
+        record_activity(UserActivity(
             user=request.user,
             action='admin_view_statistics',
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             details={'method': 'api'}
-        )
+        ))
         
+        counters = get_counters()
         stats = {
-            'total_users': CustomUser.objects.count(),
-            'active_users': CustomUser.objects.filter(is_active=True).count(),
-            'new_users_today': CustomUser.objects.filter(
-                date_joined__date=timezone.now().date()
-            ).count(),
-            'users_by_role': CustomUser.objects.values('role').annotate(count=Count('id')),
+            'total_users': counters['user_count'],
+            'active_users': counters['active_users'],
+            'new_users_today': counters['new_users_today'],
+            'users_by_role': counters['users_by_role'],
         }
         return Response(stats)
 
@@ -522,13 +517,13 @@ def api_login_view(request):
         login(request, user)
         
         # Track login activity
-        UserActivity.objects.create(
+        record_activity(UserActivity(
             user=user,
             action='login',
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             details={'method': 'api_session_login'}
-        )
+        ))
         
         user_serializer = UserProfileSerializer(user)
         return Response({
@@ -558,13 +553,13 @@ class EmailVerificationView(APIView):
         if token:
             # Only create activity if user is authenticated
             if request.user.is_authenticated:
-                UserActivity.objects.create(
+                record_activity(UserActivity(
                     user=request.user,  # Don't allow None
                     action='email_verified',
                     ip_address=get_client_ip(request),
                     user_agent=request.META.get('HTTP_USER_AGENT', '')[:255],
                     details={'method': 'api', 'token': token}
-                )
+                ))
             
             # TODO: Implement actual token verification logic here
             # For now, just return success
@@ -585,13 +580,13 @@ def send_verification_email(user, request):
     # 3. Send email with the link
     
     # Track email sending activity
-    UserActivity.objects.create(
+    record_activity(UserActivity(
         user=user,
         action='verification_email_sent',
         ip_address=get_client_ip(request),
         user_agent=request.META.get('HTTP_USER_AGENT', '')[:255],
         details={'method': 'api'}
-    )
+    ))
     
     return True  # Return True to indicate success
 
@@ -599,13 +594,13 @@ def verify_email_template(request, token):
     """Template view for email verification"""
     # Only create activity if user is authenticated
     if request.user.is_authenticated:
-        UserActivity.objects.create(
+        record_activity(UserActivity(
             user=request.user,  # Don't allow None
             action='email_verification_attempt',
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', '')[:255],
             details={'method': 'template', 'token': token}
-        )
+        ))
     
     # DEFINE the context variable here (this was missing)
     context = {'token': token, 'verified': False}
@@ -623,12 +618,12 @@ def verify_email_template(request, token):
 def log_user_activity(user, action, request, details=None):
     """Helper to create a user activity log entry."""
     if user and user.is_authenticated:
-        UserActivity.objects.create(
+        record_activity(UserActivity(
             user=user,
             action=action,
             ip_address=get_client_ip(request),
             user_agent=request.META.get("HTTP_USER_AGENT", "")[:255],  
-        )
+        ))
 
 
 @api_view(['GET'])
@@ -653,8 +648,8 @@ def user_activity_view(request):
     # Get user activities ordered by latest
     queryset = UserActivity.objects.filter(user=request.user).order_by("-timestamp")
 
-    # Paginate results
-    paginator = PageNumberPagination()
+    # Paginate results (?pagination=cursor switches to keyset pagination)
+    paginator = TimestampKeysetPagination()
     paginator.page_size = 20
     paginated_qs = paginator.paginate_queryset(queryset, request)
 